@@ -0,0 +1,272 @@
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+# The benchmarks run headless: the viewer modules get recording stand-ins of glfw and OpenGL.GL
+from lib import glstub
+glstub.install()
+
+import numpy as np
+from lib import corpus, group, lastlayer, notation, raster, scramble, symmetry
+from lib.Algorithm import Algorithm, compileAlgorithm
+from lib.Cube import Cube
+from lib.CubeRenderer import CubeRenderer
+from lib.CubeService import CubeService, SOLVED_RECORD
+from lib.CubeState import CubeState, N_ALL_MOVES
+from lib.FaceletState import FaceletState
+
+T_PERM = "R U R' U' R' F R2 U' R' U' R U R' F'"
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def _cycle(values):
+    """
+        Endless iterator over a list, cheaper than itertools.cycle plus next in the timed loops
+    """
+    while True:
+        yield from values
+
+
+def _turns(order):
+    turns = [((1, 0, 0), np.pi / 2, 0), ((0, 1, 0), -np.pi / 2, 0), ((0, 0, -1), np.pi, 0)]
+    if order > 2:
+        turns.append(((-1, 0, 0), np.pi / 2, 1))
+    return _cycle(turns)
+
+
+def _drawCube(order, models_changed):
+    cube = Cube(order)
+    cube.draw(0)
+
+    def op():
+        cube.models_changed = models_changed
+        cube.draw(0)
+    return op
+
+
+def _buildRenderer(order):
+    cube = Cube(order)
+    return lambda: CubeRenderer(0, cube)
+
+
+def _commitTurn(order):
+    cube = Cube(order)
+    turns = _turns(order)
+    return lambda: cube.commitTurn(*next(turns))
+
+
+def _applyMove():
+    state = CubeState()
+    moves = _cycle(list(range(N_ALL_MOVES)))
+    return lambda: state.applyMove(next(moves))
+
+
+def _applyAlgorithm(compiled):
+    state = CubeState()
+    if compiled:
+        algorithm = compileAlgorithm(T_PERM)
+        return lambda: algorithm.apply(state)
+    moves = T_PERM.split()
+    return lambda: state.applyMoves(moves)
+
+
+def _cyclesUncached():
+    algorithm = compileAlgorithm(T_PERM)
+
+    def cycles():
+        group.clearCache()
+        return group.cycles(algorithm)
+    return cycles
+
+
+def _serialize():
+    cube = Cube(3).commitTurn((1, 0, 0), np.pi / 2)
+    return cube.serialize
+
+
+def _deserialize():
+    data = Cube(3).commitTurn((1, 0, 0), np.pi / 2).serialize()
+    return lambda: Cube.deserialize(data)
+
+
+def _rotateFace(order):
+    state = FaceletState(order)
+    turns = _turns(order)
+    return lambda: state.rotateFace(*next(turns))
+
+
+def _isSolved():
+    cube = Cube(3).commitTurn((1, 0, 0), np.pi / 2)
+    return cube.is_solved
+
+
+def _rotateCubie():
+    cubie = Cube(3).cubies[0]
+    return lambda: cubie.rotateQuarter(0, 1)
+
+
+def _rotateCamera():
+    cube = Cube(3)
+    return lambda: cube.rotateCameraX(0.1).camera.matrix()
+
+
+def _render():
+    state = CubeState().applyMoves(["R", "U", "F'"])
+    return lambda: raster.render(state, size=64)
+
+
+def _canonicalState():
+    state = CubeState().applyMoves(T_PERM.split())
+    return lambda: symmetry.canonicalState(state, inverse=True)
+
+
+def _canonicalRecords(n):
+    records = corpus.packStates(*scramble.randomStates(n, np.random.default_rng(0)))
+    return lambda: symmetry.canonicalRecords(records)
+
+
+def _recognize():
+    lastlayer.getIndex()
+    state = compileAlgorithm("U (%s) U2" % T_PERM).apply(CubeState())
+    return lambda: lastlayer.recognize(state)
+
+
+def _serviceBatch(n):
+    requests = [{'state': SOLVED_RECORD, 'moves': T_PERM}] * n
+    service = CubeService()
+    return lambda: service.applyBatch(requests)
+
+
+# name: function returning the operation to time. Setup work happens outside of the measurement
+BENCHMARKS = {
+    'cube.generateCubies[3]': lambda: Cube(3).generateCubies,
+    'cube.generateCubies[10]': lambda: Cube(10).generateCubies,
+    'cube.getVertices[3]': lambda: Cube(3).getVertices,
+    'cube.getVertices[10]': lambda: Cube(10).getVertices,
+    'cube.getStickers[10]': lambda: Cube(10).getStickers,
+    'renderer.init[10]': lambda: _buildRenderer(10),
+    'cubie.rotateQuarter': _rotateCubie,
+    'cube.commitTurn[3]': lambda: _commitTurn(3),
+    'cube.commitTurn[10]': lambda: _commitTurn(10),
+    'cube.rotateCamera': _rotateCamera,
+    'cube.is_solved': _isSolved,
+    'cube.draw[3]': lambda: _drawCube(3, False),
+    'cube.draw[3,models_changed]': lambda: _drawCube(3, True),
+    'cube.draw[10,models_changed]': lambda: _drawCube(10, True),
+    'cube.serialize': _serialize,
+    'cube.deserialize': _deserialize,
+    'state.applyMove': _applyMove,
+    'state.applyMoves[T perm]': lambda: _applyAlgorithm(False),
+    'algorithm.apply[T perm]': lambda: _applyAlgorithm(True),
+    'algorithm.compile[uncached]': lambda: lambda: Algorithm(notation.parse("(R U R' U')3 Rw2 M' x")),
+    'group.order[T perm]': lambda: lambda: group.order(T_PERM),
+    'group.cycles[T perm,uncached]': _cyclesUncached,
+    'symmetry.canonicalState': _canonicalState,
+    'symmetry.canonicalRecords[1000]': lambda: _canonicalRecords(1000),
+    'lastlayer.recognize[T perm]': _recognize,
+    'facelet_state.rotateFace[20]': lambda: _rotateFace(20),
+    'raster.render[64px]': _render,
+    'service.apply[batch 256]': lambda: _serviceBatch(256),
+}
+
+
+def measure(op, min_time=0.2, repeat=5):
+    """
+        Operations per second (best of repeat runs) and memory allocated by one operation
+
+        op(function) - Operation to time, called without arguments
+        min_time(float) - Minimum duration of each run in seconds
+        repeat(int) - Number of runs
+    """
+    # Calibrate the number of calls per run, as timeit.autorange does
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        if time.perf_counter() - start >= min_time / 10:
+            break
+        number *= 10
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        best = min(best, (time.perf_counter() - start) / number)
+
+    # Peak of the memory allocated during a single call, above what was allocated before it
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    op()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'ops_per_sec': 1.0 / best, 'alloc_bytes': max(peak - before, 0)}
+
+
+def compare(results, baseline, tolerance):
+    """
+        Names of the benchmarks slower than the baseline by more than tolerance (a fraction)
+    """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline and result['ops_per_sec'] < baseline[name]['ops_per_sec'] * (1 - tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cube model, the vertex generation and the draw submission')
+    parser.add_argument('-k', metavar='PATTERN', default='*', help='only run the benchmarks matching a glob pattern')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds of each timed run')
+    parser.add_argument('--save', metavar='PATH', nargs='?', const=DEFAULT_BASELINE,
+                        help='write the results as the baseline (default: %(const)s)')
+    parser.add_argument('--compare', metavar='PATH', nargs='?', const=DEFAULT_BASELINE,
+                        help='compare against a baseline and exit with status 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='slowdown allowed by --compare, as a fraction of the baseline speed')
+    parser.add_argument('--list', action='store_true', help='list the benchmarks and exit')
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if fnmatch.fnmatch(name, args.k)]
+    if args.list:
+        print('\n'.join(names))
+        return
+
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    print('%-32s %14s %12s %10s' % ('benchmark', 'ops/sec', 'alloc', 'baseline'))
+    for name in names:
+        results[name] = measure(BENCHMARKS[name](), args.min_time)
+        ops = results[name]['ops_per_sec']
+        change = '%+9.1f%%' % (100 * (ops / baseline[name]['ops_per_sec'] - 1)) if name in baseline else ''
+        print('%-32s %14.1f %11dB %10s' % (name, ops, results[name]['alloc_bytes'], change), flush=True)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'numpy': np.__version__, 'machine': platform.machine(),
+                       'results': results}, f, indent=2)
+        print('Baseline written to %s' % args.save)
+
+    if args.compare is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print('Regressions over %d%%: %s' % (args.tolerance * 100, ', '.join(regressions)))
+            sys.exit(1)
+        print('No regressions over %d%%' % (args.tolerance * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,50 @@
+import argparse
+import json
+import os
+import sys
 import glfw
 from OpenGL.GL import *
 import numpy as np
-from lib.utils import keyHandler, createWindow, sendVertices
+from lib.utils import keyHandler, createWindow
 from lib.Cube import Cube
-from lib import globals
+from lib.SolutionCache import SolutionCache
+from lib.TurnScheduler import TurnScheduler
+from lib.Algorithm import compileAlgorithm
+from lib.FrameProfiler import FrameProfiler
+from lib.SessionRecorder import SessionRecorder
+from lib import globals, tables, utils, CubeRenderer as renderer_module
 
-# Shader filenames
-VERTEX_SHADER_FNAME = './lib/vertex_shader.glsl'
-FRAGMENT_SHADER_FNAME = './lib/fragment_shader.glsl'
+# Shader filenames, next to the modules so the viewer can be started from any directory
+LIB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib')
+VERTEX_SHADER_FNAME = os.path.join(LIB_DIR, 'vertex_shader.glsl')
+FRAGMENT_SHADER_FNAME = os.path.join(LIB_DIR, 'fragment_shader.glsl')
 
 def main():
+    parser = argparse.ArgumentParser(description='Interactive Rubik\'s cube')
+    parser.add_argument('--order', type=int, default=3, help='number of cubies along each edge of the cube')
+    parser.add_argument('--turn-duration', type=float, default=0.2, help='seconds taken by each face turn')
+    parser.add_argument('--coalesce', action='store_true',
+                        help='merge queued turns of the same layer (two quarter turns become a half turn)')
+    parser.add_argument('--moves', metavar='SEQUENCE',
+                        help='moves played at start, in standard notation. Ex: "(R U R\' U\')3 Rw2 x"')
+    parser.add_argument('--record', metavar='PATH',
+                        help='log every turn and camera change to a file (.gz to compress it), see replay.py')
+    parser.add_argument('--profile', action='store_true',
+                        help='record frame times and OpenGL calls, print their percentiles on exit')
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help='also write every frame to a JSON lines file (implies --profile)')
+    args = parser.parse_args()
+
+    try:
+        algorithm = compileAlgorithm(args.moves, args.order) if args.moves else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Frame instrumentation, does nothing unless enabled
+    profile = args.profile or args.profile_output is not None
+    globals.profiler = FrameProfiler(profile, path=args.profile_output)
+    globals.profiler.instrumentGL(renderer_module, utils, sys.modules[__name__])
+
     # Define the global lock variable
     globals.lock_rotation = False
 
@@ -22,11 +57,19 @@ def main():
     glfw.set_key_callback(window, keyHandler)
     
     # Define the global cube instance
-    globals.cube = Cube()    
+    globals.cube = Cube(args.order)
+
+    # Session log of every turn and camera change, including the first camera rotation below
+    if args.record:
+        globals.cube.record(SessionRecorder(args.record, globals.cube))
+
+    # Face turns are queued by the key handler and animated by the main loop
+    globals.scheduler = TurnScheduler(globals.cube, args.turn_duration, args.coalesce)
+    if algorithm is not None:
+        globals.scheduler.pushMoves(algorithm.faceTurns())
 
-    # Get the vertices from the cube and send them to the GPU
-    vertices = globals.cube.getVertices()
-    sendVertices(globals.program, vertices)
+    # Solutions found in previous runs
+    globals.solution_cache = SolutionCache(path=tables.tablePath('solutions', '.json'))
 
     # Set the window to be visible and the background color
     glfw.show_window(window)
@@ -38,13 +81,31 @@ def main():
 
     # Main loop
     while not glfw.window_should_close(window):
-        glfw.poll_events()
+        globals.profiler.beginFrame()
+
+        with globals.profiler.section('input'):
+            glfw.poll_events()
+
+        with globals.profiler.section('animation'):
+            globals.scheduler.update()
 
         # Draw the cube state in the window
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        globals.cube.draw(globals.program)
-        glfw.swap_buffers(window)
+        with globals.profiler.section('draw'):
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            globals.cube.draw(globals.program)
+
+        with globals.profiler.section('swap'):
+            glfw.swap_buffers(window)
+
+        globals.profiler.endFrame()
+
+    if profile:
+        print(json.dumps(globals.profiler.summary(), indent=2))
+    globals.profiler.close()
 
+    if globals.cube.recorder is not None:
+        globals.cube.recorder.close(globals.cube)
+    globals.solution_cache.save()
     glfw.terminate()
 
 
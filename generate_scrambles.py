@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from lib import corpus, scramble, solver
+
+# States drawn from each seed. The chunks of the workers are slices of these blocks, so the states only depend on
+# --seed: the first n of a longer run are the same
+BLOCK_SIZE = 10000
+
+
+def _generateChunk(args):
+    """
+        Lines of a chunk of states, and of their scrambles with solve, generated by a worker process from the seed
+        of its block
+    """
+    seed, offset, n, fmt, solve, max_length, timeout = args
+    rng = np.random.default_rng(seed)
+
+    cp, co, ep, eo = (a[offset:offset + n] for a in scramble.randomStates(BLOCK_SIZE, rng))
+    if fmt == 'corpus':
+        return corpus.packStates(cp, co, ep, eo)
+
+    strings = scramble.faceletStrings(cp, co, ep, eo)
+    if fmt == 'text' and not solve:
+        return ''.join(line + '\n' for line in strings)
+
+    lines = []
+    for i, string in enumerate(strings):
+        state = scramble.toState(cp[i], co[i], ep[i], eo[i])
+        line = {'state': string, 'hash': '%016x' % state.hash}
+        if solve:
+            line['scramble'] = ' '.join(scramble.scramble(state, max_length, timeout))
+        lines.append(json.dumps(line) if fmt == 'jsonl' else line['scramble'])
+
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream uniformly random 3x3x3 states, and their scrambles with '
+                                                 '--solve',
+                                     epilog='The states are drawn at more than 100000 per second. Solving takes most '
+                                            'of the time with --solve: about 5 to 10 scrambles per second per core. '
+                                            'To scramble only the states used, solve them later with '
+                                            'scramble.scramble(scramble.parseFaceletString(line)).')
+    parser.add_argument('-n', '--count', type=int, default=10, help='number of states')
+    parser.add_argument('-o', '--output', metavar='PATH', help='file to write (default: standard output)')
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--seed', type=int,
+                        help='seed of the random states. They do not depend on -n, -j or --chunk-size: a run gives '
+                             'the first n states of a longer one. The scrambles can differ when --timeout cuts a '
+                             'search short')
+    parser.add_argument('--format', choices=('text', 'jsonl', 'corpus'), default='text',
+                        help='text: one state (54 face letters) per line, or one scramble per line with --solve. '
+                             'jsonl: state, hash and, with --solve, scramble per line. corpus: binary state records '
+                             '(see lib/corpus.py), needs --output and can not be used with --solve')
+    parser.add_argument('--solve', action='store_true',
+                        help='also find the scramble of every state, the inverse of a solver solution')
+    parser.add_argument('--max-length', type=int, default=30,
+                        help='with --solve, accept the first scramble with at most this many moves. Shorter ones '
+                             'take longer')
+    parser.add_argument('--timeout', type=float, default=1.0,
+                        help='with --solve, seconds spent looking for a short enough scramble')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='states per task sent to a worker, at most %d (default: %d, 10 with --solve)'
+                             % (BLOCK_SIZE, BLOCK_SIZE))
+    args = parser.parse_args()
+
+    if args.format == 'corpus':
+        if not args.output:
+            parser.error('--format corpus needs --output')
+        if args.solve:
+            parser.error('--format corpus only holds states, it can not be used with --solve')
+
+    chunk_size = min(args.chunk_size or (10 if args.solve else BLOCK_SIZE), BLOCK_SIZE)
+
+    # One independent seed per block of BLOCK_SIZE states, the i-th child of a SeedSequence does not depend on the
+    # number of children. The chunks never cross a block
+    seeds = np.random.SeedSequence(args.seed).spawn(-(-args.count // BLOCK_SIZE))
+    tasks = []
+    for block, seed in enumerate(seeds):
+        size = min(BLOCK_SIZE, args.count - block * BLOCK_SIZE)
+        tasks += [(seed, offset, min(chunk_size, size - offset), args.format, args.solve, args.max_length,
+                   args.timeout) for offset in range(0, size, chunk_size)]
+
+    start = time.perf_counter()
+    if args.format == 'corpus':
+        records = corpus.createCorpus(args.output, args.count)
+        out = None
+    else:
+        out = open(args.output, 'w') if args.output else sys.stdout
+
+    def write(chunks):
+        written = 0
+        for chunk in chunks:
+            if out is None:
+                records[written:written + len(chunk)] = chunk
+                written += len(chunk)
+            else:
+                out.write(chunk)
+
+    try:
+        if args.processes <= 1 or len(tasks) <= 1:
+            if args.solve:
+                solver.getTables()
+            write(_generateChunk(task) for task in tasks)
+        else:
+            # The workers load the solver tables once, memory-mapped so the pages are shared between them
+            with Pool(args.processes, initializer=solver.getTables if args.solve else None) as pool:
+                write(pool.imap(_generateChunk, tasks))
+        if out is sys.stdout:
+            out.flush()
+    except BrokenPipeError:
+        # The reader went away (ex: piped to head). Point stdout to devnull so the flush at exit does not fail again
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if out is None:
+            records.flush()
+        elif out is not sys.stdout:
+            out.close()
+
+    seconds = time.perf_counter() - start
+    print('%d states in %.2fs, %.0f/s' % (args.count, seconds, args.count / max(seconds, 1e-9)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
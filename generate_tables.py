@@ -0,0 +1,48 @@
+import argparse
+import os
+import signal
+import sys
+import time
+from lib import tables
+
+
+def printProgress(stats):
+    """
+        Print the statistics of a completed breadth-first search level
+    """
+    print('%s: depth %2d, %10d new, %5.1f%% done, %6.1fs, %.2fM states/s' % (
+        stats['name'], stats['depth'], stats['new'], 100.0 * stats['visited'] / stats['size'],
+        stats['seconds'], stats['rate'] / 1e6), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the pruning tables used by the solver')
+    parser.add_argument('names', nargs='*', default=tables.SOLVER_TABLES,
+                        help='tables to generate (default: the solver tables). Available: %s' % ', '.join(tables.PRUNING_TABLES))
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--force', action='store_true', help='rebuild the tables that already exist')
+    args = parser.parse_args()
+
+    # Turn a kill into a normal exit so the shared memory is released. The table resumes from its last level
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+
+    print('Move definitions %s, tables in %s' % (tables.MOVES_FINGERPRINT, os.path.dirname(tables.tablePath(''))))
+
+    for name in args.names:
+        if name not in tables.PRUNING_TABLES:
+            parser.error('unknown table %s' % name)
+
+        path = tables.tablePath(name)
+        if os.path.exists(path) and not args.force:
+            print('%s: already generated' % name)
+            continue
+        if os.path.exists(path):
+            os.remove(path)
+
+        start = time.perf_counter()
+        tables.generateTable(name, args.processes, printProgress)
+        print('%s: done in %.1fs (%d bytes)' % (name, time.perf_counter() - start, os.path.getsize(path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+from functools import lru_cache
+
+import numpy as np
+from lib import notation
+from lib.CubeBatch import CubeBatch
+from lib.CubeState import CubeState, CORNER_PERM, CORNER_ORI, EDGE_PERM, EDGE_ORI, CENTER_PERM, moveIndex
+from lib.FaceletState import layerTurn
+
+# Number of compiled algorithms kept by compileAlgorithm
+ALGORITHM_CACHE_SIZE = 1024
+
+
+def _moved(perm, ori):
+    """
+        (slot, source slot, orientation change) of the slots changed by a composed permutation, as in CORNER_MOVED
+    """
+    return [(i, int(perm[i]), int(ori[i])) for i in range(len(perm)) if perm[i] != i or ori[i] != 0]
+
+
+class Algorithm:
+    """
+        Sequence of moves compiled into a single permutation
+
+        The sequence is simplified, then all of its turns are composed once: the corner, edge and center tables of
+        CubeState for the 3x3x3 cube and a facelet permutation for every order. Applying the algorithm costs the
+        same as a single move, whatever its length
+    """
+
+    def __init__(self, turns, order=3):
+        """
+            turns(list(tuple)) - Layer turns given by notation.parse
+            order(int) - Number of cubies along each edge of the cube
+        """
+        self.order = order
+        self.turns = notation.simplify(turns)
+        self.text = notation.toText(self.turns, order)
+
+        # Facelet permutation, after the algorithm facelets[dst] = old facelets[src]
+        perm = np.arange(6 * order * order)
+        for face, ang, depth in notation.faceTurns(self.turns, order):
+            axis = [i for i, x in enumerate(face) if x != 0][0]
+            dst, src = layerTurn(order, axis, face[axis] * (order - 1 - 2 * depth), int(round(ang / (np.pi / 2))))
+            perm[dst] = perm[src]
+        self.facelet_perm = perm
+        self.dst = np.flatnonzero(perm != np.arange(perm.size))
+        self.src = perm[self.dst]
+
+        if order == 3:
+            self._composeTables()
+
+    def _composeTables(self):
+        """
+            Compose the CubeState move tables of every turn. After the moves a then b the table is
+            perm = perm_a[perm_b] and ori = ori_a[perm_b] + ori_b
+        """
+        cp, co = np.arange(8), np.zeros(8, dtype=np.int8)
+        ep, eo = np.arange(12), np.zeros(12, dtype=np.int8)
+        ct = np.arange(6)
+
+        for face, ang, depth in notation.faceTurns(self.turns, 3):
+            move = moveIndex(face, ang, depth)
+            cp, co = cp[CORNER_PERM[move]], (co[CORNER_PERM[move]] + CORNER_ORI[move]) % 3
+            ep, eo = ep[EDGE_PERM[move]], (eo[EDGE_PERM[move]] + EDGE_ORI[move]) % 2
+            ct = ct[CENTER_PERM[move]]
+
+        self.corner_perm, self.corner_ori = cp, co
+        self.edge_perm, self.edge_ori = ep, eo
+        self.center_perm = ct
+        self.moved = (_moved(cp, co), _moved(ep, eo), _moved(ct, np.zeros(6, dtype=np.int8)))
+
+    def __len__(self):
+        """
+            Number of moves of the simplified sequence
+        """
+        return len(self.turns)
+
+    def __repr__(self):
+        return 'Algorithm(%r, order=%d)' % (self.text, self.order)
+
+    def is_identity(self):
+        """
+            The algorithm leaves every sticker where it was
+        """
+        return self.dst.size == 0
+
+    def apply(self, state):
+        """
+            Apply the algorithm to a state in one step
+
+            state(CubeState | FaceletState | CubeBatch) - State to change, every cube of a batch
+        """
+        if isinstance(state, CubeState):
+            if self.order != 3:
+                raise ValueError('A CubeState is a 3x3x3 cube, the algorithm is for order %d' % self.order)
+            return state.applyPermutation(self.corner_perm, self.corner_ori, self.edge_perm, self.edge_ori,
+                                          self.center_perm, self.moved)
+
+        if isinstance(state, CubeBatch):
+            if self.order != 3:
+                raise ValueError('A CubeBatch holds 3x3x3 cubes, the algorithm is for order %d' % self.order)
+            state.facelets = state.facelets[:, self.facelet_perm]
+            return state
+
+        if state.order != self.order:
+            raise ValueError('The cube has order %d, the algorithm is for order %d' % (state.order, self.order))
+        state.facelets[self.dst] = state.facelets[self.src]
+        return state
+
+    def faceTurns(self):
+        """
+            (face, ang, depth) arguments of Cube.drawSlowRotateFace for every layer turned, to animate the algorithm
+            Ex: globals.scheduler.pushMoves(algorithm.faceTurns())
+        """
+        return notation.faceTurns(self.turns, self.order)
+
+
+@lru_cache(maxsize=ALGORITHM_CACHE_SIZE)
+def compileAlgorithm(text, order=3):
+    """
+        Compiled algorithm of a sequence in standard notation, kept in a least recently used cache. Raises ValueError
+        for invalid sequences
+
+        text(str) - Sequence of moves. Ex: "(R U R' U')3", see lib/notation.py
+        order(int) - Number of cubies along each edge of the cube
+    """
+    return Algorithm(notation.parse(text, order), order)
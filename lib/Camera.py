@@ -0,0 +1,99 @@
+import numpy as np
+
+
+def rotationMatrix(axis, ang):
+    """
+        4x4 rotation matrix around one of the axes, same direction as CubeState.quarterTurnMatrix
+
+        axis(int) - 0, 1 or 2 for the x, y or z axis
+        ang(float) - Angle of rotation
+    """
+    c, s = np.cos(ang), np.sin(ang)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+
+    mat_rot = np.identity(4)
+    mat_rot[i, i], mat_rot[i, j], mat_rot[j, i], mat_rot[j, j] = c, -s, s, c
+    return mat_rot
+
+
+class Camera:
+    """
+        Camera shared by every cubie of the cube
+
+        Rotations are kept apart from the scale and translations so that the cube always rotates around its own
+        center. model is a rotation of the whole cube applied before the camera. The matrix given to the vertex
+        shader is camera @ camera_rotation @ model, composed only after a change
+    """
+
+    def __init__(self):
+        self.camera = np.identity(4)
+        self.camera_rotation = np.identity(4)
+        self.model = np.identity(4)
+        self._matrix = None
+
+        # SessionRecorder notified of every change, see Cube.record
+        self.recorder = None
+
+    def matrix(self):
+        """
+            4x4 camera matrix applied after the cubie matrices
+        """
+        if self._matrix is None:
+            self._matrix = (self.camera @ self.camera_rotation @ self.model).astype(np.float32)
+        return self._matrix
+
+    def scale(self, s):
+        """
+            Scale the camera
+
+            s(float) - Scale factor
+        """
+        mat_scale = np.diag([s, s, s, 1.0])
+
+        self.camera = mat_scale @ self.camera
+        self._matrix = None
+        if self.recorder is not None:
+            self.recorder.camera('scale', s)
+        return self
+
+    def rotate(self, axis, ang):
+        """
+            Rotate the camera around one of the axes
+
+            axis(int) - 0, 1 or 2 for the x, y or z axis
+            ang(float) - Angle of rotation
+        """
+        self.camera_rotation = rotationMatrix(axis, ang) @ self.camera_rotation
+        self._matrix = None
+        if self.recorder is not None:
+            self.recorder.camera('rotate', axis, ang)
+        return self
+
+    def rotateModel(self, axis, ang):
+        """
+            Rotate the whole cube around one of its axes
+
+            axis(int) - 0, 1 or 2 for the x, y or z axis
+            ang(float) - Angle of rotation
+        """
+        self.model = rotationMatrix(axis, ang) @ self.model
+        self._matrix = None
+        if self.recorder is not None:
+            self.recorder.camera('rotateModel', axis, ang)
+        return self
+
+    def translate(self, axis, dist):
+        """
+            Translate the camera along one of the axes
+
+            axis(int) - 0, 1 or 2 for the x, y or z axis
+            dist(float) - Distance to translate
+        """
+        mat_transl = np.identity(4)
+        mat_transl[axis, 3] = dist
+
+        self.camera = mat_transl @ self.camera
+        self._matrix = None
+        if self.recorder is not None:
+            self.recorder.camera('translate', axis, dist)
+        return self
@@ -1,108 +1,242 @@
-import glfw
 import numpy as np
+from functools import lru_cache
 from lib import globals
-from OpenGL.GL import *
-from lib.Cubie import Cubie
+from lib.Cubie import Cubie, VERTEX_SIGNS
+from lib.Camera import Camera
+from lib.CubeState import CubeState, CORNERS, EDGES, CENTERS, FACES
+from lib.FaceletState import FaceletState
+from lib.corpus import packState, unpackState
+from lib.facelets import FACE_NORMALS
+from lib.rotations import ROTATIONS
+
+@lru_cache(maxsize=None)
+def _placement(piece, slot, ori):
+    """
+        (home position, rotation index) of the cubie of a piece sitting on a slot. Sticker k of the piece is on the
+        sticker k + ori of the slot
+    """
+    src = np.array([FACES[f] for f in piece]).T
+    dst = np.array([FACES[slot[(k + ori) % len(slot)]] for k in range(len(slot))]).T
+    home = tuple(float(x) for x in src.sum(axis=1))
+    return home, int(np.flatnonzero((ROTATIONS @ src == dst).all(axis=(1, 2)))[0])
 
-X_FACE_IDX = 0
-Y_FACE_IDX = 1
-Z_FACE_IDX = 2
 
 class Cube:
     """
         Cube class that controls the cubies and the camera movements
     """
 
-    def __init__(self):
+    def __init__(self, order=3):
+        """
+            order(int) - Number of cubies along each edge of the cube
+        """
+        self.order = order
+
         # Define the cubies list
         self.cubies = self.generateCubies()
+
+        # Camera shared by all the cubies
+        self.camera = Camera()
+
+        # Integer permutation/orientation state, updated with a table lookup on every face turn. The other orders
+        # keep the sticker colors instead
+        self.state = CubeState() if order == 3 else FaceletState(order)
+
+        # Instanced renderer, created on the first draw. The cubie matrices are uploaded again only when
+        # models_changed is set
+        self.renderer = None
+        self.models_changed = True
+
+        # (axis, layer, angle) of the layer turn being animated by the vertex shader, None between turns
+        self.turn = None
+
+        # SessionRecorder logging the turns and camera changes, see record
+        self.recorder = None
     
     def is_solved(self):
-        return all([cubie.is_solved() for cubie in self.cubies])
+        """
+            Constant time check, the state keeps a running count of the solved pieces
+        """
+        return self.state.is_solved()
+
+    def piecesSolved(self):
+        """
+            Number of pieces in their solved position and orientation (26 when solved). Stickers for the orders
+            other than 3
+        """
+        return self.state.solved_pieces
+
+    def stateHash(self):
+        """
+            64-bit Zobrist hash of the cube state, updated on every face turn
+        """
+        return self.state.hash
+
+    def setState(self, state):
+        """
+            Move every cubie to its place in a 3x3x3 state and make it the state of the cube
+
+            The rotation of a corner or edge cubie is the one taking the stickers of its piece to the stickers of
+            its slot. A center cubie only shows one sticker, any rotation taking it to its slot does
+
+            state(CubeState) - State to show
+        """
+        if self.order != 3:
+            raise ValueError('A CubeState describes a 3x3x3 cube, not a cube of order %d' % self.order)
+
+        rotations = {}
+        for slots, perm, ori in ((CORNERS, state.cp, state.co), (EDGES, state.ep, state.eo), (CENTERS, state.ct, None)):
+            for i, slot in enumerate(slots):
+                home, rotation = _placement(slots[perm[i]], slot, int(ori[i]) if ori is not None else 0)
+                rotations[home] = rotation
+
+        for cubie in self.cubies:
+            cubie.setOrientation(rotations[cubie.home])
+
+        self.state = state.copy()
+        self.models_changed = True
+        self.turn = None
+        return self
+
+    def serialize(self):
+        """
+            20 bytes describing the state of a 3x3x3 cube, see lib/corpus.py
+        """
+        if self.order != 3:
+            raise ValueError('Only the 3x3x3 cube has a binary state format')
+        return packState(self.state)
+
+    @classmethod
+    def deserialize(cls, data):
+        """
+            3x3x3 cube in the state written by serialize
+
+            data(bytes) - 20 bytes given by serialize, or a record of a corpus
+        """
+        return cls(3).setState(unpackState(data))
 
     def generateCubies(self):
         """
-            Generate a 3x3x3 cube with the cubies in the correct positions
+            Generate the cubies on the surface of the cube in the correct positions
+
+            The inner cubies are never visible, so they are not created. Each cubie only draws its faces on the
+            surface of the cube
         """
-        cubies = []
-        len = 0.15
+        n = self.order
+        len = 0.45 / n
+        center = (n - 1) / 2
 
-        for i in range(-1, 2, 1):
-            for j in range(-1, 2, 1):
-                for k in range(-1, 2, 1):
-                    cubies.append(Cubie((i, j, k), len))
+        # Positions of the whole n x n x n grid in (i, j, k) order, then only the ones on the surface
+        positions = np.indices((n, n, n)).reshape(3, -1).T - center
+        positions = positions[np.abs(positions).max(axis=1) == center]
+        outer = positions @ FACE_NORMALS.T == center
 
-        return cubies
+        return [Cubie(pos, len, np.flatnonzero(faces)) for pos, faces in zip(positions.tolist(), outer)]
     
     def getVertices(self):
         """
             Combine the vertices of all the cubies in a single matrix using the cubies order in the self.cubies list
         """
-        vertices = np.empty((0, 3), dtype=np.float32)
-        for cubie in self.cubies:
-            vertices = np.vstack((vertices, cubie.getVertices()))
-        return vertices
+        len = 0.45 / self.order
+        homes = np.array([cubie.home for cubie in self.cubies])
+        return (homes[:, None, :] * 2 * len + VERTEX_SIGNS * len).reshape(-1, 3).astype(np.float32)
+
+    def getStickers(self):
+        """
+            Geometry of the stickers on the surface of the cube in one pass, in the order of the cubies and of
+            their faces. Only these can be seen, the other cubie faces are always inside the cube
+
+            Returns (cubie, corner, edge_u, edge_v, face): index in self.cubies, first corner and the two edges of
+            the quad (opengl coordinate, solved cube) and face index, which is also the color index in Cubie.colors
+        """
+        counts = [len(cubie.faces) for cubie in self.cubies]
+        cubie = np.repeat(np.arange(len(self.cubies)), counts)
+        face = np.fromiter((f for c in self.cubies for f in c.faces), dtype=np.intp, count=cubie.size)
+
+        half = 0.45 / self.order
+        homes = np.array([c.home for c in self.cubies])[cubie]
+        verts = homes[:, None, :] * 2 * half + VERTEX_SIGNS.reshape(6, 4, 3)[face] * half
+        return cubie, verts[:, 0], verts[:, 1] - verts[:, 0], verts[:, 2] - verts[:, 0], face
+
+    def getCaps(self):
+        """
+            Black squares closing the gaps opened inside the cube by a layer turn
+
+            Between two adjacent layers there are two caps, one moving with each layer, facing each other. They are
+            only drawn while a layer next to them is turning, the rest of the time they are hidden inside the cube
+
+            Returns (layer, corner, edge_u, edge_v, normal): position of the cubies of the layer the cap moves with
+            (cubie coordinate), first corner and the two edges of the square (opengl coordinate) and the normal
+            pointing from the layer to the gap
+        """
+        n = self.order
+        center = (n - 1) / 2
+        axes = np.identity(3)
+
+        # Boundaries between the layers k and k + 1 of every axis, each one with a cap on both sides
+        axis, k = np.divmod(np.arange(3 * (n - 1)), n - 1)
+        axis, k, side = np.repeat(axis, 2), np.repeat(k, 2), np.tile([0, 1], 3 * (n - 1))
+        normal = axes[axis] * (1 - 2 * side)[:, None]
+        layer = axes[axis] * (k + side - center)[:, None]
+
+        u, v = axes[(axis + 1) % 3] * 0.9, axes[(axis + 2) % 3] * 0.9
+        plane = axes[axis] * ((k + 0.5 - center) * 0.9 / n)[:, None]
+        return layer, plane - (u + v) / 2, u, v, normal
     
     def scale(self, s):
         """
             Scale the cube by a factor s
             s(float) - Scale factor
         """
-        for cubie in self.cubies:
-            cubie.scale(s)
+        self.camera.scale(s)
+        return self
 
     def rotateX(self, ang):
         """
-            Rotate the cube around the X axis by an angle ang. Rotates each cubie individually
+            Rotate the cube around the X axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateX(ang)
+        self.camera.rotateModel(0, ang)
         return self
     
     def rotateCameraX(self, ang):
         """
-            Rotate the cube camera around the X axis by an angle ang. Rotates each cubie individually
+            Rotate the cube camera around the X axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateCameraX(ang)
+        self.camera.rotate(0, ang)
         return self
 
     def rotateY(self, ang):
         """
-            Rotate the cube around the Y axis by an angle ang. Rotates each cubie individually
+            Rotate the cube around the Y axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateY(ang)
+        self.camera.rotateModel(1, ang)
         return self
     
     def rotateCameraY(self, ang):
         """
-            Rotate the cube camera around the Y axis by an angle ang. Rotates each cubie individually
+            Rotate the cube camera around the Y axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateCameraY(ang)
+        self.camera.rotate(1, ang)
         return self
     
     def rotateZ(self, ang):
         """
-            Rotate the cube around the Z axis by an angle ang. Rotates each cubie individually
+            Rotate the cube around the Z axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateZ(ang)
+        self.camera.rotateModel(2, ang)
         return self
     
     def rotateCameraZ(self, ang):
         """
-            Rotate the cube camera around the Z axis by an angle ang. Rotates each cubie individually
+            Rotate the cube camera around the Z axis by an angle ang
             ang(float) - Rotation angle
         """
-        for cubie in self.cubies:
-            cubie.rotateCameraZ(ang)
+        self.camera.rotate(2, ang)
         return self
     
     def translateCameraX(self, dist):
@@ -110,8 +244,7 @@ class Cube:
             Translate the cube camera along the X axis by a distance dist
             dist(float) - Translation distance
         """
-        for cubie in self.cubies:
-            cubie.translateCameraX(dist)
+        self.camera.translate(0, dist)
         return self
     
     def translateCameraY(self, dist):
@@ -119,8 +252,7 @@ class Cube:
             Translate the cube camera along the Y axis by a distance dist
             dist(float) - Translation distance
         """
-        for cubie in self.cubies:
-            cubie.translateCameraY(dist)
+        self.camera.translate(1, dist)
         return self
     
     def translateCameraZ(self, dist):
@@ -128,70 +260,92 @@ class Cube:
             Translate the cube camera along the Z axis by a distance dist
             dist(float) - Translation distance
         """
-        for cubie in self.cubies:
-            cubie.translateCameraZ(dist)
+        self.camera.translate(2, dist)
         return self
     
     
-    def drawSlowRotateFace(self, window, program, face, ang):
+    def layer(self, face, depth=0):
+        """
+            (axis, position along the axis) of a layer of cubies
+
+            face (tuple(int, int, int)): Face the layer is counted from. Ex: (1, 0, 0) for the R face
+            depth (int): Layer counted from the face. 0 is the face itself
+        """
+        face_idx, face_value = [(i, x) for i, x in enumerate(face) if x == 1 or x == -1][0]
+        return face_idx, face_value * ((self.order - 1) / 2 - depth)
+
+    def commitTurn(self, face, ang, depth=0):
+        """
+            Apply the exact rotation of a layer turn to the cubies and to the cube state and end its animation
+
+            face (tuple(int, int, int)): Face the layer is counted from. Ex: (1, 0, 0) for the R face
+            ang (float): Rotation angle, must be a multiple of pi/2
+            depth (int): Layer to rotate, counted from the face. 0 rotates the face itself
+        """
+        # The state first: it raises ValueError for a layer the cube does not have, before any cubie has moved
+        self.state.rotateFace(face, ang, depth)
+
+        face_idx, layer_value = self.layer(face, depth)
+        quarter_turns = int(round(ang / (np.pi / 2)))
+        for cubie in self.cubies:
+            if cubie.pos[face_idx] == layer_value:
+                cubie.rotateQuarter(face_idx, quarter_turns)
+
+        self.models_changed = True
+        self.turn = None
+
+        if self.recorder is not None:
+            self.recorder.turn(face, ang, depth)
+        return self
+
+    def record(self, recorder):
+        """
+            Log every committed layer turn and every camera change from now on
+
+            recorder(SessionRecorder) - Log to write, None to stop recording
+        """
+        self.recorder = recorder
+        self.camera.recorder = recorder
+        return self
+
+    def drawSlowRotateFace(self, window, program, face, ang, depth=0):
         """
             Function to animate the rotation of a face of the cube
-            The logic may be a little bit tricky
+            Blocks until the animation ends, see TurnScheduler for the animation driven by the main loop
 
             window (glfw.window): Window to draw
             program (OpenGL.GL.shaders.ShaderProgram): Shader program to use
             face (tuple(int, int, int)): Face to rotate. Ex: (1, 0, 0) rotaciona a face que possui um cubie na posição (1, 0, 0)
             ang (float): Angle to rotate
+            depth (int): Layer to rotate, counted from the face. 0 rotates the face itself
         """
-        
+
+        # The window modules are only loaded by the code drawing the cube, a headless Cube never imports them
+        import glfw
+        from OpenGL.GL import glClear, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT
+
         # Lock the rotation of other faces during the animation of the current face
         globals.lock_rotation = True
 
-        # Index of face that is equal to 1 or -1
-        face_idx, face_value = [(i, x) for i, x in enumerate(face) if x == 1 or x == -1][0]
+        # Index of face that is equal to 1 or -1 and the position of the layer along that axis
+        face_idx, layer_value = self.layer(face, depth)
 
         # Define the number of steps used and the angle delta for each step 
         ang_steps = 20
         ang_dt = ang / ang_steps
 
-        # Get the indexes of the cubies that are on the face to be rotated
-        cubies_idx_on_face = [i for i, cubie in enumerate(self.cubies) if cubie.pos[face_idx] == face_value]
-
-        # For each step in the animation
+        # The vertex shader rotates the cubies of the layer, only the angle changes between the steps
         for i in range(ang_steps):
+            self.turn = (face_idx, layer_value, ang_dt * (i + 1))
 
-            # Use different rotation functions depending on the face to be rotated
-
-            if face_idx == X_FACE_IDX:
-                for idx in cubies_idx_on_face:
-                    self.cubies[idx].rotateX(ang_dt)
-
-            elif face_idx == Y_FACE_IDX:
-                for idx in cubies_idx_on_face:
-                    self.cubies[idx].rotateY(ang_dt)
-
-            elif face_idx == Z_FACE_IDX:
-                for idx in cubies_idx_on_face:
-                    self.cubies[idx].rotateZ(ang_dt)
-            
             # Draw the cube
             glfw.poll_events()
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
             self.draw(program)
             glfw.swap_buffers(window)
 
-        # Update the position variable on each cubie that was rotated
-        if face_idx == 0:
-            for idx in cubies_idx_on_face:
-                self.cubies[idx].rotatePosX(ang)
-
-        elif face_idx == 1:
-            for idx in cubies_idx_on_face:
-                self.cubies[idx].rotatePosY(ang)
-
-        elif face_idx == 2:
-            for idx in cubies_idx_on_face:
-                self.cubies[idx].rotatePosZ(ang)
+        # Commit the exact rotation to the cubies of the layer
+        self.commitTurn(face, ang, depth)
 
         # Unlock the rotation of other faces
         globals.lock_rotation = False
@@ -200,7 +354,14 @@ class Cube:
 
     def draw(self, program):
         """
-            Draw the cube
+            Draw the cube with a single instanced draw call for the stickers and another one for their borders
         """
-        for index, cubie in enumerate(self.cubies):
-            cubie.draw(program, index * 24)
+        if self.renderer is None:
+            from lib.CubeRenderer import CubeRenderer
+            self.renderer = CubeRenderer(program, self)
+
+        if self.models_changed:
+            self.renderer.updateModels(self.cubies)
+            self.models_changed = False
+
+        self.renderer.draw(self.camera.matrix(), self.turn)
@@ -0,0 +1,91 @@
+import numpy as np
+from lib.CubeState import ALL_MOVE_NAMES, moveIndex
+from lib.facelets import movePermutations, solvedFacelets, stateToFacelets, faceletsToState
+
+# Facelet permutation of every move, new = old[MOVE_FACELET_PERM[move]]
+MOVE_FACELET_PERM = movePermutations(3)
+SOLVED_FACELETS = solvedFacelets(3)
+
+
+class CubeBatch:
+    """
+        Many 3x3x3 cubes stored as one contiguous (n, 54) array of facelet colors
+
+        Every move is a facelet permutation, so a move (or a different move for every cube) is applied to the
+        whole batch with a single fancy indexing operation
+    """
+
+    def __init__(self, n):
+        """
+            n(int) - Number of cubes in the batch, all of them solved
+        """
+        self.facelets = np.tile(SOLVED_FACELETS, (n, 1))
+
+    def __len__(self):
+        return self.facelets.shape[0]
+
+    @classmethod
+    def fromStates(cls, states):
+        """
+            Build a batch from a list of CubeState
+
+            states(list(CubeState)) - States to copy into the batch
+        """
+        batch = cls(0)
+        batch.facelets = np.array([stateToFacelets(state) for state in states], dtype=np.uint8).reshape(-1, 54)
+        return batch
+
+    def getState(self, i):
+        """
+            CubeState of the i-th cube of the batch
+        """
+        return faceletsToState(self.facelets[i])
+
+    def is_solved(self):
+        """
+            Boolean mask with the cubes of the batch that are solved
+        """
+        return (self.facelets == SOLVED_FACELETS).all(axis=1)
+
+    def applyMove(self, move):
+        """
+            Apply the same move to every cube of the batch
+
+            move(int | str) - Index or name of the move in ALL_MOVE_NAMES
+        """
+        if isinstance(move, str):
+            move = ALL_MOVE_NAMES.index(move)
+        self.facelets = self.facelets[:, MOVE_FACELET_PERM[move]]
+        return self
+
+    def applyMoves(self, moves):
+        """
+            Apply a different move to each cube of the batch
+
+            moves(numpy.ndarray) - Move index for every cube, shape (n,)
+        """
+        self.facelets = np.take_along_axis(self.facelets, MOVE_FACELET_PERM[np.asarray(moves)], axis=1)
+        return self
+
+    def applySequence(self, moves):
+        """
+            Apply the same sequence of moves to every cube of the batch
+
+            moves(iterable(int | str)) - Move indexes or names
+        """
+        for move in moves:
+            self.applyMove(move)
+        return self
+
+    def rotateFace(self, face, ang, depth=0):
+        """
+            Apply a layer turn described with the same convention as Cube.drawSlowRotateFace to every cube
+
+            face(tuple(int, int, int)) - Face to rotate. Ex: (1, 0, 0) rotates the face that has a cubie at position (1, 0, 0)
+            ang(float) - Rotation angle, must be a multiple of pi/2
+            depth(int) - 0 for the face itself, 1 for the middle slice next to it
+        """
+        move = moveIndex(face, ang, depth)
+        if move is not None:
+            self.applyMove(move)
+        return self
@@ -0,0 +1,156 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from lib.rotations import ROTATIONS4
+
+# Corners of a sticker in its own (u, v) coordinates, in triangle strip order
+QUAD = np.array([(0, 0), (1, 0), (0, 1), (1, 1)], dtype=np.float32)
+
+# Black border of a sticker as a line strip over the QUAD corners
+BORDER = np.array([0, 1, 3, 2, 0], dtype=np.uint32)
+
+# Per sticker static data: first corner, u edge, v edge, color and cap normal (zero for the stickers)
+STICKER_FLOATS = 3 + 3 + 3 + 4 + 3
+
+# Per sticker dynamic data: transformation matrix and position of the cubie
+MODEL_FLOATS = 16 + 4
+
+CAP_COLOR = (0.0, 0.0, 0.0, 1.0)
+
+
+class CubeRenderer:
+    """
+        Draw every sticker of a cube with two instanced draw calls, one for the faces and one for the borders
+
+        Each sticker is an instance. Its corner, edges and color never change and are uploaded once, the
+        transformation matrix and position of its cubie are uploaded again only after a cubie moved and the camera
+        is a uniform. The layer turn being animated is also given as uniforms and applied by the vertex shader
+
+        Only the stickers on the surface of the cube are instances, plus the black caps of Cube.getCaps after
+        them. The vertex shader discards the caps except the ones next to the turning layer
+    """
+
+    def __init__(self, program, cube):
+        """
+            program(OpenGL.GL.shaders.ShaderProgram) - Shader program
+            cube(Cube) - Cube to draw, its stickers and caps are uploaded once
+        """
+        self.program = program
+        # Cubie of every sticker, used to expand the cubie matrices to one matrix per instance
+        self.sticker_cubie, corner, edge_u, edge_v, face = cube.getStickers()
+        cap_layer, cap_corner, cap_u, cap_v, cap_normal = cube.getCaps()
+        self.count = len(self.sticker_cubie)
+        self.cap_count = len(cap_layer)
+
+        static = np.zeros((self.count + self.cap_count, STICKER_FLOATS), dtype=np.float32)
+        static[:, 0:3] = np.concatenate([corner, cap_corner])
+        static[:, 3:6] = np.concatenate([edge_u, cap_u])
+        static[:, 6:9] = np.concatenate([edge_v, cap_v])
+        static[:self.count, 9:13] = cube.cubies[0].colors[face]
+        static[self.count:, 9:13] = CAP_COLOR
+        static[self.count:, 13:16] = cap_normal
+
+        # The caps never move with a cubie matrix, only with the turn of their layer
+        caps = np.zeros((self.cap_count, MODEL_FLOATS), dtype=np.float32)
+        caps[:, :16] = np.identity(4, dtype=np.float32).reshape(16)
+        caps[:, 16:19] = cap_layer
+        caps[:, 19] = 1.0
+
+        # The core profile draws nothing without a vertex array object, it holds the attribute layout set below
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+
+        self.quad_buffer, self.sticker_buffer, self.model_buffer, self.border_buffer = glGenBuffers(4)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.quad_buffer)
+        glBufferData(GL_ARRAY_BUFFER, QUAD.nbytes, QUAD, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.sticker_buffer)
+        glBufferData(GL_ARRAY_BUFFER, static.nbytes, static, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.model_buffer)
+        glBufferData(GL_ARRAY_BUFFER, (self.count + self.cap_count) * MODEL_FLOATS * 4, None, GL_DYNAMIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, self.count * MODEL_FLOATS * 4, caps.nbytes, caps)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.border_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, BORDER.nbytes, BORDER, GL_STATIC_DRAW)
+
+        # Attribute layout, set once since nothing else changes it
+        stride = static.strides[0]
+        self.setAttribute('quad', self.quad_buffer, 2, 0, 0, 0)
+        self.setAttribute('corner', self.sticker_buffer, 3, stride, 0, 1)
+        self.setAttribute('edge_u', self.sticker_buffer, 3, stride, 12, 1)
+        self.setAttribute('edge_v', self.sticker_buffer, 3, stride, 24, 1)
+        self.setAttribute('sticker_color', self.sticker_buffer, 4, stride, 36, 1)
+        self.setAttribute('cap_normal', self.sticker_buffer, 3, stride, 52, 1)
+
+        # A mat4 attribute takes four consecutive locations, one per column
+        loc = glGetAttribLocation(program, 'mat_model')
+        for column in range(4):
+            self.setAttribute(loc + column, self.model_buffer, 4, MODEL_FLOATS * 4, column * 16, 1)
+        self.setAttribute('cubie_pos', self.model_buffer, 4, MODEL_FLOATS * 4, 64, 1)
+
+        self.loc_camera = glGetUniformLocation(program, 'mat_camera')
+        self.loc_border = glGetUniformLocation(program, 'border')
+        self.loc_turn_axis = glGetUniformLocation(program, 'turn_axis')
+        self.loc_turn_layer = glGetUniformLocation(program, 'turn_layer')
+        self.loc_turn_angle = glGetUniformLocation(program, 'turn_angle')
+
+    def setAttribute(self, loc, buffer, size, stride, offset, divisor):
+        """
+            Point a float vertex attribute to a buffer
+
+            loc(int | str) - Attribute location or name
+            buffer(int) - Buffer holding the data
+            size(int) - Number of floats of the attribute
+            stride(int) - Bytes between consecutive vertices or instances
+            offset(int) - Bytes before the first value
+            divisor(int) - 0 for a per vertex attribute, 1 for a per instance attribute
+        """
+        if isinstance(loc, str):
+            loc = glGetAttribLocation(self.program, loc)
+
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glEnableVertexAttribArray(loc)
+        glVertexAttribPointer(loc, size, GL_FLOAT, False, stride, ctypes.c_void_p(offset))
+        glVertexAttribDivisor(loc, divisor)
+
+    def updateModels(self, cubies):
+        """
+            Upload the transformation matrix and position of every cubie, the caps are left as they are
+
+            cubies(list(Cubie)) - Cubies of the cube given to the constructor
+        """
+        models = np.empty((len(cubies), MODEL_FLOATS), dtype=np.float32)
+
+        # Matrices are stored column by column as expected by the mat4 attribute
+        orientations = np.array([cubie.orientation for cubie in cubies], dtype=np.intp)
+        models[:, :16] = ROTATIONS4[orientations].transpose(0, 2, 1).reshape(-1, 16)
+        models[:, 16:] = [cubie.pos for cubie in cubies]
+
+        # One row per sticker
+        models = models[self.sticker_cubie]
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.model_buffer)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, models.nbytes, models)
+
+    def draw(self, camera, turn=None):
+        """
+            Draw the stickers and their borders
+
+            camera(numpy.ndarray) - 4x4 camera matrix applied after the cubie matrices
+            turn(tuple(int, float, float)) - (axis, layer, angle) of the layer turn being animated. The cubies whose
+                                             position along the axis is layer are rotated by angle around the axis
+        """
+        glBindVertexArray(self.vao)
+        glUniformMatrix4fv(self.loc_camera, 1, GL_TRUE, camera.astype(np.float32).reshape(16))
+
+        axis, layer, angle = turn if turn is not None else (0, 0.0, 0.0)
+        glUniform3f(self.loc_turn_axis, *np.identity(3)[axis])
+        glUniform1f(self.loc_turn_layer, layer)
+        glUniform1f(self.loc_turn_angle, angle)
+
+        # The caps have no border, they are after the stickers and left out of the second call
+        glUniform1f(self.loc_border, 0.0)
+        glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, len(QUAD), self.count + self.cap_count)
+
+        glUniform1f(self.loc_border, 1.0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.border_buffer)
+        glDrawElementsInstanced(GL_LINE_STRIP, len(BORDER), GL_UNSIGNED_INT, None, self.count)
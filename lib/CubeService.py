@@ -0,0 +1,391 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from lib import corpus, raster, solver
+from lib.Algorithm import compileAlgorithm
+from lib.CubeState import N_PIECES
+
+# Operations of the service, the binary code of an operation is its index plus one
+OPS = ('apply', 'solved', 'solve', 'render')
+
+# Binary frames start with this byte, JSON requests with "{"
+MAGIC = 0xCB
+
+# Binary frame header: magic, operation code (status in the responses) and payload length
+FRAME = struct.Struct('>BBI')
+
+SOLVED_RECORD = corpus.packStates(np.arange(8), np.zeros(8), np.arange(12), np.zeros(12)).tobytes()
+
+
+def _solveMany(records):
+    """
+        Solution (or exception) of every state, run by the worker processes
+    """
+    results = []
+    for record in records:
+        try:
+            # Raises ValueError for the states that can not be reached with moves
+            results.append(' '.join(solver.solve(corpus.unpackState(record))))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _renderMany(requests):
+    """
+        PNG thumbnail (or exception) of every (record, size) pair, run by the worker processes
+    """
+    results = []
+    for record, size in requests:
+        try:
+            results.append(raster.encodePNG(raster.render(corpus.unpackState(record), size=size)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class CubeService:
+    """
+        asyncio server of the 3x3x3 engine for local clients, over TCP or a Unix socket
+
+        Requests are applied to states sent with them, given as the 20 byte records of lib/corpus.py (solved when
+        left out). The concurrent requests of an operation are gathered for batch_window seconds (or until
+        batch_size of them) and served together: moves and solved checks as vectorized NumPy operations on the
+        event loop, solves and thumbnails by a process pool so the loop never waits for them. A connection can
+        send many requests without waiting, the responses come back in the same order.
+
+        JSON requests and responses take one line each:
+
+            {"id": 1, "op": "apply", "state": "<40 hex digits>", "moves": "R U R' U'"}
+                -> {"id": 1, "state": "<40 hex digits>", "hash": "<16 hex digits>", "solved": false}
+            {"id": 2, "op": "solved", "state": "..."}               -> {"id": 2, "solved": true, "hash": "..."}
+            {"id": 3, "op": "solve", "state": "..."}                -> {"id": 3, "solution": "F2 U' ..."}
+            {"id": 4, "op": "render", "state": "...", "size": 64}   -> {"id": 4, "png": "<base64>"}
+
+        Failed requests get {"id": ..., "error": "..."}. Binary frames are a FRAME header (MAGIC, operation code,
+        payload length) and a payload starting with the 20 byte state, followed by the moves in UTF-8 for apply and
+        the image size as a 16-bit integer for render. Responses have the status (0 for success) in place of the
+        operation code: the new state, its 8 byte hash and a solved byte for apply, a solved byte for solved, the
+        solution in UTF-8 for solve, the PNG file for render and the error message in UTF-8 for a failure
+    """
+
+    def __init__(self, processes=None, batch_window=0.002, batch_size=1024):
+        """
+            processes(int) - Worker processes of the solves and thumbnails, one per core by default
+            batch_window(float) - Seconds to wait for more requests of the same operation before serving them
+            batch_size(int) - Requests served at most together
+        """
+        self.processes = processes
+        self.workers = None
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.pool = None
+        self.server = None
+        self.connections = set()
+
+        # Requests waiting for their batch, per operation, as (request, future) pairs
+        self.pending = {op: [] for op in OPS}
+        self.timers = {}
+
+        self.served = dict.fromkeys(OPS, 0)
+        self.batches = dict.fromkeys(OPS, 0)
+
+    async def start(self, host='127.0.0.1', port=8765, path=None):
+        """
+            Start accepting connections, on a Unix socket when a path is given
+
+            host(str) - Address to listen to, keep it local: there is no authentication
+            port(int) - TCP port
+            path(str) - Unix socket file
+        """
+        self.workers = self.processes or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers, initializer=solver.getTables)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    async def close(self):
+        """
+            Stop the server, drop the open connections and the worker processes
+        """
+        if self.server is not None:
+            self.server.close()
+            for connection in list(self.connections):
+                connection.cancel()
+            await asyncio.gather(*self.connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def stats(self):
+        """
+            Requests served and batches run per operation
+        """
+        return {'served': dict(self.served), 'batches': dict(self.batches)}
+
+    # Connections
+
+    async def _handle(self, reader, writer):
+        responses = asyncio.Queue()
+        responder = asyncio.create_task(self._respond(responses, writer))
+        self.connections.add(asyncio.current_task())
+
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+
+                if first[0] == MAGIC:
+                    header = first + await reader.readexactly(FRAME.size - 1)
+                    _, code, length = FRAME.unpack(header)
+                    request = self._parseFrame(code, await reader.readexactly(length))
+                else:
+                    request = self._parseJson(first + await reader.readline())
+
+                await responses.put((request, self._submit(request)))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Closed by the service, the pending requests are dropped
+            responder.cancel()
+            writer.close()
+            return
+        finally:
+            self.connections.discard(asyncio.current_task())
+
+        # Answer the requests already received before closing
+        await responses.put(None)
+        await responder
+        writer.close()
+
+    async def _respond(self, responses, writer):
+        """
+            Write the responses of a connection in the order of its requests
+        """
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+
+            request, future = item
+            try:
+                result = await future
+            except Exception as e:
+                result = e
+
+            try:
+                writer.write(self._encode(request, result))
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def _parseJson(self, line):
+        """
+            Request dict of a JSON line. Invalid requests get an error field instead of failing the connection
+        """
+        message = None
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise ValueError('A request is a JSON object')
+            for field, kind, name in (('op', str, 'a string'), ('state', str, 'a string'), ('moves', str, 'a string'),
+                                      ('size', int, 'an integer')):
+                value = message.get(field)
+                if value is not None and (not isinstance(value, kind) or isinstance(value, bool)):
+                    raise ValueError('"%s" must be %s' % (field, name))
+            request = {'format': 'json', 'id': message.get('id'), 'op': message.get('op'),
+                       'state': bytes.fromhex(message['state']) if message.get('state') else SOLVED_RECORD,
+                       'moves': message.get('moves') or '',
+                       'size': 64 if message.get('size') is None else message['size']}
+        except (ValueError, TypeError) as e:
+            return {'format': 'json', 'id': message.get('id') if isinstance(message, dict) else None, 'op': None,
+                    'error': 'Invalid request: %s' % e}
+        return request
+
+    def _parseFrame(self, code, payload):
+        """
+            Request dict of a binary frame
+        """
+        request = {'format': 'binary', 'id': None, 'op': OPS[code - 1] if 0 < code <= len(OPS) else None,
+                   'state': payload[:corpus.STATE_SIZE], 'moves': '', 'size': 64}
+        rest = payload[corpus.STATE_SIZE:]
+        try:
+            if request['op'] == 'apply':
+                request['moves'] = rest.decode()
+            elif request['op'] == 'render' and len(rest) >= 2:
+                request['size'] = struct.unpack('>H', rest[:2])[0]
+        except UnicodeDecodeError as e:
+            request['error'] = 'Invalid request: %s' % e
+        return request
+
+    def _encode(self, request, result):
+        """
+            Response to a request, in the format of the request
+        """
+        if request['format'] == 'binary':
+            if isinstance(result, Exception):
+                payload, status = str(result).encode(), 1
+            elif request['op'] == 'apply':
+                payload, status = result['state'] + struct.pack('>Q?', result['hash'], result['solved']), 0
+            elif request['op'] == 'solved':
+                payload, status = struct.pack('>?', result['solved']), 0
+            elif request['op'] == 'solve':
+                payload, status = result.encode(), 0
+            else:
+                payload, status = result, 0
+            return FRAME.pack(MAGIC, status, len(payload)) + payload
+
+        if isinstance(result, Exception):
+            response = {'id': request['id'], 'error': str(result)}
+        elif request['op'] == 'apply':
+            response = {'id': request['id'], 'state': result['state'].hex(), 'hash': '%016x' % result['hash'],
+                        'solved': result['solved']}
+        elif request['op'] == 'solved':
+            response = {'id': request['id'], 'solved': result['solved'], 'hash': '%016x' % result['hash']}
+        elif request['op'] == 'solve':
+            response = {'id': request['id'], 'solution': result}
+        else:
+            response = {'id': request['id'], 'png': base64.b64encode(result).decode()}
+        return (json.dumps(response) + '\n').encode()
+
+    # Batching
+
+    def _submit(self, request):
+        """
+            Future of the result of a request, served with the next batch of its operation
+        """
+        future = asyncio.get_running_loop().create_future()
+        if 'error' in request:
+            future.set_exception(ValueError(request['error']))
+            return future
+        if request['op'] not in OPS:
+            future.set_exception(ValueError('Unknown operation %s, expected one of %s' % (request['op'], OPS)))
+            return future
+        if len(request['state']) != corpus.STATE_SIZE:
+            future.set_exception(ValueError('A state takes %d bytes' % corpus.STATE_SIZE))
+            return future
+
+        op = request['op']
+        self.pending[op].append((request, future))
+        if len(self.pending[op]) >= self.batch_size:
+            self._flush(op)
+        elif op not in self.timers:
+            self.timers[op] = asyncio.get_running_loop().call_later(self.batch_window, self._flush, op)
+        return future
+
+    def _flush(self, op):
+        """
+            Serve the requests waiting for an operation
+        """
+        timer = self.timers.pop(op, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch, self.pending[op] = self.pending[op], []
+        if not batch:
+            return
+        self.served[op] += len(batch)
+        self.batches[op] += 1
+
+        if op in ('apply', 'solved'):
+            try:
+                results = self.applyBatch([request for request, _ in batch], op == 'apply')
+            except Exception as e:
+                results = [e] * len(batch)
+            self._resolve(batch, results)
+        else:
+            asyncio.ensure_future(self._poolBatch(op, batch))
+
+    @staticmethod
+    def _resolve(batch, results):
+        """
+            Set the result (or the exception) of every future of a batch still waiting for it
+        """
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def applyBatch(self, requests, apply=True):
+        """
+            Results of a batch of apply (or solved) requests, computed at once on the arrays of all the states
+
+            Returns for every request a dict with the new state (the same state for a solved check), its hash and
+            its solved flag, or the ValueError of a request whose state or moves are invalid. An invalid request
+            never fails the others
+
+            requests(list(dict)) - Requests with the 20 byte 'state' and, to apply, the 'moves' in standard notation
+            apply(bool) - Apply the moves, False for the solved checks
+        """
+        results = [None] * len(requests)
+
+        algorithms = {}
+        for i, request in enumerate(requests):
+            try:
+                if len(request['state']) != corpus.STATE_SIZE:
+                    raise ValueError('A state takes %d bytes' % corpus.STATE_SIZE)
+                algorithms[i] = compileAlgorithm(request.get('moves') or '') if apply else None
+            except ValueError as e:
+                results[i] = e
+
+        rows = np.fromiter(algorithms, dtype=np.intp, count=len(algorithms))
+        records = np.frombuffer(b''.join(requests[i]['state'] for i in rows), dtype=corpus.STATE_DTYPE)
+        cp, co, ep, eo, ct = corpus.unpackRecords(records)
+
+        # The invalid records are left out before anything indexes a table with their values
+        valid = corpus.validStates(cp, co, ep, eo, ct)
+        for i in rows[~valid]:
+            results[i] = ValueError('Invalid state record')
+        rows, records = rows[valid], records[valid]
+        cp, co, ep, eo, ct = (a[valid] for a in (cp, co, ep, eo, ct))
+
+        if apply and rows.size:
+            tables = [algorithms[i] for i in rows]
+
+            # The composed tables of every request, applied with one gather per array
+            corner_perm = np.array([a.corner_perm for a in tables])
+            edge_perm = np.array([a.edge_perm for a in tables])
+            cp = np.take_along_axis(cp, corner_perm, axis=1)
+            co = (np.take_along_axis(co, corner_perm, axis=1) + np.array([a.corner_ori for a in tables])) % 3
+            ep = np.take_along_axis(ep, edge_perm, axis=1)
+            eo = (np.take_along_axis(eo, edge_perm, axis=1) + np.array([a.edge_ori for a in tables])) % 2
+            ct = np.take_along_axis(ct, np.array([a.center_perm for a in tables]), axis=1)
+            records = corpus.packStates(cp, co, ep, eo, ct)
+
+        hashes = corpus.stateHashes(cp, co, ep, eo, ct).tolist()
+        solved = (corpus.solvedPieces(cp, co, ep, eo, ct) == N_PIECES).tolist()
+        for k, i in enumerate(rows):
+            results[i] = {'state': records[k].tobytes(), 'hash': hashes[k], 'solved': solved[k]}
+        return results
+
+    async def _poolBatch(self, op, batch):
+        """
+            Solve or render a batch in the process pool, split in one chunk per worker
+        """
+        loop = asyncio.get_running_loop()
+        if op == 'solve':
+            function, items = _solveMany, [request['state'] for request, _ in batch]
+        else:
+            function, items = _renderMany, [(request['state'], min(request['size'], 1024)) for request, _ in batch]
+
+        chunks = [items[i::self.workers] for i in range(min(self.workers, len(items)))]
+        try:
+            # A chunk that fails as a whole (a worker process killed) fails its requests only
+            parts = await asyncio.gather(*(loop.run_in_executor(self.pool, function, chunk) for chunk in chunks),
+                                         return_exceptions=True)
+            results = [parts[i % len(chunks)] if isinstance(parts[i % len(chunks)], Exception)
+                       else parts[i % len(chunks)][i // len(chunks)] for i in range(len(batch))]
+        except Exception as e:
+            results = [e] * len(batch)
+        self._resolve(batch, results)
@@ -0,0 +1,336 @@
+"""
+    Headless integer model of the 3x3x3 puzzle
+
+    The state is stored as corner/edge permutation and orientation arrays and every face turn is a
+    lookup in move tables precomputed from the same rotation matrices used by Cubie.rotateQuarter.
+    Nothing in this module needs an OpenGL context.
+"""
+
+import numpy as np
+
+# Outward normal of each face in the cube coordinates (x to the right, y up and z away from the viewer)
+FACES = {
+    'U': (0, 1, 0),
+    'R': (1, 0, 0),
+    'F': (0, 0, -1),
+    'D': (0, -1, 0),
+    'L': (-1, 0, 0),
+    'B': (0, 0, 1),
+}
+FACE_ORDER = 'URFDLB'
+
+# Corner, edge and center slots. The first sticker of each slot lies on the U/D face (or on the F/B face for the
+# middle layer edges) and the corner stickers are listed clockwise
+CORNERS = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+EDGES = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+CENTERS = tuple(FACE_ORDER)
+
+# Moves in the usual notation. Index m is face FACE_ORDER[m // 3] turned (m % 3 + 1) quarter turns clockwise.
+# These are the moves used by the solver
+MOVE_NAMES = tuple(face + suffix for face in FACE_ORDER for suffix in ('', '2', "'"))
+N_MOVES = len(MOVE_NAMES)
+
+# Middle slice moves come after the face turns. Each slice turns in the same direction as the face named here
+SLICES = {'M': 'L', 'E': 'D', 'S': 'F'}
+SLICE_MOVE_NAMES = tuple(s + suffix for s in SLICES for suffix in ('', '2', "'"))
+ALL_MOVE_NAMES = MOVE_NAMES + SLICE_MOVE_NAMES
+N_ALL_MOVES = len(ALL_MOVE_NAMES)
+
+
+def quarterTurnMatrix(axis, quarter_turns):
+    """
+        Integer rotation matrix of a multiple of pi/2 around an axis, used by Cubie.rotateQuarter
+
+        axis(int) - 0, 1 or 2 for the x, y or z axis
+        quarter_turns(int) - Rotation angle in multiples of pi/2
+    """
+    c, s = [(1, 0), (0, 1), (-1, 0), (0, -1)][quarter_turns % 4]
+
+    if axis == 0:
+        mat = [[1, 0, 0], [0, c, -s], [0, s, c]]
+    elif axis == 1:
+        mat = [[c, 0, s], [0, 1, 0], [-s, 0, c]]
+    else:
+        mat = [[c, -s, 0], [s, c, 0], [0, 0, 1]]
+
+    return np.array(mat, dtype=np.int64)
+
+
+def faceAngle(name):
+    """
+        Convert a move name to the (face, ang, depth) arguments of Cube.drawSlowRotateFace
+
+        name(str) - Move in the usual notation. Ex: "R", "U2", "F'", "M"
+    """
+    letter = SLICES.get(name[0], name[0])
+    face = FACES[letter]
+    depth = 1 if name[0] in SLICES else 0
+    quarter_turns = {'': 1, '2': 2, "'": -1}[name[1:]]
+
+    # A clockwise turn seen from outside of the face is a rotation of pi/2 around the positive axis for the
+    # faces on the positive side and -pi/2 for the faces on the negative side
+    sign = sum(face)
+    return face, sign * quarter_turns * np.pi / 2, depth
+
+
+def moveIndex(face, ang, depth=0):
+    """
+        Index in ALL_MOVE_NAMES of the move described with the arguments of Cube.drawSlowRotateFace
+
+        face(tuple(int, int, int)) - Face to rotate. Ex: (1, 0, 0) rotates the face that has a cubie at position (1, 0, 0)
+        ang(float) - Rotation angle around the positive axis, must be a multiple of pi/2
+        depth(int) - 0 for the face itself, 1 for the middle slice next to it, 2 for the opposite face
+    """
+    face = tuple(int(x) for x in face)
+    axis = [i for i, x in enumerate(face) if x != 0][0]
+
+    # The layer at depth 2 is the opposite face, the angle is still measured around the positive axis
+    if depth == 2:
+        face, depth = tuple(-x for x in face), 0
+
+    if depth == 0:
+        letter = [name for name, normal in FACES.items() if normal == face][0]
+        sign = face[axis]
+    elif depth == 1:
+        letter = [s for s, f in SLICES.items() if FACES[f][axis] != 0][0]
+        sign = FACES[SLICES[letter]][axis]
+    else:
+        raise ValueError('A 3x3x3 cube has no layer at depth %d' % depth)
+
+    quarter_turns = (int(round(ang / (np.pi / 2))) * sign) % 4
+    if quarter_turns == 0:
+        return None
+
+    return ALL_MOVE_NAMES.index(letter + ('', '2', "'")[quarter_turns - 1])
+
+
+def _rotate(rot, vector):
+    """
+        Integer vector multiplied by a rotation matrix given as nested lists
+    """
+    return tuple(sum(r * x for r, x in zip(row, vector)) for row in rot)
+
+
+def _slotGeometry(slots):
+    """
+        Position and sticker normals of every slot in a list of corner, edge or center names, as integer tuples
+    """
+    normals = [[FACES[f] for f in slot] for slot in slots]
+    positions = [tuple(map(sum, zip(*n))) for n in normals]
+    return positions, normals
+
+
+def _buildMoveTables(slots):
+    """
+        Compute permutation and orientation tables of every move for a set of slots
+
+        new_perm[i] = perm[table_perm[m][i]] and new_ori[i] = ori[table_perm[m][i]] + table_ori[m][i]
+    """
+    positions, normals = _slotGeometry(slots)
+    slot_index = {p: i for i, p in enumerate(positions)}
+    n_ori = len(slots[0])
+
+    table_perm = np.zeros((N_ALL_MOVES, len(slots)), dtype=np.intp)
+    table_ori = np.zeros((N_ALL_MOVES, len(slots)), dtype=np.int8)
+
+    for m, name in enumerate(ALL_MOVE_NAMES):
+        face, ang, depth = faceAngle(name)
+        axis = [i for i, x in enumerate(face) if x != 0][0]
+        layer = face[axis] * (1 - depth)
+        rot = quarterTurnMatrix(axis, int(round(ang / (np.pi / 2)))).tolist()
+
+        for j in range(len(slots)):
+            if positions[j][axis] != layer:
+                table_perm[m][j] = j
+                continue
+
+            # Slot that receives the piece and the sticker of that slot that receives its first sticker
+            i = slot_index[_rotate(rot, positions[j])]
+            k = normals[i].index(_rotate(rot, normals[j][0]))
+
+            table_perm[m][i] = j
+            table_ori[m][i] = k % n_ori
+
+    return table_perm, table_ori
+
+
+CORNER_PERM, CORNER_ORI = _buildMoveTables(CORNERS)
+EDGE_PERM, EDGE_ORI = _buildMoveTables(EDGES)
+CENTER_PERM, _ = _buildMoveTables(CENTERS)
+
+
+def _movedSlots(table_perm, table_ori):
+    """
+        For every move, the (slot, source slot, orientation change) triples of the slots touched by the move
+    """
+    return [[(i, int(table_perm[m][i]), int(table_ori[m][i]))
+             for i in range(table_perm.shape[1]) if table_perm[m][i] != i] for m in range(N_ALL_MOVES)]
+
+
+# Slots touched by each move, the only ones whose solved status and hash keys can change
+CORNER_MOVED = _movedSlots(CORNER_PERM, CORNER_ORI)
+EDGE_MOVED = _movedSlots(EDGE_PERM, EDGE_ORI)
+CENTER_MOVED = _movedSlots(CENTER_PERM, np.zeros_like(CENTER_PERM))
+N_PIECES = len(CORNERS) + len(EDGES) + len(CENTERS)
+
+# Zobrist keys: a random 64-bit number for every (slot, piece, orientation), indexed [slot][piece * n_ori + ori].
+# The seed is fixed so that hashes are the same on every run and can be stored on disk
+_rng = np.random.default_rng(0x5EED)
+ZOBRIST_CORNER = _rng.integers(0, 2 ** 64, size=(8, 8 * 3), dtype=np.uint64).tolist()
+ZOBRIST_EDGE = _rng.integers(0, 2 ** 64, size=(12, 12 * 2), dtype=np.uint64).tolist()
+ZOBRIST_CENTER = _rng.integers(0, 2 ** 64, size=(6, 6), dtype=np.uint64).tolist()
+
+
+class CubeState:
+    """
+        Corner, edge and center permutation/orientation of a 3x3x3 cube
+
+        cp[i] is the corner that sits on the slot CORNERS[i] and co[i] tells which sticker of that slot holds
+        the first sticker of the corner (ep and eo are the same for the edges). ct[i] is the center on the slot
+        CENTERS[i], only the slice moves change it
+
+        solved_pieces counts the pieces in their solved position and orientation and hash is the 64-bit
+        Zobrist hash of the state (XOR of one key per slot, piece and orientation). Both are updated on every
+        move from the slots touched by the move only. Call updateCounters after changing the arrays directly
+    """
+
+    def __init__(self):
+        self.cp = np.arange(8, dtype=np.int8)
+        self.co = np.zeros(8, dtype=np.int8)
+        self.ep = np.arange(12, dtype=np.int8)
+        self.eo = np.zeros(12, dtype=np.int8)
+        self.ct = np.arange(6, dtype=np.int8)
+        self.solved_pieces = N_PIECES
+        self.hash = 0
+        self.updateCounters()
+
+    def copy(self):
+        """
+            Return an independent copy of the state
+        """
+        state = CubeState.__new__(CubeState)
+        state.cp = self.cp.copy()
+        state.co = self.co.copy()
+        state.ep = self.ep.copy()
+        state.eo = self.eo.copy()
+        state.ct = self.ct.copy()
+        state.solved_pieces = self.solved_pieces
+        state.hash = self.hash
+        return state
+
+    def _pieces(self, centers=True):
+        """
+            (zobrist keys, permutation, orientation, number of orientations) of the corners, edges and centers
+
+            centers(bool) - Leave out the centers, which the face turns never move
+        """
+        pieces = ((ZOBRIST_CORNER, self.cp.tolist(), self.co.tolist(), 3),
+                  (ZOBRIST_EDGE, self.ep.tolist(), self.eo.tolist(), 2))
+        if centers:
+            pieces += ((ZOBRIST_CENTER, self.ct.tolist(), [0] * 6, 1),)
+        return pieces
+
+    def updateCounters(self):
+        """
+            Recompute solved_pieces and hash from scratch
+        """
+        self.solved_pieces = 0
+        self.hash = 0
+        for keys, perm, ori, n_ori in self._pieces():
+            for i, (p, o) in enumerate(zip(perm, ori)):
+                self.solved_pieces += p == i and o == 0
+                self.hash ^= keys[i][p * n_ori + o]
+
+        return self
+
+    def _updateCounters(self, move):
+        """
+            Update solved_pieces and hash for a move, before applying it
+        """
+        self._updateMoved((CORNER_MOVED[move], EDGE_MOVED[move], CENTER_MOVED[move]), centers=move >= N_MOVES)
+
+    def _updateMoved(self, slots, centers):
+        """
+            Update solved_pieces and hash for the corner, edge and center slots touched by a permutation, before
+            applying it
+
+            slots(tuple(list)) - (slot, source slot, orientation change) triples, as in CORNER_MOVED
+            centers(bool) - Some center moves
+        """
+        solved, h = self.solved_pieces, self.hash
+        pieces = self._pieces(centers)
+
+        for moved, (keys, perm, ori, n_ori) in zip(slots, pieces):
+            for i, j, delta in moved:
+                new_ori = (ori[j] + delta) % n_ori
+                solved += (perm[j] == i and new_ori == 0) - (perm[i] == i and ori[i] == 0)
+                h ^= keys[i][perm[i] * n_ori + ori[i]] ^ keys[i][perm[j] * n_ori + new_ori]
+
+        self.solved_pieces, self.hash = solved, h
+
+    def is_solved(self):
+        return self.solved_pieces == N_PIECES
+
+    def applyMove(self, move):
+        """
+            Apply a move using the precomputed tables
+
+            move(int) - Index of the move in ALL_MOVE_NAMES
+        """
+        self._updateCounters(move)
+
+        perm = CORNER_PERM[move]
+        self.cp = self.cp[perm]
+        self.co = (self.co[perm] + CORNER_ORI[move]) % 3
+
+        perm = EDGE_PERM[move]
+        self.ep = self.ep[perm]
+        self.eo = (self.eo[perm] + EDGE_ORI[move]) % 2
+
+        # Face turns never move the centers
+        if move >= N_MOVES:
+            self.ct = self.ct[CENTER_PERM[move]]
+
+        return self
+
+    def applyPermutation(self, corner_perm, corner_ori, edge_perm, edge_ori, center_perm, moved):
+        """
+            Apply a whole sequence of moves in one step, given with the same tables as a single move. See
+            Algorithm for the composition of the tables
+
+            corner_perm, corner_ori, edge_perm, edge_ori, center_perm(numpy.ndarray) - Rows of the move tables
+            moved(tuple(list)) - Corner, edge and center slots touched, as in CORNER_MOVED
+        """
+        self._updateMoved(moved, centers=len(moved[2]) > 0)
+
+        self.cp = self.cp[corner_perm]
+        self.co = (self.co[corner_perm] + corner_ori) % 3
+        self.ep = self.ep[edge_perm]
+        self.eo = (self.eo[edge_perm] + edge_ori) % 2
+        self.ct = self.ct[center_perm]
+        return self
+
+    def applyMoves(self, moves):
+        """
+            Apply a sequence of moves
+
+            moves(iterable(int | str)) - Move indexes or names. Ex: [3, 0, 5] or ["R", "U", "R'", "M2"]
+        """
+        for move in moves:
+            if isinstance(move, str):
+                move = ALL_MOVE_NAMES.index(move)
+            self.applyMove(move)
+        return self
+
+    def rotateFace(self, face, ang, depth=0):
+        """
+            Apply a layer turn described with the same convention as Cube.drawSlowRotateFace
+
+            face(tuple(int, int, int)) - Face to rotate. Ex: (1, 0, 0) rotates the face that has a cubie at position (1, 0, 0)
+            ang(float) - Rotation angle, must be a multiple of pi/2
+            depth(int) - 0 for the face itself, 1 for the middle slice next to it, 2 for the opposite face
+        """
+        move = moveIndex(face, ang, depth)
+        if move is not None:
+            self.applyMove(move)
+        return self
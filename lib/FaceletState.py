@@ -0,0 +1,104 @@
+import hashlib
+import numpy as np
+from lib.CubeState import faceAngle, quarterTurnMatrix
+from lib.facelets import faceletGeometry, faceletIndex, layerCoordinate, solvedFacelets
+
+# (destination, source) facelet indexes of every layer turn computed so far, keyed by (order, axis, layer, quarter_turns)
+_TURNS = {}
+
+
+def layerTurn(order, axis, layer, quarter_turns):
+    """
+        Facelets moved by a layer turn. After the turn facelets[dst] = old facelets[src]
+
+        Only the stickers of the turned layer are listed: 4 * order for an inner layer plus order * order for an
+        outer one, so the cost of a turn grows with the size of the layer and not with the number of cubies
+
+        order(int) - Number of cubies along each edge of the cube
+        axis(int) - 0, 1 or 2 for the x, y or z axis
+        layer(int) - Doubled coordinate of the layer along the axis
+        quarter_turns(int) - Rotation angle in multiples of pi/2, same convention as CubeState.quarterTurnMatrix
+    """
+    key = (order, axis, layer, quarter_turns % 4)
+    if key not in _TURNS:
+        positions, normals = faceletGeometry(order)
+        rot = quarterTurnMatrix(axis, quarter_turns)
+
+        src = np.flatnonzero(positions[:, axis] == layer)
+        dst = faceletIndex(order, positions[src] @ rot.T, normals[src] @ rot.T)
+        _TURNS[key] = (dst, src)
+
+    return _TURNS[key]
+
+
+class FaceletState:
+    """
+        Sticker colors of a cube of any order, used for the cubes that CubeState can't describe
+
+        facelets follows the layout of lib/facelets.py and every layer turn only copies the stickers of the
+        turned layer. The cube is solved when every face shows a single color, since the centers of the even
+        orders are not fixed
+    """
+
+    def __init__(self, order=3):
+        """
+            order(int) - Number of cubies along each edge of the cube
+        """
+        self.order = order
+        self.facelets = solvedFacelets(order)
+        self.solved_facelets = solvedFacelets(order)
+
+    def copy(self):
+        """
+            Return an independent copy of the state
+        """
+        state = FaceletState.__new__(FaceletState)
+        state.order = self.order
+        state.facelets = self.facelets.copy()
+        state.solved_facelets = self.solved_facelets
+        return state
+
+    @property
+    def solved_pieces(self):
+        """
+            Number of stickers showing the color of their face in the solved cube
+        """
+        return int(np.count_nonzero(self.facelets == self.solved_facelets))
+
+    @property
+    def hash(self):
+        """
+            64-bit hash of the sticker colors
+        """
+        return int.from_bytes(hashlib.blake2b(self.facelets.tobytes(), digest_size=8).digest(), 'little')
+
+    def is_solved(self):
+        faces = self.facelets.reshape(6, -1)
+        return bool((faces == faces[:, :1]).all())
+
+    def applyMoves(self, moves):
+        """
+            Apply a sequence of moves. The slice moves turn the layer next to their reference face
+
+            moves(iterable(str)) - Move names. Ex: ["R", "U", "R'", "M2"]
+        """
+        for name in moves:
+            self.rotateFace(*faceAngle(name))
+        return self
+
+    def rotateFace(self, face, ang, depth=0):
+        """
+            Apply a layer turn described with the same convention as Cube.drawSlowRotateFace
+
+            face(tuple(int, int, int)) - Face the layer is counted from. Ex: (1, 0, 0) for the R face
+            ang(float) - Rotation angle, must be a multiple of pi/2
+            depth(int) - Number of layers between the face and the turned layer, 0 for the face itself
+        """
+        axis, layer = layerCoordinate(self.order, face, depth)
+        quarter_turns = int(round(ang / (np.pi / 2)))
+        if quarter_turns % 4 == 0:
+            return self
+
+        dst, src = layerTurn(self.order, axis, layer, quarter_turns)
+        self.facelets[dst] = self.facelets[src]
+        return self
@@ -0,0 +1,124 @@
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class FrameProfiler:
+    """
+        Per frame timings and OpenGL call counts of the main loop
+
+        Every frame records its wall and CPU time, the time spent in each named section (Ex: "input", "animation",
+        "draw") and the number of OpenGL calls made by the instrumented modules. The last window frames are kept
+        for percentiles and every frame can also be written as a JSON line. A disabled profiler does nothing, so
+        the main loop can always call it
+    """
+
+    def __init__(self, enabled=True, window=1000, path=None):
+        """
+            enabled(bool) - Record anything at all
+            window(int) - Number of frames kept for the percentiles
+            path(str) - JSON lines file that receives one line per frame
+        """
+        self.enabled = enabled
+        self.frames = deque(maxlen=window)
+        self.file = open(path, 'w') if enabled and path is not None else None
+
+        self.frame_count = 0
+        self.gl_calls = 0
+        self.current = None
+        self._start = 0.0
+        self._cpu_start = 0.0
+
+    def instrumentGL(self, *modules):
+        """
+            Count the calls to the OpenGL functions imported by some modules (with from OpenGL.GL import *)
+
+            modules(module) - Modules whose gl* functions are wrapped
+        """
+        if not self.enabled:
+            return self
+
+        for module in modules:
+            for name, value in list(vars(module).items()):
+                if name.startswith('gl') and callable(value) and not hasattr(value, '__wrapped__'):
+                    setattr(module, name, self._counted(value))
+        return self
+
+    def _counted(self, function):
+        def counted(*args, **kwargs):
+            self.gl_calls += 1
+            return function(*args, **kwargs)
+
+        counted.__wrapped__ = function
+        return counted
+
+    def beginFrame(self):
+        if not self.enabled:
+            return
+        self.current = {'frame': self.frame_count}
+        self.gl_calls = 0
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def endFrame(self):
+        if not self.enabled or self.current is None:
+            return
+
+        frame = self.current
+        frame['time'] = time.perf_counter() - self._start
+        frame['cpu'] = time.process_time() - self._cpu_start
+        frame['gl_calls'] = self.gl_calls
+
+        self.frames.append(frame)
+        self.frame_count += 1
+        self.current = None
+
+        if self.file is not None:
+            self.file.write(json.dumps(frame) + '\n')
+
+    def section(self, name):
+        """
+            Context manager adding the time spent inside it to a named section of the current frame
+
+            name(str) - Section name. Ex: "draw"
+        """
+        if not self.enabled or self.current is None:
+            return nullcontext()
+        return self._section(name)
+
+    @contextmanager
+    def _section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            frame = self.current
+            if frame is not None:
+                frame[name] = frame.get(name, 0.0) + time.perf_counter() - start
+
+    def percentiles(self, name='time', q=(50, 95, 99)):
+        """
+            Percentiles of a frame measure over the last frames, None before the first frame
+
+            name(str) - "time", "cpu", "gl_calls" or a section name
+            q(tuple(float)) - Percentiles to compute
+        """
+        values = [frame.get(name, 0.0) for frame in self.frames]
+        if not values:
+            return None
+        return dict(zip(q, np.percentile(values, q).tolist()))
+
+    def summary(self):
+        """
+            Percentiles of every measure recorded over the last frames
+        """
+        names = sorted({name for frame in self.frames for name in frame} - {'frame'})
+        return {name: self.percentiles(name) for name in names}
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,83 @@
+import gzip
+import json
+import time
+
+import numpy as np
+from lib import notation
+from lib.corpus import packState
+from lib.CubeState import CubeState
+
+# First field of the header line of a session log
+SESSION_FORMAT = 'cube-session'
+SESSION_VERSION = 1
+
+
+class SessionRecorder:
+    """
+        Log of every layer turn and camera change of a viewer session, replayed headless by lib/replay.py
+
+        The log is a text file (gzip compressed when its name ends with .gz). The first line is a JSON header with
+        the order and the initial state, then every event takes one line starting with its time in milliseconds
+        since the start of the session:
+
+            1520 T R'                   layer turn in standard notation, when it is committed to the cube
+            1710 C rotate 0 0.1         camera method and its arguments, see Camera
+            9034 E 6abbf16c75d71833 20  end of the session: state hash and solved pieces, checked by the replay
+
+        A cube records itself once given to Cube.record
+    """
+
+    def __init__(self, path, cube, clock=time.perf_counter):
+        """
+            path(str) - Log file to write
+            cube(Cube) - Recorded cube
+            clock(function) - Returns the current time in seconds
+        """
+        self.path = path
+        self.order = cube.order
+        self.clock = clock
+        self.start = clock()
+        self.events = 0
+        self.file = gzip.open(path, 'wt') if path.endswith('.gz') else open(path, 'w')
+
+        header = {'format': SESSION_FORMAT, 'version': SESSION_VERSION, 'order': cube.order,
+                  'started': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                  'hash': '%016x' % cube.state.hash}
+        if isinstance(cube.state, CubeState):
+            header['state'] = packState(cube.state).hex()
+        self.file.write(json.dumps(header) + '\n')
+
+    def _write(self, line):
+        self.file.write('%d %s\n' % (round((self.clock() - self.start) * 1000), line))
+        self.events += 1
+
+    def turn(self, face, ang, depth=0):
+        """
+            Record a layer turn, with the arguments of Cube.commitTurn
+        """
+        axis = [i for i, x in enumerate(face) if x != 0][0]
+        layer = depth if face[axis] < 0 else self.order - 1 - depth
+        quarter_turns = int(round(ang / (np.pi / 2))) % 4
+        if quarter_turns != 0:
+            self._write('T ' + notation.moveName((axis, layer, layer, quarter_turns), self.order))
+
+    def camera(self, method, *args):
+        """
+            Record a call to a Camera method
+
+            method(str) - "scale", "rotate", "rotateModel" or "translate"
+            args(tuple) - Arguments of the call
+        """
+        self._write('C %s %s' % (method, ' '.join(repr(float(x)) if isinstance(x, float) else str(x) for x in args)))
+
+    def close(self, cube):
+        """
+            Write the final state of the cube and close the log
+
+            cube(Cube) - Recorded cube
+        """
+        if self.file is None:
+            return
+        self._write('E %016x %d' % (cube.state.hash, cube.state.solved_pieces))
+        self.file.close()
+        self.file = None
@@ -0,0 +1,89 @@
+import json
+import os
+from collections import OrderedDict
+
+
+class SolutionCache:
+    """
+        Least recently used cache of solutions (or any JSON value) keyed by the 64-bit CubeState.hash
+
+        The cache can be saved to a JSON file and loaded back on the next run. hits and misses count the
+        lookups since the cache was created
+    """
+
+    def __init__(self, capacity=100000, path=None):
+        """
+            capacity(int) - Maximum number of entries, the least recently used ones are dropped first
+            path(str) - JSON file used by load and save. Loaded now if it exists
+        """
+        self.capacity = capacity
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """
+            Value stored for a state hash, marking it as recently used
+
+            key(int) - CubeState.hash
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value):
+        """
+            Store a value for a state hash, dropping the least recently used entry when full
+
+            key(int) - CubeState.hash
+            value(object) - JSON serializable value. Ex: list of move names
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        """
+            Lookup counters of the cache
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self.entries), 'capacity': self.capacity, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def save(self, path=None):
+        """
+            Write the entries to a JSON file, from the least to the most recently used
+
+            path(str) - File to write, defaults to the path given to the constructor
+        """
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump([['%016x' % key, value] for key, value in self.entries.items()], f)
+        os.replace(path + '.tmp', path)
+
+    def load(self, path=None):
+        """
+            Add the entries of a JSON file written by save
+
+            path(str) - File to read, defaults to the path given to the constructor
+        """
+        with open(path or self.path) as f:
+            for key, value in json.load(f):
+                self.put(int(key, 16), value)
+        return self
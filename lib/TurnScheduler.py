@@ -0,0 +1,120 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class TurnScheduler:
+    """
+        Time based animation of the layer turns of a cube, driven by the main loop
+
+        Turns are queued in FIFO order and played one after the other, each one taking duration seconds no matter
+        the frame rate. Queuing never blocks, so the keys pressed during an animation are kept instead of dropped.
+        With coalesce, a turn of the same layer as the last queued one is merged into it (two quarter turns become a
+        half turn and a turn followed by its inverse disappears)
+    """
+
+    def __init__(self, cube, duration=0.2, coalesce=False, clock=time.perf_counter):
+        """
+            cube(Cube) - Cube to animate
+            duration(float) - Seconds taken by each turn
+            coalesce(bool) - Merge consecutive queued turns of the same layer
+            clock(function) - Returns the current time in seconds
+        """
+        self.cube = cube
+        self.duration = duration
+        self.coalesce = coalesce
+        self.clock = clock
+
+        # Queued turns as [face, ang, depth, layer], layer being the (axis, position) pair given by Cube.layer
+        self.queue = deque()
+
+        # Turn being animated and the time it started
+        self.current = None
+        self.start = 0.0
+
+    def __len__(self):
+        """
+            Number of turns not finished yet, including the one being animated
+        """
+        return len(self.queue) + (self.current is not None)
+
+    def busy(self):
+        return self.current is not None or len(self.queue) > 0
+
+    def push(self, face, ang, depth=0):
+        """
+            Queue a layer turn, with the same arguments as Cube.drawSlowRotateFace
+        """
+        layer = self.cube.layer(face, depth)
+
+        if self.coalesce and self.queue and self.queue[-1][3] == layer:
+            last = self.queue[-1]
+
+            # Both angles are measured around the positive axis, so they add up. Keep the result in -pi/2..pi
+            total = last[1] + ang
+            quarter_turns = (int(round(total / (np.pi / 2))) + 1) % 4 - 1
+            if quarter_turns == 0:
+                self.queue.pop()
+            else:
+                last[1] = quarter_turns * np.pi / 2 * (-1 if quarter_turns == 2 and total < 0 else 1)
+            return self
+
+        self.queue.append([face, ang, depth, layer])
+        return self
+
+    def pushMoves(self, turns):
+        """
+            Queue several layer turns
+
+            turns(iterable(tuple)) - (face, ang, depth) triples. Ex: the output of solver.faceTurns
+        """
+        for turn in turns:
+            self.push(*turn)
+        return self
+
+    def clear(self):
+        """
+            Drop the queued turns. The turn being animated still finishes
+        """
+        self.queue.clear()
+        return self
+
+    def finalState(self):
+        """
+            State of the cube once every queued turn is played
+        """
+        state = self.cube.state.copy()
+        turns = ([self.current] if self.current is not None else []) + list(self.queue)
+        for face, ang, depth, _ in turns:
+            state.rotateFace(face, ang, depth)
+        return state
+
+    def update(self, now=None):
+        """
+            Advance the animation. Call it once per frame before drawing the cube
+
+            now(float) - Current time, read from the clock by default
+        """
+        now = self.clock() if now is None else now
+
+        while True:
+            if self.current is None:
+                if not self.queue:
+                    return self
+                self.current = self.queue.popleft()
+                self.start = now
+
+            face, ang, depth, (axis, layer) = self.current
+            progress = (now - self.start) / self.duration if self.duration > 0 else 1.0
+
+            if progress < 1.0:
+                self.cube.turn = (axis, layer, ang * progress)
+                return self
+
+            # The next turn starts where this one ended, so a late frame doesn't slow down a long sequence
+            self.cube.commitTurn(face, ang, depth)
+            self.current = None
+            self.start += self.duration
+            if self.queue:
+                self.current = self.queue.popleft()
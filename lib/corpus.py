@@ -0,0 +1,149 @@
+"""
+    Compact binary records of 3x3x3 states and memory-mapped files of many of them
+
+    A state takes 20 bytes, one per corner and one per edge slot:
+
+        corners[i] = cp[i] | co[i] << 3 | ct[i] << 5      (ct only for the 6 first slots, 0 for the others)
+        edges[i]   = ep[i] | eo[i] << 4
+
+    so a record is a row of the structured dtype STATE_DTYPE and a corpus file is a .npy array of records. Loading
+    it memory-maps the file: the records are read from disk when accessed and any field can be decoded for the
+    whole corpus at once with NumPy. Ex: (corpus['corners'] >> 3) & 3 is the twist of every corner of every state.
+"""
+
+import numpy as np
+from lib.CubeState import CubeState, ZOBRIST_CORNER, ZOBRIST_EDGE, ZOBRIST_CENTER
+
+_ZOBRIST = [np.array(keys, dtype=np.uint64) for keys in (ZOBRIST_CORNER, ZOBRIST_EDGE, ZOBRIST_CENTER)]
+
+STATE_DTYPE = np.dtype([('corners', np.uint8, 8), ('edges', np.uint8, 12)])
+
+# Size of a record in bytes
+STATE_SIZE = STATE_DTYPE.itemsize
+
+
+def packStates(cp, co, ep, eo, ct=None):
+    """
+        Records of one or many states given their CubeState arrays, shape (...,) of STATE_DTYPE
+
+        cp, co, ep, eo(numpy.ndarray) - Corner and edge permutations and orientations, shape (..., 8) and (..., 12)
+        ct(numpy.ndarray) - Centers, shape (..., 6). Solved by default
+    """
+    cp, co, ep, eo = (np.asarray(a, dtype=np.uint8) for a in (cp, co, ep, eo))
+    records = np.empty(cp.shape[:-1], dtype=STATE_DTYPE)
+
+    corners = cp | co << 3
+    if ct is not None:
+        corners[..., :6] |= np.asarray(ct, dtype=np.uint8) << 5
+    else:
+        corners[..., :6] |= np.arange(6, dtype=np.uint8) << 5
+
+    records['corners'] = corners
+    records['edges'] = ep | eo << 4
+    return records
+
+
+def unpackRecords(records):
+    """
+        (cp, co, ep, eo, ct) arrays of one or many records, the inverse of packStates
+
+        records(numpy.ndarray) - Records of STATE_DTYPE, for example a loaded corpus or a slice of it
+    """
+    corners, edges = records['corners'], records['edges']
+    return (corners & 7).astype(np.int8), (corners >> 3 & 3).astype(np.int8), (edges & 15).astype(np.int8), \
+        (edges >> 4 & 1).astype(np.int8), (corners[..., :6] >> 5).astype(np.int8)
+
+
+def validStates(cp, co, ep, eo, ct):
+    """
+        Mask of the states of a batch whose arrays are permutations and valid orientations, shape (n,). Says
+        nothing about the states being reachable with moves
+    """
+    return ((np.sort(cp, axis=1) == np.arange(8)).all(axis=1) & (np.sort(ep, axis=1) == np.arange(12)).all(axis=1)
+            & (np.sort(ct, axis=1) == np.arange(6)).all(axis=1) & (co < 3).all(axis=1))
+
+
+def stateHashes(cp, co, ep, eo, ct):
+    """
+        CubeState.hash of every state of a batch, as uint64, shape (n,)
+
+        cp, co, ep, eo, ct(numpy.ndarray) - CubeState arrays of the states, shape (n, 8), (n, 12) and (n, 6)
+    """
+    keys = [zobrist[np.arange(zobrist.shape[0]), perm.astype(np.intp) * n_ori + ori]
+            for zobrist, perm, ori, n_ori in ((_ZOBRIST[0], cp, co, 3), (_ZOBRIST[1], ep, eo, 2),
+                                              (_ZOBRIST[2], ct, np.zeros_like(ct), 1))]
+    return np.bitwise_xor.reduce(np.concatenate(keys, axis=1), axis=1)
+
+
+def solvedPieces(cp, co, ep, eo, ct):
+    """
+        CubeState.solved_pieces of every state of a batch, shape (n,)
+    """
+    return (((cp == np.arange(8)) & (co == 0)).sum(axis=1) + ((ep == np.arange(12)) & (eo == 0)).sum(axis=1)
+            + (ct == np.arange(6)).sum(axis=1))
+
+
+def packState(state):
+    """
+        20 bytes describing a state
+
+        state(CubeState) - 3x3x3 state
+    """
+    return packStates(state.cp, state.co, state.ep, state.eo, state.ct).tobytes()
+
+
+def unpackState(data):
+    """
+        CubeState of a record written by packState. Raises ValueError for data that is not a valid record
+
+        data(bytes | numpy.void) - 20 bytes or a single record of a corpus
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        if len(data) != STATE_SIZE:
+            raise ValueError('A state record takes %d bytes, not %d' % (STATE_SIZE, len(data)))
+        data = np.frombuffer(data, dtype=STATE_DTYPE)[0]
+
+    state = CubeState()
+    state.cp, state.co, state.ep, state.eo, state.ct = unpackRecords(data)
+
+    for perm, n in ((state.cp, 8), (state.ep, 12), (state.ct, 6)):
+        if sorted(perm.tolist()) != list(range(n)):
+            raise ValueError('Invalid state record: %s is not a permutation' % perm.tolist())
+    if (state.co > 2).any():
+        raise ValueError('Invalid state record: corner twist 3')
+
+    return state.updateCounters()
+
+
+def saveCorpus(path, records):
+    """
+        Write records to a corpus file (.npy)
+
+        path(str) - File to write
+        records(numpy.ndarray) - Records of STATE_DTYPE. Ex: packStates(*scramble.randomStates(n))
+    """
+    np.save(path, np.asarray(records, dtype=STATE_DTYPE))
+
+
+def createCorpus(path, n):
+    """
+        Writable memory-mapped corpus of n records, to fill in place when the records don't fit in memory. The
+        records are zero (not valid states) until written
+
+        path(str) - File to create
+        n(int) - Number of records
+    """
+    return np.lib.format.open_memmap(path, mode='w+', dtype=STATE_DTYPE, shape=(n,))
+
+
+def loadCorpus(path):
+    """
+        Read-only memory map of a corpus file, no record is copied into memory. Raises ValueError when the file does
+        not hold state records
+
+        path(str) - File written by saveCorpus or createCorpus
+    """
+    corpus = np.load(path, mmap_mode='r')
+    if corpus.dtype != STATE_DTYPE:
+        raise ValueError('%s holds %s, not state records' % (path, corpus.dtype))
+    return corpus
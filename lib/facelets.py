@@ -0,0 +1,187 @@
+"""
+    Sticker (facelet) layout of a cube of any order
+
+    Facelets are numbered face by face using the face order of the Cubie vertices and colors, then row by row
+    inside each face: index = face * order * order + row * order + col. The color of a facelet in the solved
+    cube is its face index, so a facelet array can be drawn directly with Cubie.colors.
+
+    Positions are given in doubled integer coordinates (2 * cubie position) so that even orders, whose cubies
+    sit on half-integer positions, can still be handled exactly.
+"""
+
+import numpy as np
+from lib.CubeState import CubeState, FACES, CORNERS, EDGES, CENTERS, quarterTurnMatrix, faceAngle, ALL_MOVE_NAMES
+
+# Outward normal and the column/row directions of each face, in the order used by Cubie.defineVertices
+FACE_NORMALS = np.array([(0, 0, 1), (1, 0, 0), (0, 0, -1), (-1, 0, 0), (0, -1, 0), (0, 1, 0)])
+FACE_U = np.array([(1, 0, 0), (0, 0, -1), (-1, 0, 0), (0, 0, 1), (1, 0, 0), (1, 0, 0)])
+FACE_V = np.array([(0, 1, 0), (0, 1, 0), (0, 1, 0), (0, 1, 0), (0, 0, 1), (0, 0, -1)])
+
+# Face index (and solved color) of each face letter
+FACE_COLOR = {name: int(np.flatnonzero((FACE_NORMALS == normal).all(axis=1))[0]) for name, normal in FACES.items()}
+
+
+def faceletGeometry(order):
+    """
+        Doubled cubie position and outward normal of every facelet
+
+        order(int) - Number of cubies along each edge of the cube
+    """
+    face, row, col = np.indices((6, order, order)).reshape(3, -1)
+    positions = (FACE_NORMALS[face] * (order - 1)
+                 + FACE_U[face] * (2 * col - (order - 1))[:, None]
+                 + FACE_V[face] * (2 * row - (order - 1))[:, None])
+    return positions, FACE_NORMALS[face]
+
+
+def faceletIndex(order, positions, normals):
+    """
+        Facelet index of each (doubled position, normal) pair. Inverse of faceletGeometry
+
+        order(int) - Number of cubies along each edge of the cube
+        positions(numpy.ndarray) - Doubled cubie positions, shape (n, 3)
+        normals(numpy.ndarray) - Outward normals, shape (n, 3)
+    """
+    face = np.argmax((normals[:, None, :] == FACE_NORMALS[None, :, :]).all(axis=2), axis=1)
+    col = ((positions * FACE_U[face]).sum(axis=1) + (order - 1)) // 2
+    row = ((positions * FACE_V[face]).sum(axis=1) + (order - 1)) // 2
+    return face * order * order + row * order + col
+
+
+def turnPermutation(order, axis, layer, quarter_turns):
+    """
+        Permutation of the facelets produced by turning one layer. After the turn new = old[perm]
+
+        order(int) - Number of cubies along each edge of the cube
+        axis(int) - 0, 1 or 2 for the x, y or z axis
+        layer(int) - Doubled coordinate of the layer along the axis
+        quarter_turns(int) - Rotation angle in multiples of pi/2, same convention as CubeState.quarterTurnMatrix
+    """
+    positions, normals = faceletGeometry(order)
+    rot = quarterTurnMatrix(axis, quarter_turns)
+
+    moved = np.flatnonzero(positions[:, axis] == layer)
+    target = faceletIndex(order, positions[moved] @ rot.T, normals[moved] @ rot.T)
+
+    perm = np.arange(6 * order * order)
+    perm[target] = moved
+    return perm
+
+
+def layerCoordinate(order, face, depth=0):
+    """
+        (axis, doubled coordinate) of the layer turned by Cube.drawSlowRotateFace
+
+        order(int) - Number of cubies along each edge of the cube
+        face(tuple(int, int, int)) - Face the layer is counted from. Ex: (1, 0, 0) for the R face
+        depth(int) - Number of layers between the face and the turned layer, 0 for the face itself
+    """
+    if not 0 <= depth < order:
+        raise ValueError('A cube of order %d has no layer at depth %d' % (order, depth))
+
+    axis = [i for i, x in enumerate(face) if x != 0][0]
+    return axis, int(face[axis]) * (order - 1 - 2 * depth)
+
+
+def movePermutations(order=3):
+    """
+        Facelet permutation of every move in ALL_MOVE_NAMES, shape (len(ALL_MOVE_NAMES), 6 * order * order)
+
+        The slice moves turn the layer next to their reference face, which is the middle slice only when order is 3
+
+        order(int) - Number of cubies along each edge of the cube
+    """
+    perms = []
+    for name in ALL_MOVE_NAMES:
+        face, ang, depth = faceAngle(name)
+        axis, layer = layerCoordinate(order, face, depth)
+        perms.append(turnPermutation(order, axis, layer, int(round(ang / (np.pi / 2)))))
+    return np.array(perms)
+
+
+def solvedFacelets(order=3):
+    """
+        Facelet colors of the solved cube
+    """
+    return np.repeat(np.arange(6, dtype=np.uint8), order * order)
+
+
+def _pieceFacelets(slots):
+    """
+        Facelet index of every sticker of every corner, edge or center slot of the 3x3x3 cube
+    """
+    idx = []
+    for slot in slots:
+        normals = np.array([FACES[f] for f in slot])
+        positions = np.repeat(normals.sum(axis=0)[None, :] * 2, len(slot), axis=0)
+        idx.append(faceletIndex(3, positions, normals))
+    return np.array(idx)
+
+
+CORNER_FACELETS = _pieceFacelets(CORNERS)
+EDGE_FACELETS = _pieceFacelets(EDGES)
+CORNER_COLORS = np.array([[FACE_COLOR[f] for f in slot] for slot in CORNERS])
+EDGE_COLORS = np.array([[FACE_COLOR[f] for f in slot] for slot in EDGES])
+CENTER_FACELETS = _pieceFacelets(CENTERS)[:, 0]
+CENTER_COLORS = np.array([FACE_COLOR[f] for f in CENTERS])
+
+
+def stateToFacelets(state):
+    """
+        Facelet colors of a CubeState
+
+        state(CubeState) - 3x3x3 state
+    """
+    return piecesToFacelets(state.cp, state.co, state.ep, state.eo, state.ct)
+
+
+def piecesToFacelets(cp, co, ep, eo, ct=None):
+    """
+        Facelet colors given the CubeState arrays of one or many states, shape (..., 54)
+
+        cp, co, ep, eo(numpy.ndarray) - Corner and edge permutations and orientations, shape (..., 8) and (..., 12)
+        ct(numpy.ndarray) - Centers, shape (..., 6). Solved by default
+    """
+    cp, co, ep, eo = (np.asarray(a) for a in (cp, co, ep, eo))
+    facelets = np.empty(cp.shape[:-1] + (54,), dtype=np.uint8)
+
+    for slot_facelets, piece_colors, perm, ori in ((CORNER_FACELETS, CORNER_COLORS, cp, co),
+                                                   (EDGE_FACELETS, EDGE_COLORS, ep, eo)):
+        n = slot_facelets.shape[1]
+        # Sticker k of a slot holds the sticker (k - ori) of the piece that sits on it
+        sticker = (np.arange(n) - ori[..., None]) % n
+        facelets[..., slot_facelets] = piece_colors[perm[..., None], sticker]
+
+    facelets[..., CENTER_FACELETS] = CENTER_COLORS if ct is None else CENTER_COLORS[ct]
+    return facelets
+
+
+def faceletsToState(facelets):
+    """
+        CubeState described by the facelet colors of a 3x3x3 cube. Raises ValueError for unknown pieces
+
+        facelets(numpy.ndarray) - 54 facelet colors
+    """
+    facelets = np.asarray(facelets)
+    state = CubeState()
+
+    for slot_facelets, piece_colors, perm, ori in ((CORNER_FACELETS, CORNER_COLORS, state.cp, state.co),
+                                                   (EDGE_FACELETS, EDGE_COLORS, state.ep, state.eo)):
+        n = slot_facelets.shape[1]
+        pieces = {}
+        for piece, colors in enumerate(piece_colors):
+            for o in range(n):
+                pieces[tuple(np.roll(colors, o))] = (piece, o)
+
+        for i, colors in enumerate(facelets[slot_facelets]):
+            if tuple(colors) not in pieces:
+                raise ValueError('Unknown piece with colors %s' % (tuple(colors),))
+            perm[i], ori[i] = pieces[tuple(colors)]
+
+    center = {color: piece for piece, color in enumerate(CENTER_COLORS)}
+    for i, color in enumerate(facelets[CENTER_FACELETS]):
+        if color not in center:
+            raise ValueError('Unknown center with color %s' % color)
+        state.ct[i] = center[color]
+
+    return state.updateCounters()
@@ -1,5 +1,12 @@
-uniform vec4 color;
+#version 330 core
+
+// 1.0 while drawing the black borders of the stickers
+uniform float border;
+
+in vec4 color;
+
+out vec4 frag_color;
 
 void main(){
-    gl_FragColor = color;
+    frag_color = mix(color, vec4(0.0, 0.0, 0.0, 1.0), border);
 }
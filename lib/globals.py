@@ -10,3 +10,15 @@ cube = None
 
 # Lock variable that blocks diferent face movements at the same time
 lock_rotation = None
+
+# Queue of the face movements animated by the main loop
+scheduler = None
+
+# Layer turned by the face keys, 0 for the face itself
+layer_depth = 0
+
+# Solutions already computed by the solver, saved between runs
+solution_cache = None
+
+# Frame time and OpenGL call instrumentation of the main loop
+profiler = None
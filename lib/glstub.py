@@ -0,0 +1,99 @@
+"""
+    Recording stand-ins for the glfw and OpenGL.GL modules
+
+    install() registers fake modules in sys.modules, so the viewer code can be imported and run without a display
+    or an OpenGL context. Every call is counted and, while recording is on, logged with its arguments. The fake
+    functions return small integers (buffer ids, attribute and uniform locations) and do nothing else.
+"""
+
+import sys
+import types
+from collections import Counter
+
+# OpenGL names exported to "from OpenGL.GL import *". Any other gl* or GL_* attribute is also available
+GL_NAMES = (
+    'glAttachShader', 'glBindBuffer', 'glBindVertexArray', 'glBufferData', 'glBufferSubData', 'glClear', 'glClearColor',
+    'glCompileShader', 'glCreateProgram', 'glCreateShader', 'glDrawArrays', 'glDrawArraysInstanced', 'glDrawElements',
+    'glDrawElementsInstanced', 'glEnable', 'glEnableVertexAttribArray', 'glGenBuffers', 'glGenVertexArrays',
+    'glGetAttribLocation', 'glGetProgramInfoLog', 'glGetProgramiv', 'glGetShaderInfoLog', 'glGetShaderiv',
+    'glGetUniformLocation', 'glLinkProgram', 'glShaderSource', 'glUniform1f', 'glUniform3f', 'glUniform4f',
+    'glUniformMatrix4fv', 'glUseProgram', 'glVertexAttribDivisor', 'glVertexAttribPointer',
+    'GL_ARRAY_BUFFER', 'GL_COLOR_BUFFER_BIT', 'GL_COMPILE_STATUS', 'GL_DEPTH_BUFFER_BIT', 'GL_DEPTH_TEST',
+    'GL_DYNAMIC_DRAW', 'GL_ELEMENT_ARRAY_BUFFER', 'GL_FALSE', 'GL_FLOAT', 'GL_FRAGMENT_SHADER', 'GL_LINE_STRIP',
+    'GL_LINK_STATUS', 'GL_STATIC_DRAW', 'GL_TRIANGLE_STRIP', 'GL_TRUE', 'GL_UNSIGNED_INT', 'GL_VERTEX_SHADER',
+)
+
+# Number of calls of every function since the last reset, and the (name, args) of the recorded calls
+counts = Counter()
+calls = []
+recording = False
+
+# Attribute and uniform locations handed out so far, by name
+_locations = {}
+
+
+def reset():
+    """
+        Forget the counted and recorded calls
+    """
+    counts.clear()
+    del calls[:]
+
+
+def record(enabled=True):
+    """
+        Start or stop logging the arguments of every call (counting never stops)
+    """
+    global recording
+    recording = enabled
+
+
+def _result(name, args):
+    if name in ('glGenBuffers', 'glGenVertexArrays'):
+        return list(range(1, args[0] + 1)) if args[0] > 1 else 1
+    if name in ('glGetAttribLocation', 'glGetUniformLocation'):
+        # mat4 attributes take four locations
+        return _locations.setdefault(args[1], 4 * len(_locations))
+    if name.startswith(('glCreate', 'create_')):
+        return 1
+    if name in ('glGetShaderiv', 'glGetProgramiv'):
+        # Every shader compiles and links
+        return 1
+    return None
+
+
+def _function(name):
+    def stub(*args, **kwargs):
+        counts[name] += 1
+        if recording:
+            calls.append((name, args))
+        return _result(name, args)
+
+    stub.__name__ = name
+    return stub
+
+
+def _getattr(name):
+    # Lower case names are functions, upper case names are constants
+    if name.startswith('__'):
+        raise AttributeError(name)
+    if name[0].isupper():
+        return 0
+    return _function(name)
+
+
+def install():
+    """
+        Register the fake glfw, OpenGL and OpenGL.GL modules. Must run before the viewer modules are imported
+    """
+    gl = types.ModuleType('OpenGL.GL')
+    gl.__all__ = list(GL_NAMES)
+    gl.__getattr__ = _getattr
+
+    opengl = types.ModuleType('OpenGL')
+    opengl.GL = gl
+
+    glfw = types.ModuleType('glfw')
+    glfw.__getattr__ = _getattr
+
+    sys.modules.update({'OpenGL': opengl, 'OpenGL.GL': gl, 'glfw': glfw})
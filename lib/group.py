@@ -0,0 +1,185 @@
+"""
+    Group theory of the move sequences: inverse, order, cycle structure, conjugates and commutators
+
+    Everything is computed on the permutations composed by Algorithm (the piece tables of the 3x3x3 cube, the
+    facelet permutation of the other orders), never by applying moves to a cube, and the results are cached by the
+    simplified text of the sequence. The functions take a sequence in standard notation or a compiled Algorithm:
+
+        order("R U")                    105
+        cycleStructure("R U R' U'")     "corners 2+ 2+, edges 3", see cycles
+        commutator("R", "U")            Algorithm("R U R' U'")
+        conjugate("F", "[R, U]")        Algorithm("F R U R' U' F'")
+"""
+
+from functools import lru_cache
+from math import lcm
+
+import numpy as np
+from lib import notation
+from lib.Algorithm import ALGORITHM_CACHE_SIZE, Algorithm, compileAlgorithm
+from lib.CubeState import CORNERS, EDGES, CENTERS
+from lib.facelets import solvedFacelets
+
+
+def _algorithm(algorithm, order):
+    """
+        Compiled algorithm of a sequence given as text or as an Algorithm
+    """
+    if isinstance(algorithm, Algorithm):
+        return algorithm
+    return compileAlgorithm(algorithm, order)
+
+
+def _cycles(perm):
+    """
+        Cycles of a table permutation, following the pieces: with new = old[perm] the piece in slot i moves to the
+        slot j with perm[j] = i. Fixed slots are included as cycles of length 1
+    """
+    destination = np.argsort(perm).tolist()
+    seen = [False] * len(perm)
+    result = []
+    for start in range(len(perm)):
+        if seen[start]:
+            continue
+        cycle = []
+        slot = start
+        while not seen[slot]:
+            seen[slot] = True
+            cycle.append(slot)
+            slot = destination[slot]
+        result.append(cycle)
+    return result
+
+
+def inverse(algorithm, order=3):
+    """
+        Algorithm undoing a sequence
+
+        algorithm(str | Algorithm) - Sequence in standard notation or compiled algorithm
+        order(int) - Number of cubies along each edge of the cube, for a sequence given as text
+    """
+    algorithm = _algorithm(algorithm, order)
+    return compileAlgorithm(notation.toText(notation.inverse(algorithm.turns), algorithm.order), algorithm.order)
+
+
+def conjugate(setup, algorithm, order=3):
+    """
+        Algorithm "setup algorithm setup'", written [setup: algorithm] in the notation
+
+        setup, algorithm(str | Algorithm) - Sequences in standard notation or compiled algorithms
+        order(int) - Number of cubies along each edge of the cube, for sequences given as text
+    """
+    setup, algorithm = _algorithm(setup, order), _algorithm(algorithm, order)
+    return compileAlgorithm('[%s: %s]' % (setup.text, algorithm.text), algorithm.order)
+
+
+def commutator(a, b, order=3):
+    """
+        Algorithm "a b a' b'", written [a, b] in the notation
+
+        a, b(str | Algorithm) - Sequences in standard notation or compiled algorithms
+        order(int) - Number of cubies along each edge of the cube, for sequences given as text
+    """
+    a, b = _algorithm(a, order), _algorithm(b, order)
+    return compileAlgorithm('[%s, %s]' % (a.text, b.text), a.order)
+
+
+@lru_cache(maxsize=ALGORITHM_CACHE_SIZE)
+def _order(text, order):
+    colors = solvedFacelets(order).tolist()
+
+    # A cycle of stickers is back to its colors after the smallest shift of the cycle that preserves them, which
+    # can divide its length when stickers of the same color follow each other (the centers of the big cubes)
+    result = 1
+    for cycle in _cycles(compileAlgorithm(text, order).facelet_perm):
+        cycle_colors = [colors[i] for i in cycle]
+        n = len(cycle)
+        result = lcm(result, next(d for d in range(1, n + 1)
+                                  if n % d == 0 and cycle_colors[d:] + cycle_colors[:d] == cycle_colors))
+    return result
+
+
+def order(algorithm, order=3):
+    """
+        Number of repetitions of a sequence bringing a solved cube back to solved, every sticker showing its
+        original color. Ex: 6 for "R U R' U'"
+
+        algorithm(str | Algorithm) - Sequence in standard notation or compiled algorithm
+        order(int) - Number of cubies along each edge of the cube, for a sequence given as text
+    """
+    algorithm = _algorithm(algorithm, order)
+    if algorithm.order == 3:
+        # A cycle of pieces that twists or flips them goes around 3 or 2 times before the pieces are back
+        result = 1
+        for kind, n_ori in (('corners', 3), ('edges', 2), ('centers', 1)):
+            for slots, twist in _pieceCycles(algorithm.text)[kind]:
+                result = lcm(result, len(slots) * (n_ori if twist else 1))
+        return result
+    return _order(algorithm.text, algorithm.order)
+
+
+@lru_cache(maxsize=ALGORITHM_CACHE_SIZE)
+def _pieceCycles(text):
+    algorithm = compileAlgorithm(text, 3)
+    result = {}
+    for kind, names, perm, ori, n_ori in (('corners', CORNERS, algorithm.corner_perm, algorithm.corner_ori, 3),
+                                          ('edges', EDGES, algorithm.edge_perm, algorithm.edge_ori, 2),
+                                          ('centers', CENTERS, algorithm.center_perm, np.zeros(6, dtype=int), 1)):
+        # The orientation change of a piece going once around its cycle
+        result[kind] = tuple((tuple(names[slot] for slot in cycle), int(ori[cycle].sum()) % n_ori)
+                             for cycle in _cycles(perm)
+                             if len(cycle) > 1 or ori[cycle[0]] != 0)
+    return result
+
+
+@lru_cache(maxsize=ALGORITHM_CACHE_SIZE)
+def _faceletCycles(text, order):
+    return tuple(tuple(cycle) for cycle in _cycles(compileAlgorithm(text, order).facelet_perm) if len(cycle) > 1)
+
+
+def cycles(algorithm, order=3):
+    """
+        Cycle decomposition of a sequence, the cycles of length 1 without orientation change left out
+
+        For the 3x3x3 cube, a dict of the corner, edge and center cycles: every cycle is (slots, twist) with the slot
+        names of CubeState in the order the pieces travel, and the orientation change of a piece going once around
+        the cycle (in thirds of a turn for the corners, 1 for a flipped edge). Ex: for "R U R' U'", the corner
+        cycles (('URF', 'DFR'), 1) and (('ULB', 'UBR'), 2). For the other orders, a tuple of facelet cycles
+        (indexes of lib/facelets.py)
+
+        algorithm(str | Algorithm) - Sequence in standard notation or compiled algorithm
+        order(int) - Number of cubies along each edge of the cube, for a sequence given as text
+    """
+    algorithm = _algorithm(algorithm, order)
+    if algorithm.order == 3:
+        return _pieceCycles(algorithm.text)
+    return _faceletCycles(algorithm.text, algorithm.order)
+
+
+def cycleStructure(algorithm, order=3):
+    """
+        Short description of the cycles of a sequence. Ex: "corners 2+ 2+, edges 3" for "R U R' U'", a + after
+        the length of a cycle that twists or flips its pieces. For the other orders, the lengths of the facelet cycles
+
+        algorithm(str | Algorithm) - Sequence in standard notation or compiled algorithm
+        order(int) - Number of cubies along each edge of the cube, for a sequence given as text
+    """
+    decomposition = cycles(algorithm, order)
+    if not isinstance(decomposition, dict):
+        return 'facelets ' + ' '.join(str(len(cycle)) for cycle in sorted(decomposition, key=len, reverse=True))
+
+    parts = []
+    for kind, kind_cycles in decomposition.items():
+        if kind_cycles:
+            lengths = sorted(((len(slots), twist) for slots, twist in kind_cycles), reverse=True)
+            parts.append('%s %s' % (kind, ' '.join('%d%s' % (n, '+' if twist else '') for n, twist in lengths)))
+    return ', '.join(parts) or 'identity'
+
+
+def clearCache():
+    """
+        Forget the cached orders and cycles. The compiled algorithms they come from stay in the cache of
+        compileAlgorithm
+    """
+    for function in (_order, _pieceCycles, _faceletCycles):
+        function.cache_clear()
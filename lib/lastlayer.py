@@ -0,0 +1,244 @@
+"""
+    Recognition of the last layer cases of the CFOP method: OLL (orient the last layer) and PLL (permute it)
+
+    The last layer is the U layer and a state is recognized once the first two layers (every D and E slice piece)
+    are solved. The index maps the orientations of the 8 last layer pieces to an OLL case and the U turn to do
+    before its algorithm, and their permutation to a PLL case and the U turns to do before and after its algorithm.
+    Both are dicts keyed by a small integer, filled once from the algorithms below: the cases are the states
+    solved by the algorithms, seen after every U turn. Every algorithm is checked on CubeState first and rejected
+    when it breaks the first two layers (or the orientation of the last layer for a PLL).
+
+        case = recognize(cube)               {'step': 'OLL', 'case': 27, 'name': 'OLL 27', 'pre_auf': "U'", ...}
+        scheduler.pushMoves(case['algorithm'].faceTurns())
+"""
+
+from lib import group
+from lib.Algorithm import compileAlgorithm
+from lib.CubeState import CubeState
+
+# Slots of the last layer: the first 4 corners and edges of CORNERS and EDGES are the U ones
+LL_SLOTS = 4
+
+# Adjustments of the U face, by number of quarter turns
+AUF = ('', 'U', 'U2', "U'")
+
+# Algorithm of every OLL case, by case number
+OLL_ALGORITHMS = {
+    1: "R U2 R2 F R F' U2 R' F R F'",
+    2: "F R U R' U' F' f R U R' U' f'",
+    3: "f R U R' U' f' U' F R U R' U' F'",
+    4: "f R U R' U' f' U F R U R' U' F'",
+    5: "r' U2 R U R' U r",
+    6: "r U2 R' U' R U' r'",
+    7: "r U R' U R U2 r'",
+    8: "l' U' L U' L' U2 l",
+    9: "R U R' U' R' F R2 U R' U' F'",
+    10: "R U R' U R' F R F' R U2 R'",
+    11: "r U R' U R' F R F' R U2 r'",
+    12: "M' R' U' R U' R' U2 R U' R r'",
+    13: "F U R U' R2 F' R U R U' R'",
+    14: "R' F R U R' F' R F U' F'",
+    15: "l' U' l L' U' L U l' U l",
+    16: "r U r' R U R' U' r U' r'",
+    17: "F R' F' R2 r' U R U' R' U' M'",
+    18: "r U R' U R U2 r2 U' R U' R' U2 r",
+    19: "r' R U R U R' U' M' R' F R F'",
+    20: "r U R' U' M2 U R U' R' U' M'",
+    21: "R U2 R' U' R U R' U' R U' R'",
+    22: "R U2 R2 U' R2 U' R2 U2 R",
+    23: "R2 D' R U2 R' D R U2 R",
+    24: "r U R' U' r' F R F'",
+    25: "F' r U R' U' r' F R",
+    26: "R U2 R' U' R U' R'",
+    27: "R U R' U R U2 R'",
+    28: "r U R' U' M U R U' R'",
+    29: "R U R' U' R U' R' F' U' F R U R'",
+    30: "F R' F R2 U' R' U' R U R' F2",
+    31: "R' U' F U R U' R' F' R",
+    32: "L U F' U' L' U L F L'",
+    33: "R U R' U' R' F R F'",
+    34: "R U R2 U' R' F R U R U' F'",
+    35: "R U2 R2 F R F' R U2 R'",
+    36: "L' U' L U' L' U L U L F' L' F",
+    37: "F R' F' R U R U' R'",
+    38: "R U R' U R U' R' U' R' F R F'",
+    39: "L F' L' U' L U F U' L'",
+    40: "R' F R U R' U' F' U R",
+    41: "R U R' U R U2 R' F R U R' U' F'",
+    42: "R' U' R U' R' U2 R F R U R' U' F'",
+    43: "F' U' L' U L F",
+    44: "F U R U' R' F'",
+    45: "F R U R' U' F'",
+    46: "R' U' R' F R F' U R",
+    47: "R' U' R' F R F' R' F R F' U R",
+    48: "F R U R' U' R U R' U' F'",
+    49: "r U' r2 U r2 U r2 U' r",
+    50: "r' U r2 U' r2 U' r2 U r'",
+    51: "F U R U' R' U R U' R' F'",
+    52: "R U R' U R U' B U' B' R'",
+    53: "l' U2 L U L' U' L U L' U l",
+    54: "r U2 R' U' R U R' U' R U' r'",
+    55: "R' F R U R U' R2 F' R2 U' R' U R U R'",
+    56: "r' U' r U' R' U R U' R' U R r' U r",
+    57: "R U R' U' M' U R U' r'",
+}
+
+# Algorithm of every PLL case, by case name
+PLL_ALGORITHMS = {
+    'Aa': "x R' U R' D2 R U' R' D2 R2 x'",
+    'Ab': "x R2 D2 R U R' D2 R U' R x'",
+    'E': "x' R U' R' D R U R' D' R U R' D R U' R' D' x",
+    'F': "R' U' F' R U R' U' R' F R2 U' R' U' R U R' U R",
+    'Ga': "R2 U R' U R' U' R U' R2 U' D R' U R D'",
+    'Gb': "R' U' R U D' R2 U R' U R U' R U' R2 D",
+    'Gc': "R2 U' R U' R U R' U R2 U D' R U' R' D",
+    'Gd': "R U R' U' D R2 U' R U' R' U R' U R2 D'",
+    'H': "M2 U M2 U2 M2 U M2",
+    'Ja': "x R2 F R F' R U2 r' U r U2 x'",
+    'Jb': "R U R' F' R U R' U' R' F R2 U' R'",
+    'Na': "R U R' U R U R' F' R U R' U' R' F R2 U' R' U2 R U' R'",
+    'Nb': "R' U R U' R' F' U' F R U R' F R' F' R U' R",
+    'Ra': "R U R' F' R U2 R' U2 R' F R U R U2 R'",
+    'Rb': "R' U2 R U2 R' F R U R' U' R' F' R2",
+    'T': "R U R' U' R' F R2 U' R' U' R U R' F'",
+    'Ua': "M2 U M U2 M' U M2",
+    'Ub': "M2 U' M U2 M' U' M2",
+    'V': "R' U R' U' R D' R' D R' U D' R2 U' R2 D R2",
+    'Y': "F R U' R' U' R U R' F' R U R' U' R' F R F'",
+    'Z': "M' U M2 U M2 U M' U2 M2",
+}
+
+_index = None
+
+
+def _f2lSolved(state):
+    """
+        The pieces of the D layer and of the E slice and the centers are solved
+    """
+    return (state.cp[LL_SLOTS:].tolist() == list(range(LL_SLOTS, 8)) and not state.co[LL_SLOTS:].any()
+            and state.ep[LL_SLOTS:].tolist() == list(range(LL_SLOTS, 12)) and not state.eo[LL_SLOTS:].any()
+            and state.ct.tolist() == list(range(6)))
+
+
+def _orientationKey(state):
+    """
+        Key of the orientations of the last layer pieces, in 0..1295
+    """
+    co, eo = state.co[:LL_SLOTS].tolist(), state.eo[:LL_SLOTS].tolist()
+    return co[0] + 3 * co[1] + 9 * co[2] + 27 * co[3] + 81 * (eo[0] + 2 * eo[1] + 4 * eo[2] + 8 * eo[3])
+
+
+def _permutationKey(state):
+    """
+        Key of the positions of the last layer pieces, in 0..65535
+    """
+    cp, ep = state.cp[:LL_SLOTS].tolist(), state.ep[:LL_SLOTS].tolist()
+    return cp[0] + 4 * cp[1] + 16 * cp[2] + 64 * cp[3] + 256 * (ep[0] + 4 * ep[1] + 16 * ep[2] + 64 * ep[3])
+
+
+def _withAUF(algorithm, pre, post):
+    """
+        Algorithm preceded and followed by U turns, None for no algorithm
+    """
+    return compileAlgorithm(' '.join(part for part in (AUF[pre], algorithm and algorithm.text, AUF[post]) if part))
+
+
+def verifyAlgorithm(text, permutation=False):
+    """
+        Compiled algorithm of a last layer case, raises ValueError when it breaks the first two layers or, for a PLL,
+        the orientation of the last layer
+
+        text(str) - Sequence in standard notation
+        permutation(bool) - The algorithm is a PLL
+    """
+    algorithm = compileAlgorithm(text)
+    state = algorithm.apply(CubeState())
+    if not _f2lSolved(state):
+        raise ValueError('%s does not keep the first two layers solved' % text)
+    if permutation and (state.co.any() or state.eo.any()):
+        raise ValueError('%s changes the orientation of the last layer' % text)
+    if state.is_solved():
+        raise ValueError('%s does not change the last layer' % text)
+    return algorithm
+
+
+class _Index:
+    """
+        OLL and PLL cases of every last layer state, keyed by _orientationKey and _permutationKey
+    """
+
+    def __init__(self, oll_algorithms, pll_algorithms):
+        self.oll_algorithms = {case: verifyAlgorithm(text) for case, text in oll_algorithms.items()}
+        self.pll_algorithms = {case: verifyAlgorithm(text, True) for case, text in pll_algorithms.items()}
+
+        # (case, pre-AUF) of every orientation: after the pre-AUF the algorithm of the case orients the last layer
+        self.oll = {}
+        for case, algorithm in self.oll_algorithms.items():
+            for pre in range(4):
+                entry = self.oll.setdefault(_orientationKey(self._before(algorithm, pre, 0)), (case, pre))
+                if entry[0] != case:
+                    raise ValueError('OLL %d and %d solve the same case' % (entry[0], case))
+
+        # (case, pre-AUF, post-AUF) of every permutation, None for the solved last layer
+        self.pll = {}
+        for case, algorithm in [(None, None)] + list(self.pll_algorithms.items()):
+            for pre in range(4):
+                for post in range(4):
+                    entry = self.pll.setdefault(_permutationKey(self._before(algorithm, pre, post)), (case, pre, post))
+                    if entry[0] != case:
+                        raise ValueError('%s and %s perms solve the same case' % (entry[0], case))
+
+    @staticmethod
+    def _before(algorithm, pre, post):
+        """
+            State solved by the pre-AUF, the algorithm and the post-AUF
+        """
+        state = CubeState().applyMoves([AUF[-post]] if post else [])
+        if algorithm is not None:
+            state = group.inverse(algorithm).apply(state)
+        return state.applyMoves([AUF[-pre]] if pre else [])
+
+
+def getIndex():
+    """
+        Last layer index, built on the first call from OLL_ALGORITHMS and PLL_ALGORITHMS
+    """
+    global _index
+    if _index is None:
+        _index = _Index(OLL_ALGORITHMS, PLL_ALGORITHMS)
+    return _index
+
+
+def recognize(cube):
+    """
+        Last layer case of a 3x3x3 cube, None until its first two layers are solved. A dict with the step to do
+        ('OLL', 'PLL', 'AUF' or 'solved'), the case (OLL number or PLL name, None for an AUF), its name, the U turns
+        before and after the algorithm of the case and the whole sequence as an Algorithm:
+
+            {'step': 'PLL', 'case': 'T', 'name': 'T perm', 'pre_auf': 'U2', 'post_auf': '', 'algorithm': ...}
+
+        A lookup of the index, built on the first call. The algorithm is played by the viewer with
+        globals.scheduler.pushMoves(result['algorithm'].faceTurns())
+
+        cube(Cube | CubeState) - Cube or state to recognize
+    """
+    state = getattr(cube, 'state', cube)
+    if not isinstance(state, CubeState):
+        raise ValueError('Only the 3x3x3 cube has last layer cases')
+    if not _f2lSolved(state):
+        return None
+
+    index = getIndex()
+    orientation = _orientationKey(state)
+    if orientation:
+        case, pre = index.oll[orientation]
+        step, name, algorithm, post = 'OLL', 'OLL %d' % case, index.oll_algorithms[case], 0
+    else:
+        case, pre, post = index.pll[_permutationKey(state)]
+        if case is None:
+            step, name, algorithm = 'AUF' if pre or post else 'solved', None, None
+        else:
+            step, name, algorithm = 'PLL', '%s perm' % case, index.pll_algorithms[case]
+
+    return {'step': step, 'case': case, 'name': name, 'pre_auf': AUF[pre], 'post_auf': AUF[post],
+            'algorithm': _withAUF(algorithm, pre, post)}
@@ -0,0 +1,225 @@
+"""
+    Standard move notation for cubes of any order
+
+    A sequence such as "(R U R' U')3 Rw2 M' x" is parsed into layer turns (axis, first, last, quarter_turns):
+    the layers first..last are numbered 0..order-1 along the positive axis and quarter_turns is the rotation around
+    the positive axis, in 1..3, with the same convention as CubeState.quarterTurnMatrix. The parser accepts:
+
+        R U F D L B          outer face turns, with the suffixes 2, ' and 2' (any count with an optional ')
+        Rw r 3Rw             wide turns of the 2 (or the given number of) outer layers
+        3R                   the single layer at that depth, counted from 1 at the face
+        M E S                the layer next to L, D and F, as in faceAngle
+        x y z                whole cube rotations, following R, U and F
+        ( ... )3 ( ... )'    repeated or inverted groups, which can be nested
+        [A, B] [A: B]        commutator A B A' B' and conjugate A B A', also groups
+"""
+
+import re
+
+import numpy as np
+from lib.CubeState import FACES, SLICES
+
+AXIS_NAMES = 'xyz'
+
+# Face followed by each rotation, as in the usual notation
+ROTATION_FACES = {'x': 'R', 'y': 'U', 'z': 'F'}
+
+# A move: optional layer count, letter, optional w, optional count and prime
+_MOVE = re.compile(r"(\d*)([URFDLBurfdlbMESxyz])(w?)(\d*)('?)")
+_SPACE = re.compile(r"\s*")
+_SUFFIX = re.compile(r"(\d*)('?)")
+
+# Characters ending a group or the first part of a bracket
+_GROUP_ENDS = ')],:'
+
+
+def _faceAxis(letter):
+    """
+        (axis, +1 or -1) of the outward normal of a face letter
+    """
+    normal = FACES[letter]
+    axis = [i for i, x in enumerate(normal) if x != 0][0]
+    return axis, normal[axis]
+
+
+def _layers(letter, depth, width, order):
+    """
+        (axis, first, last, sign) of width layers starting depth layers below a face
+    """
+    axis, sign = _faceAxis(letter)
+    if depth < 0 or width < 1 or depth + width > order:
+        raise ValueError('A cube of order %d has no layers %d to %d below %s' % (order, depth + 1, depth + width,
+                                                                                 letter))
+    if sign > 0:
+        return axis, order - depth - width, order - 1 - depth, sign
+    return axis, depth, depth + width - 1, sign
+
+
+def _turn(match, order):
+    """
+        Layer turn of a single move matched by _MOVE
+    """
+    prefix, letter, wide, count, prime = match.groups()
+    quarter_turns = int(count) if count else 1
+    if prime:
+        quarter_turns = -quarter_turns
+
+    if letter in ROTATION_FACES:
+        if prefix or wide:
+            raise ValueError('Rotation %s takes no layer count' % match.group())
+        axis, first, last, sign = _layers(ROTATION_FACES[letter], 0, order, order)
+    elif letter in SLICES:
+        if prefix or wide:
+            raise ValueError('Slice move %s takes no layer count' % match.group())
+        axis, first, last, sign = _layers(SLICES[letter], 1, 1, order)
+    elif letter.islower():
+        if wide:
+            raise ValueError('Wide move %s is written either %sw or %s' % (match.group(), letter.upper(), letter))
+        axis, first, last, sign = _layers(letter.upper(), 0, int(prefix) if prefix else 2, order)
+    elif wide:
+        axis, first, last, sign = _layers(letter, 0, int(prefix) if prefix else 2, order)
+    else:
+        axis, first, last, sign = _layers(letter, int(prefix) - 1 if prefix else 0, 1, order)
+
+    return axis, first, last, quarter_turns * sign % 4
+
+
+def _parseSequence(text, pos, order, depth):
+    """
+        Layer turns of the text from pos until the end or the end of the enclosing group, and the position reached
+    """
+    turns = []
+    while True:
+        pos = _SPACE.match(text, pos).end()
+        if pos == len(text) or text[pos] in _GROUP_ENDS:
+            if pos < len(text) and depth == 0:
+                raise ValueError('Unmatched %s at position %d' % (text[pos], pos))
+            return turns, pos
+
+        if text[pos] == '(':
+            group, end = _parseSequence(text, pos + 1, order, depth + 1)
+            if end == len(text) or text[end] != ')':
+                raise ValueError('Unmatched ( at position %d' % pos)
+        elif text[pos] == '[':
+            # [A, B] is the commutator A B A' B' and [A: B] the conjugate A B A'
+            setup, separator = _parseSequence(text, pos + 1, order, depth + 1)
+            if separator == len(text) or text[separator] not in ',:':
+                raise ValueError('Expected , or : in the bracket at position %d' % pos)
+            body, end = _parseSequence(text, separator + 1, order, depth + 1)
+            if end == len(text) or text[end] != ']':
+                raise ValueError('Unmatched [ at position %d' % pos)
+            group = setup + body + inverse(setup) + (inverse(body) if text[separator] == ',' else [])
+        else:
+            match = _MOVE.match(text, pos)
+            if match is None:
+                raise ValueError('Unknown move at position %d: %r' % (pos, text[pos:pos + 8]))
+            turn = _turn(match, order)
+            if turn[3] != 0:
+                turns.append(turn)
+            pos = match.end()
+            continue
+
+        suffix = _SUFFIX.match(text, end + 1)
+        count, prime = suffix.groups()
+        pos = suffix.end()
+        if prime:
+            group = inverse(group)
+        turns.extend(group * (int(count) if count else 1))
+
+
+def parse(text, order=3):
+    """
+        Layer turns of a sequence in standard notation. Raises ValueError for invalid sequences
+
+        text(str) - Sequence of moves. Ex: "(R U R' U')3 Rw2 M' x"
+        order(int) - Number of cubies along each edge of the cube
+    """
+    return _parseSequence(text, 0, order, 0)[0]
+
+
+def inverse(turns):
+    """
+        Layer turns undoing a sequence
+    """
+    return [(axis, first, last, -quarter_turns % 4) for axis, first, last, quarter_turns in reversed(turns)]
+
+
+def simplify(turns):
+    """
+        Shortest equivalent sequence found by merging turns of the same layers
+
+        Turns around the same axis commute, so a turn is merged with any turn of the same layers found before it
+        without crossing a turn around another axis. Turns adding up to a full rotation disappear, which can bring
+        more turns together: "R U U' R'" simplifies to nothing
+    """
+    result = []
+    for axis, first, last, quarter_turns in turns:
+        i = len(result) - 1
+        while i >= 0 and result[i][0] == axis and result[i][1:3] != (first, last):
+            i -= 1
+
+        if i >= 0 and result[i][:3] == (axis, first, last):
+            total = (result[i][3] + quarter_turns) % 4
+            if total == 0:
+                del result[i]
+            else:
+                result[i] = (axis, first, last, total)
+        elif quarter_turns % 4 != 0:
+            result.append((axis, first, last, quarter_turns % 4))
+
+    return result
+
+
+def moveName(turn, order=3):
+    """
+        Name of a layer turn in standard notation, the inverse of parse for a single move
+
+        turn(tuple(int, int, int, int)) - (axis, first, last, quarter_turns)
+        order(int) - Number of cubies along each edge of the cube
+    """
+    axis, first, last, quarter_turns = turn
+
+    if first == 0 and last == order - 1:
+        letter = AXIS_NAMES[axis]
+        sign = _faceAxis(ROTATION_FACES[letter])[1]
+    elif first == last == 1 and order > 2:
+        letter = [s for s, f in SLICES.items() if _faceAxis(f)[0] == axis][0]
+        sign = _faceAxis(SLICES[letter])[1]
+    else:
+        # Count the layers from the nearest face
+        sign = 1 if order - 1 - last < first else -1
+        letter = [f for f in FACES if _faceAxis(f) == (axis, sign)][0]
+        depth, width = (order - 1 - last, last - first + 1) if sign > 0 else (first, last - first + 1)
+        if depth > 0:
+            letter = '%d%s' % (depth + 1, letter)
+        elif width == 2:
+            letter += 'w'
+        elif width > 2:
+            letter = '%d%sw' % (width, letter)
+
+    return letter + ('', '2', "'")[quarter_turns * sign % 4 - 1]
+
+
+def toText(turns, order=3):
+    """
+        Sequence of layer turns in standard notation. Ex: "R U R' U'"
+    """
+    return ' '.join(moveName(turn, order) for turn in turns)
+
+
+def faceTurns(turns, order=3):
+    """
+        Convert layer turns to the (face, ang, depth) arguments of Cube.drawSlowRotateFace, one per turned layer
+
+        A wide turn or a rotation becomes several turns of single layers, each one counted from the nearest face
+
+        turns(list(tuple)) - Layer turns given by parse
+        order(int) - Number of cubies along each edge of the cube
+    """
+    result = []
+    for axis, first, last, quarter_turns in turns:
+        ang = ((quarter_turns + 1) % 4 - 1) * np.pi / 2
+        for layer in range(first, last + 1):
+            face = tuple(int(i == axis) * (1 if 2 * layer >= order - 1 else -1) for i in range(3))
+            result.append((face, ang, min(layer, order - 1 - layer)))
+    return result
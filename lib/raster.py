@@ -0,0 +1,222 @@
+"""
+    Headless software renderer of cube states
+
+    Draws the visible stickers of a cube with NumPy into an RGB image, using the same geometry, colors and camera
+    matrices as the OpenGL renderer but without a window or an OpenGL context. The cube is convex and the projection
+    is orthographic, so the faces turned to the viewer never overlap and back face culling replaces the depth buffer.
+"""
+
+import struct
+import zlib
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+from lib.Camera import Camera
+from lib.CubeState import CubeState
+from lib.Cubie import Cubie
+from lib.facelets import FACE_NORMALS, FACE_U, FACE_V, faceletGeometry, stateToFacelets
+
+# Half of the cube edge in OpenGL coordinates, as built by Cube.generateCubies
+CUBE_HALF_SIZE = 0.45
+
+# Fraction of the cubie face covered by the sticker, the rest shows the black cubie body as a border
+STICKER_SIZE = 0.85
+
+BODY_COLOR = np.array([0, 0, 0], dtype=np.uint8)
+STICKER_COLORS = np.round(Cubie.colors[:, :3] * 255).astype(np.uint8)
+
+# Quad corners in (u, v) units, in drawing order around the quad
+_QUAD = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)])
+
+# Sticker quads of every order drawn so far, shape (6 * order * order, 4, 3)
+_STICKERS = {}
+
+# Facelet of every sticker cell of every order drawn so far, see stickerCells
+_CELLS = {}
+
+
+def defaultCamera():
+    """
+        Camera of the first frame of cube.py
+    """
+    return Camera().rotate(0, 0.4).rotate(1, 0.4).rotate(2, 0.4)
+
+
+def _quads(centers, u, v):
+    """
+        Corners of quads given their centers and half edge vectors, shape (n, 4, 3)
+    """
+    return centers[:, None, :] + _QUAD[None, :, :1] * u[:, None, :] + _QUAD[None, :, 1:] * v[:, None, :]
+
+
+def stickerQuads(order):
+    """
+        Corners of every sticker in the facelet order of lib/facelets.py, in OpenGL coordinates
+
+        order(int) - Number of cubies along each edge of the cube
+    """
+    if order not in _STICKERS:
+        positions, normals = faceletGeometry(order)
+        face = np.repeat(np.arange(6), order * order)
+        half = CUBE_HALF_SIZE / order
+        _STICKERS[order] = _quads(positions * half + normals * half,
+                                  FACE_U[face] * half * STICKER_SIZE, FACE_V[face] * half * STICKER_SIZE)
+    return _STICKERS[order]
+
+
+def toFacelets(state):
+    """
+        (facelet colors, order) of a cube, a state or a facelet array
+
+        state(Cube | CubeState | FaceletState | numpy.ndarray) - Cube to draw
+    """
+    state = getattr(state, 'state', state)
+
+    if isinstance(state, CubeState):
+        return stateToFacelets(state), 3
+    if hasattr(state, 'facelets'):
+        return state.facelets, state.order
+
+    facelets = np.asarray(state)
+    order = int(round(np.sqrt(len(facelets) / 6)))
+    if 6 * order * order != len(facelets):
+        raise ValueError('%d facelets do not make a cube' % len(facelets))
+    return facelets, order
+
+
+def _cell(coordinate, order):
+    """
+        Sticker cell, 0 to order - 1, of a face coordinate going from -1 to 1
+    """
+    return np.clip(np.floor((coordinate + 1) / 2 * order), 0, order - 1).astype(np.intp)
+
+
+def stickerCells(order):
+    """
+        Facelet drawn on every sticker cell, indexed by (face, cell along FACE_U, cell along FACE_V)
+
+        order(int) - Number of cubies along each edge of the cube
+    """
+    if order not in _CELLS:
+        centers = stickerQuads(order).mean(axis=1)
+        face = np.repeat(np.arange(6), order * order)
+
+        # Face coordinates of the sticker centers, from -1 to 1 across the face
+        s = np.einsum('ij,ij->i', centers, FACE_U[face]) / CUBE_HALF_SIZE
+        t = np.einsum('ij,ij->i', centers, FACE_V[face]) / CUBE_HALF_SIZE
+
+        cells = np.empty((6, order, order), dtype=np.intp)
+        cells[face, _cell(s, order), _cell(t, order)] = np.arange(len(face))
+        _CELLS[order] = cells
+    return _CELLS[order]
+
+
+def render(state, camera=None, size=128, background=(0, 0, 0)):
+    """
+        RGB image of a cube, shape (size, size, 3)
+
+        Each visible face is an affine image of the square [-1, 1] x [-1, 1]. Inverting that map gives the face
+        coordinates of all the pixels of the face at once, from which the sticker cell and the border are read, so
+        the cost does not grow with the number of stickers
+
+        state(Cube | CubeState | FaceletState | numpy.ndarray) - Cube to draw
+        camera(Camera | numpy.ndarray) - Camera or 4x4 camera matrix, the view of cube.py by default
+        size(int) - Width and height of the image in pixels
+        background(tuple(int, int, int)) - Background color
+    """
+    facelets, order = toFacelets(state)
+    if camera is None:
+        camera = defaultCamera()
+    mat = np.asarray(camera.matrix() if isinstance(camera, Camera) else camera, dtype=np.float64)
+
+    image = np.empty((size, size, 3), dtype=np.uint8)
+    image[:] = background
+
+    colors = STICKER_COLORS[np.asarray(facelets)]
+    cells = stickerCells(order)
+
+    # Orthographic projection to pixel coordinates, y pointing down: pixel = project @ point + offset
+    project = np.array([[size / 2], [-size / 2]]) * mat[:2, :3]
+    offset = np.array([(mat[0, 3] + 1) * size / 2, (1 - mat[1, 3]) * size / 2])
+
+    # A face is turned to the viewer when its normal points to -z after the camera transformation
+    visible = (FACE_NORMALS @ mat[:3, :3].T)[:, 2] < 0
+
+    for face in np.flatnonzero(visible):
+        # pixel = center + axes @ (s, t) for the face coordinates s, t in [-1, 1]
+        center = project @ FACE_NORMALS[face] * CUBE_HALF_SIZE + offset
+        axes = np.stack([project @ FACE_U[face], project @ FACE_V[face]], axis=1) * CUBE_HALF_SIZE
+        if abs(np.linalg.det(axes)) < 1e-9:
+            continue
+
+        reach = np.abs(axes).sum(axis=1)
+        x0, y0 = np.maximum(np.floor(center - reach).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(center + reach).astype(int), size)
+        if x0 >= x1 or y0 >= y1:
+            continue
+
+        py, px = np.mgrid[y0:y1, x0:x1] + 0.5
+        s, t = np.tensordot(np.linalg.inv(axes), np.stack([px - center[0], py - center[1]]), axes=1)
+        inside = (np.abs(s) <= 1) & (np.abs(t) <= 1)
+        i, j = _cell(s, order), _cell(t, order)
+
+        # Offset from the center of the cell in cell units, the sticker covers STICKER_SIZE of the cell
+        on_sticker = ((np.abs((s + 1) / 2 * order - i - 0.5) <= STICKER_SIZE / 2)
+                      & (np.abs((t + 1) / 2 * order - j - 0.5) <= STICKER_SIZE / 2))
+
+        pixels = np.where(on_sticker[..., None], colors[cells[face, i, j]], BODY_COLOR)
+        image[y0:y1, x0:x1][inside] = pixels[inside]
+
+    return image
+
+
+def _renderChunk(states, **kwargs):
+    return np.array([render(state, **kwargs) for state in states])
+
+
+def renderMany(states, camera=None, size=128, background=(0, 0, 0), processes=1):
+    """
+        Images of many cubes, shape (len(states), size, size, 3)
+
+        states(list) - Cubes to draw, anything accepted by render
+        camera(Camera | numpy.ndarray) - Camera or 4x4 camera matrix shared by all the images
+        size(int) - Width and height of the images in pixels
+        background(tuple(int, int, int)) - Background color
+        processes(int) - Number of worker processes
+    """
+    if camera is None:
+        camera = defaultCamera()
+    kwargs = {'camera': camera.matrix() if isinstance(camera, Camera) else camera, 'size': size,
+              'background': background}
+
+    # Workers get plain facelet arrays, which are cheap to pickle
+    states = [toFacelets(state)[0] for state in states]
+    if processes <= 1 or len(states) < 2:
+        return _renderChunk(states, **kwargs).reshape(len(states), size, size, 3)
+
+    chunks = [states[i::processes] for i in range(processes)]
+    with Pool(processes) as pool:
+        parts = pool.map(partial(_renderChunk, **kwargs), chunks)
+
+    images = np.empty((len(states), size, size, 3), dtype=np.uint8)
+    for i, part in enumerate(parts):
+        images[i::processes] = part
+    return images
+
+
+def encodePNG(image):
+    """
+        PNG file of an RGB image, as bytes. Uses zlib only, no imaging library is needed
+
+        image(numpy.ndarray) - RGB image of uint8, shape (height, width, 3). Ex: the output of render
+    """
+    height, width = image.shape[:2]
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    # Every row starts with the filter type, 0 for none
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) + chunk(b'IEND', b''))
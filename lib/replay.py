@@ -0,0 +1,115 @@
+"""
+    Headless replay of the session logs written by SessionRecorder
+
+    The turns of a log are applied to the state engine (CubeState for the 3x3x3 cube, FaceletState for the other
+    orders) and the camera changes to a Camera, as fast as possible: no window, no OpenGL and no animation. The final
+    hash and solved pieces are compared with the end line of the log, so a log is also a regression test of the
+    engine.
+"""
+
+import gzip
+import json
+
+from lib import notation
+from lib.Camera import Camera
+from lib.corpus import unpackState
+from lib.CubeState import CubeState, moveIndex
+from lib.FaceletState import FaceletState
+from lib.SessionRecorder import SESSION_FORMAT
+
+# Camera methods a log can call
+CAMERA_METHODS = ('scale', 'rotate', 'rotateModel', 'translate')
+
+
+def _open(path):
+    return gzip.open(path, 'rt') if path.endswith('.gz') else open(path)
+
+
+def _initialState(header):
+    """
+        State of the cube when the recording started
+    """
+    order = header['order']
+    if 'state' in header:
+        return unpackState(bytes.fromhex(header['state']))
+    if order == 3:
+        return CubeState()
+    return FaceletState(order)
+
+
+def _compileMove(name, state, order):
+    """
+        Function applying a move of a log to a state
+    """
+    turns = notation.faceTurns(notation.parse(name, order), order)
+    if isinstance(state, CubeState):
+        moves = [moveIndex(*turn) for turn in turns]
+        return lambda: state.applyMoves(moves)
+    return lambda: [state.rotateFace(*turn) for turn in turns]
+
+
+def replay(path, camera=True):
+    """
+        Replay a session log and check its final state. Raises ValueError for files that are not session logs
+
+        Returns a dict with the order, the final state, the camera matrix, the number of turns and camera changes,
+        the duration of the session in seconds and verified: True when the final state matches the end line of the
+        log, False when it does not and None for logs without an end line (the viewer did not exit normally)
+
+        path(str) - Log written by SessionRecorder, gzip compressed when the name ends with .gz
+        camera(bool) - Also replay the camera changes
+    """
+    with _open(path) as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get('format') != SESSION_FORMAT:
+            raise ValueError('%s is not a session log' % path)
+
+        order = header['order']
+        state = _initialState(header)
+        view = Camera()
+
+        # Every distinct move is parsed once, a session repeats the same few moves many times
+        moves = {}
+        turns = camera_changes = 0
+        end = None
+        time_ms = 0
+
+        for line in f:
+            time_ms, kind, args = line.rstrip('\n').split(' ', 2)
+            if kind == 'T':
+                if args not in moves:
+                    moves[args] = _compileMove(args, state, order)
+                moves[args]()
+                turns += 1
+            elif kind == 'C':
+                method, *values = args.split()
+                if method not in CAMERA_METHODS:
+                    raise ValueError('Unknown camera change in %s: %s' % (path, line.strip()))
+                if camera:
+                    getattr(view, method)(int(values[0]) if method != 'scale' else float(values[0]),
+                                          *(float(x) for x in values[1:]))
+                camera_changes += 1
+            elif kind == 'E':
+                end = args.split()
+
+    if end is None:
+        verified = None
+    else:
+        verified = int(end[0], 16) == state.hash and int(end[1]) == state.solved_pieces
+
+    return {'path': path, 'order': order, 'state': state, 'camera': view.matrix() if camera else None,
+            'turns': turns, 'camera_changes': camera_changes, 'seconds': int(time_ms) / 1000,
+            'hash': '%016x' % state.hash, 'solved': bool(state.is_solved()), 'verified': verified}
+
+
+def turnTimes(path):
+    """
+        Time in seconds and name of every turn of a session log, for statistics. Ex: turns per second
+    """
+    with _open(path) as f:
+        f.readline()
+        events = [line.split() for line in f]
+    return [(int(event[0]) / 1000, event[2]) for event in events if event[1] == 'T']
@@ -0,0 +1,54 @@
+"""
+    The 24 proper rotations of the cube
+
+    Orientations are stored as an index into ROTATIONS and composed with the precomputed MULTIPLY table, so a
+    cubie orientation is a small integer that never drifts, and comparing two orientations is an integer compare.
+"""
+
+import numpy as np
+from lib.CubeState import quarterTurnMatrix
+
+IDENTITY = 0
+
+
+def _generateRotations():
+    """
+        Every product of quarter turns around the axes, in breadth first order starting from the identity
+    """
+    generators = [quarterTurnMatrix(axis, 1) for axis in range(3)]
+    rotations = [np.identity(3, dtype=np.int64)]
+    seen = {rotations[0].tobytes()}
+
+    for mat in rotations:
+        for gen in generators:
+            new = gen @ mat
+            if new.tobytes() not in seen:
+                seen.add(new.tobytes())
+                rotations.append(new)
+
+    return np.array(rotations, dtype=np.int8)
+
+
+# Rotation matrices, shape (24, 3, 3), and the same rotations as 4x4 homogeneous matrices
+ROTATIONS = _generateRotations()
+ROTATIONS4 = np.zeros((len(ROTATIONS), 4, 4), dtype=np.float32)
+ROTATIONS4[:, :3, :3] = ROTATIONS
+ROTATIONS4[:, 3, 3] = 1.0
+
+_INDEX = {mat.tobytes(): i for i, mat in enumerate(ROTATIONS)}
+
+
+def rotationIndex(mat):
+    """
+        Index in ROTATIONS of an integer 3x3 rotation matrix
+
+        mat(numpy.ndarray) - Rotation matrix, one of the 24 rotations of the cube
+    """
+    return _INDEX[np.asarray(mat, dtype=np.int8).tobytes()]
+
+
+# MULTIPLY[a][b] is the index of ROTATIONS[a] @ ROTATIONS[b], that is b followed by a
+MULTIPLY = [[rotationIndex(a.astype(np.int64) @ b) for b in ROTATIONS] for a in ROTATIONS]
+
+# QUARTER[axis][q] is the index of a rotation of q quarter turns around the axis
+QUARTER = [[rotationIndex(quarterTurnMatrix(axis, q)) for q in range(4)] for axis in range(3)]
@@ -0,0 +1,117 @@
+"""
+    Random state scrambles of the 3x3x3 cube
+
+    A random state scramble is drawn uniformly among the 43 quintillion solvable states, which random move
+    sequences only approach after many moves. The state is drawn directly (any permutation of the corners and edges
+    with the same parity, any orientations adding up to zero) and the scramble is the inverse of a solution found
+    by lib/solver.py, so it only uses the face turns of MOVE_NAMES and plays back the same in the viewer.
+"""
+
+import numpy as np
+from lib import solver
+from lib.CubeState import CubeState, FACE_ORDER
+from lib.facelets import FACE_COLOR, faceletsToState, piecesToFacelets
+
+# Face letter of each facelet color, to write states as 54 letter strings
+COLOR_FACES = ''.join(sorted(FACE_ORDER, key=FACE_COLOR.get))
+_COLOR_BYTES = np.frombuffer(COLOR_FACES.encode(), dtype=np.uint8)
+
+
+def _parity(perms):
+    """
+        Parity (0 or 1) of every permutation of a batch, shape (n, k)
+    """
+    inversions = perms[:, :, None] > perms[:, None, :]
+    return np.triu(inversions, 1).sum(axis=(1, 2)) % 2
+
+
+def randomStates(n, rng=None):
+    """
+        Corner and edge permutations and orientations of n uniformly random solvable states, drawn at once
+
+        Returns (cp, co, ep, eo) arrays of shape (n, 8) and (n, 12), in the format of CubeState
+
+        n(int) - Number of states
+        rng(numpy.random.Generator) - Random generator, a new unseeded one by default
+    """
+    rng = np.random.default_rng() if rng is None else rng
+
+    cp = np.argsort(rng.random((n, 8)), axis=1).astype(np.int8)
+    ep = np.argsort(rng.random((n, 12)), axis=1).astype(np.int8)
+
+    # Every legal state has corner and edge permutations of the same parity. Swapping two edges fixes the others
+    # and keeps the edge permutations uniform
+    odd = _parity(cp) != _parity(ep)
+    ep[odd, 10], ep[odd, 11] = ep[odd, 11], ep[odd, 10]
+
+    # The last orientation is set by the others, since the total twist and flip are always zero
+    co = rng.integers(0, 3, size=(n, 8), dtype=np.int8)
+    co[:, 7] = -co[:, :7].sum(axis=1) % 3
+    eo = rng.integers(0, 2, size=(n, 12), dtype=np.int8)
+    eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+
+    return cp, co, ep, eo
+
+
+def toState(cp, co, ep, eo):
+    """
+        CubeState of one row of randomStates
+    """
+    state = CubeState()
+    state.cp, state.co, state.ep, state.eo = cp.copy(), co.copy(), ep.copy(), eo.copy()
+    return state.updateCounters()
+
+
+def randomState(rng=None):
+    """
+        Uniformly random solvable CubeState
+
+        rng(numpy.random.Generator) - Random generator, a new unseeded one by default
+    """
+    return toState(*(a[0] for a in randomStates(1, rng)))
+
+
+def faceletStrings(cp, co, ep, eo):
+    """
+        54 face letters of every state of a batch, in the facelet order of lib/facelets.py. Ex: the rows of
+        randomStates
+    """
+    letters = _COLOR_BYTES[piecesToFacelets(cp, co, ep, eo)].reshape(-1, 54)
+    return [row.decode() for row in np.ascontiguousarray(letters).view('S54').ravel()]
+
+
+def faceletString(state):
+    """
+        54 face letters of a state, in the facelet order of lib/facelets.py
+    """
+    return faceletStrings(state.cp, state.co, state.ep, state.eo)[0]
+
+
+def parseFaceletString(string):
+    """
+        CubeState of 54 face letters, the inverse of faceletString. Raises ValueError for unknown letters or pieces
+
+        string(str) - 54 face letters. Ex: a line of generate_scrambles.py
+    """
+    letters = np.frombuffer(string.strip().encode(), dtype=np.uint8)
+    if len(letters) != 54 or not np.isin(letters, _COLOR_BYTES).all():
+        raise ValueError('Not a state of 54 face letters (%s): %r' % (COLOR_FACES, string))
+    return faceletsToState(np.argmax(letters[:, None] == _COLOR_BYTES, axis=1))
+
+
+def scramble(state, max_length=30, timeout=1.0):
+    """
+        Move names that bring the solved cube to a state, the inverse of its solution
+
+        Raises ValueError when the solver finds no solution of at most MAX_SOLUTION_LENGTH moves
+
+        state(CubeState) - State to reach
+        max_length(int) - Length of a good enough scramble. Shorter ones take longer to find
+        timeout(float) - Seconds spent looking for a scramble with at most max_length moves
+    """
+    solution = solver.solve(state, max_length, timeout)
+    scramble = [name[0] + {'': "'", '2': '2', "'": ''}[name[1:]] for name in reversed(solution)]
+
+    if CubeState().applyMoves(scramble).hash != state.hash:
+        raise ValueError('No scramble found for the state')
+    return scramble
@@ -0,0 +1,295 @@
+"""
+    Two-phase (Kociemba) solver for the 3x3x3 cube
+
+    Phase 1 brings the cube into the subgroup <U, D, R2, F2, L2, B2> (every orientation solved and the slice
+    edges inside the middle slice) and phase 2 solves it using only the moves of that subgroup. Both phases are
+    iterative deepening searches guided by the pruning tables of lib/tables.py.
+"""
+
+import time
+from collections import deque
+
+from lib import symmetry, tables
+from lib.CubeState import CubeState, ALL_MOVE_NAMES, N_MOVES, N_ALL_MOVES, CENTER_PERM, faceAngle
+
+# Any cube can be solved with a phase 1 of at most 12 moves followed by a phase 2 of at most 18 moves
+MAX_SOLUTION_LENGTH = 30
+
+# Long phase 2 searches are abandoned in favour of the next phase 1 solution, which is usually much faster
+PHASE2_MAX_DEPTH = 12
+
+_tables = None
+
+
+class _Tables:
+    """
+        Move tables as flat lists (fast item access from Python) and pruning tables as memory-mapped views
+    """
+
+    def __init__(self):
+        self.twist_move = tables.loadTable('twist_move').ravel().tolist()
+        self.flip_move = tables.loadTable('flip_move').ravel().tolist()
+        self.slice_move = tables.loadTable('slice_move').ravel().tolist()
+        self.cp_move = tables.loadTable('cp_move').ravel().tolist()
+        self.ud8_move = tables.loadTable('ud8_move').ravel().tolist()
+        self.slice_perm_move = tables.loadTable('slice_perm_move').ravel().tolist()
+
+        # memoryview indexing returns plain ints and keeps the tables mapped instead of copying them. Pruning
+        # tables hold two entries per byte, see tables.packNibbles
+        self.twist_slice_prun = memoryview(tables.loadTable('twist_slice_prun'))
+        self.flip_slice_prun = memoryview(tables.loadTable('flip_slice_prun'))
+        self.twist_flip_prun = memoryview(tables.loadTable('twist_flip_prun'))
+        self.cp_slice_perm_prun = memoryview(tables.loadTable('cp_slice_perm_prun'))
+        self.ud8_slice_perm_prun = memoryview(tables.loadTable('ud8_slice_perm_prun'))
+
+
+def getTables():
+    """
+        Load (and build on the first run) every table needed by the solver
+    """
+    global _tables
+    if _tables is None:
+        _tables = _Tables()
+    return _tables
+
+
+def _allowed(move, last):
+    """
+        Skip turns of the same face twice in a row and search opposite faces in a single order
+    """
+    if last is None:
+        return True
+    face, last_face = move // 3, last // 3
+    return face != last_face and face != last_face - 3
+
+
+# Moves allowed after each move (index N_MOVES stands for the start of the search)
+_NEXT_PHASE1 = [[m for m in range(N_MOVES) if _allowed(m, last)] for last in range(N_MOVES)] + [list(range(N_MOVES))]
+_NEXT_PHASE2 = [[(j, m) for j, m in enumerate(tables.PHASE2_MOVES) if _allowed(m, last)]
+                for last in range(N_MOVES)] + [list(enumerate(tables.PHASE2_MOVES))]
+
+
+class _Search:
+    """
+        State of a single solve call
+    """
+
+    def __init__(self, state, max_length, timeout):
+        self.t = getTables()
+        self.state = state
+        self.max_length = max_length
+        self.deadline = time.perf_counter() + timeout
+        self.best = None
+        self.phase1 = []
+
+    def run(self):
+        twist = int(tables.getTwist(self.state.co))
+        flip = int(tables.getFlip(self.state.eo))
+        slice_ = int(tables.getSlice(self.state.ep))
+
+        depth = self._h1(twist, flip, slice_)
+        while depth <= MAX_SOLUTION_LENGTH:
+            if self._phase1(twist, flip, slice_, depth, N_MOVES):
+                break
+            if self.best is not None and (depth >= len(self.best) or time.perf_counter() > self.deadline):
+                break
+            depth += 1
+
+        return self.best
+
+    def _h1(self, twist, flip, slice_):
+        t = self.t
+        return max(tables.pruningValue(t.twist_slice_prun, twist * tables.N_SLICE + slice_),
+                   tables.pruningValue(t.flip_slice_prun, flip * tables.N_SLICE + slice_),
+                   tables.pruningValue(t.twist_flip_prun, twist * tables.N_FLIP + flip))
+
+    def _phase1(self, twist, flip, slice_, depth, last):
+        """
+            Returns True when the search must stop (good enough solution or out of time)
+
+            The children are pruned before recursing, so this is only called on nodes at most depth moves away
+            from the phase 1 goal
+        """
+        if depth == 0:
+            # Only start phase 2 right after a move that left the subgroup, otherwise a shorter phase 1 exists
+            if last == N_MOVES or last not in tables.PHASE2_MOVES:
+                return self._startPhase2()
+            return False
+
+        if self.best is not None and time.perf_counter() > self.deadline:
+            return True
+
+        t = self.t
+        twist_slice_prun, flip_slice_prun, twist_flip_prun = t.twist_slice_prun, t.flip_slice_prun, t.twist_flip_prun
+        twist, flip, slice_ = twist * N_MOVES, flip * N_MOVES, slice_ * N_MOVES
+        depth -= 1
+
+        for m in _NEXT_PHASE1[last]:
+            new_twist, new_flip, new_slice = t.twist_move[twist + m], t.flip_move[flip + m], t.slice_move[slice_ + m]
+
+            # Inlined tables.pruningValue, this is the hottest loop of the solver
+            i = new_twist * tables.N_SLICE + new_slice
+            if (twist_slice_prun[i >> 1] >> ((i & 1) << 2)) & 15 > depth:
+                continue
+            i = new_flip * tables.N_SLICE + new_slice
+            if (flip_slice_prun[i >> 1] >> ((i & 1) << 2)) & 15 > depth:
+                continue
+            i = new_twist * tables.N_FLIP + new_flip
+            if (twist_flip_prun[i >> 1] >> ((i & 1) << 2)) & 15 > depth:
+                continue
+
+            self.phase1.append(m)
+            stop = self._phase1(new_twist, new_flip, new_slice, depth, m)
+            self.phase1.pop()
+            if stop:
+                return True
+
+        return False
+
+    def _startPhase2(self):
+        state = self.state.copy().applyMoves(self.phase1)
+        cp = int(tables.getCornerPerm(state.cp))
+        ud8 = int(tables.getEdgePerm8(state.ep))
+        slice_perm = int(tables.getSlicePerm(state.ep))
+
+        # The first solution may be long, the next ones must be shorter than the best one found so far
+        limit = (len(self.best) - 1 if self.best is not None else MAX_SOLUTION_LENGTH) - len(self.phase1)
+        limit = min(limit, PHASE2_MAX_DEPTH)
+        last = self.phase1[-1] if self.phase1 else N_MOVES
+
+        depth = self._h2(cp, ud8, slice_perm)
+        while depth <= limit:
+            phase2 = []
+            if self._phase2(cp, ud8, slice_perm, depth, last, phase2):
+                self.best = self.phase1 + phase2
+                break
+            depth += 1
+
+        return self.best is not None and (len(self.best) <= self.max_length or time.perf_counter() > self.deadline)
+
+    def _h2(self, cp, ud8, slice_perm):
+        t = self.t
+        return max(tables.pruningValue(t.cp_slice_perm_prun, cp * tables.N_SLICE_PERM + slice_perm),
+                   tables.pruningValue(t.ud8_slice_perm_prun, ud8 * tables.N_SLICE_PERM + slice_perm))
+
+    def _phase2(self, cp, ud8, slice_perm, depth, last, moves):
+        if depth == 0:
+            return True
+
+        t = self.t
+        n = len(tables.PHASE2_MOVES)
+        cp_prun, ud8_prun = t.cp_slice_perm_prun, t.ud8_slice_perm_prun
+        cp, ud8, slice_perm = cp * n, ud8 * n, slice_perm * n
+        depth -= 1
+
+        for j, m in _NEXT_PHASE2[last]:
+            new_cp, new_ud8, new_sp = t.cp_move[cp + j], t.ud8_move[ud8 + j], t.slice_perm_move[slice_perm + j]
+
+            i = new_cp * tables.N_SLICE_PERM + new_sp
+            if (cp_prun[i >> 1] >> ((i & 1) << 2)) & 15 > depth:
+                continue
+            i = new_ud8 * tables.N_SLICE_PERM + new_sp
+            if (ud8_prun[i >> 1] >> ((i & 1) << 2)) & 15 > depth:
+                continue
+
+            moves.append(m)
+            if self._phase2(new_cp, new_ud8, new_sp, depth, m, moves):
+                return True
+            moves.pop()
+
+        return False
+
+
+def _parity(perm):
+    """
+        Parity (0 or 1) of a permutation given as a list
+    """
+    return sum(a > b for i, a in enumerate(perm) for b in perm[i + 1:]) % 2
+
+
+def checkSolvable(state):
+    """
+        Raise ValueError when no sequence of moves reaches a state: the search would never end on it
+
+        state(CubeState) - 3x3x3 state
+    """
+    cp, ep = state.cp.tolist(), state.ep.tolist()
+    if sorted(cp) != list(range(8)) or sorted(ep) != list(range(12)):
+        raise ValueError('The corners or the edges are not a permutation')
+    if state.co.sum() % 3 or state.eo.sum() % 2 or _parity(cp) != _parity(ep):
+        raise ValueError('The state can not be reached with moves (twisted corner, flipped edge or swapped pieces)')
+
+
+def centerMoves(state):
+    """
+        Shortest sequence of slice moves that brings the centers back to their slots, as move indexes. Raises
+        ValueError when no rotation of the cube gives the arrangement of the centers
+
+        state(CubeState) - 3x3x3 state
+    """
+    start = tuple(state.ct.tolist())
+    paths = {start: []}
+    queue = deque([start])
+
+    # There are only 24 center arrangements, a breadth first search over them is instantaneous
+    while queue:
+        ct = queue.popleft()
+        if ct == tuple(range(6)):
+            return paths[ct]
+        for m in range(N_MOVES, N_ALL_MOVES):
+            new_ct = tuple(ct[i] for i in CENTER_PERM[m])
+            if new_ct not in paths:
+                paths[new_ct] = paths[ct] + [m]
+                queue.append(new_ct)
+    raise ValueError('The centers are not in one of the 24 orientations of the cube')
+
+
+def solve(cube, max_length=22, timeout=0.5, cache=None):
+    """
+        Find a move sequence that solves the cube
+
+        Returns the first solution with at most max_length moves, or the shortest one found before the timeout.
+        When the slice moves displaced the centers, the solution starts with the slice moves that fix them and
+        max_length only counts the face turns after them. The timeout only cuts the search for shorter solutions:
+        the first solution is always returned, whatever the time it took. Raises ValueError for a state that can not be
+        solved, see checkSolvable
+
+        cube(Cube | CubeState) - Cube to solve
+        max_length(int) - Length of a good enough solution
+        timeout(float) - Seconds spent looking for a solution with at most max_length moves
+        cache(SolutionCache) - Solutions already computed, keyed by the hash of the canonical form of the state so
+                               the symmetric states share an entry (see lib/symmetry.py). An entry is the first
+                               solution found, returned whenever it has at most max_length moves, whatever
+                               the timeout. It is only replaced by a shorter one
+    """
+    state = getattr(cube, 'state', cube)
+    if not isinstance(state, CubeState):
+        raise ValueError('The solver only handles 3x3x3 cubes')
+
+    centers = centerMoves(state)
+    if centers:
+        state = state.copy().applyMoves(centers)
+    checkSolvable(state)
+
+    if cache is not None:
+        # The centers are solved, so the entries only hold face turns and their length is the one max_length counts
+        canonical, sym = symmetry.canonicalState(state, inverse=True)
+        solution = cache.get(canonical.hash)
+        if solution is None or len(solution) > max_length:
+            # Solved again with the limits of this call when the entry is too long for it, the shorter one is kept
+            found = solve(canonical, max_length, timeout)
+            if solution is None or len(found) < len(solution):
+                solution = found
+                cache.put(canonical.hash, solution)
+        return [ALL_MOVE_NAMES[m] for m in centers] + symmetry.fromCanonical(solution, sym)
+
+    return [ALL_MOVE_NAMES[m] for m in centers + _Search(state, max_length, timeout).run()]
+
+
+def faceTurns(moves):
+    """
+        Convert move names to the (face, ang, depth) arguments of Cube.drawSlowRotateFace
+
+        moves(list(str)) - Move names. Ex: ["R", "U2", "F'", "M"]
+    """
+    return [faceAngle(name) for name in moves]
@@ -0,0 +1,235 @@
+"""
+    The 48 symmetries of the 3x3x3 cube and canonical forms of the states under them
+
+    A symmetry is a rotation of ROTATIONS (0 to 23) or a rotation followed by the central inversion, a mirror image
+    (24 to 47). Conjugating a state by a symmetry moves every sticker with it and gives every sticker the color of the
+    face its color was moved to, so the centers stay where they were: the state seen from another side of the cube,
+    or in a mirror, in the colors of Cubie.colors. Conjugated states need the same number of moves to be solved and
+    the moves solving them are the conjugated moves.
+
+    The conjugation of the pieces is precomputed: after the symmetry s, the slot i holds the (piece, orientation)
+    CORNER_SYM[s, i, piece * 3 + orientation] given the piece on the slot CORNER_SYM_SRC[s, i], and the same for the
+    edges and the centers. The canonical form of a state is its conjugate with the smallest 20 byte record (see
+    lib/corpus.py), optionally also among the conjugates of its inverse, so a cache or a corpus storing canonical
+    forms holds up to 48 (or 96) times fewer states.
+"""
+
+import numpy as np
+from lib.corpus import packStates, stateHashes, unpackRecords
+from lib.CubeState import ALL_MOVE_NAMES, CENTER_PERM, CORNER_ORI, CORNER_PERM, CubeState, EDGE_ORI, EDGE_PERM
+from lib.facelets import (CENTER_COLORS, CENTER_FACELETS, CORNER_COLORS, CORNER_FACELETS, EDGE_COLORS,
+                          EDGE_FACELETS, FACE_NORMALS, faceletGeometry, faceletIndex)
+from lib.rotations import ROTATIONS
+
+N_SYMMETRIES = 48
+
+# Symmetry matrices, shape (48, 3, 3): the rotations, then the same rotations followed by the central inversion
+SYMMETRIES = np.concatenate([ROTATIONS, -ROTATIONS])
+
+_SYM_INDEX = {mat.tobytes(): s for s, mat in enumerate(SYMMETRIES)}
+
+# SYM_INVERSE[s] undoes the symmetry s
+SYM_INVERSE = np.array([_SYM_INDEX[np.ascontiguousarray(mat.T).tobytes()] for mat in SYMMETRIES])
+
+# SYM_COLOR[s, c] is the color given to the stickers of color c, the color of the face they were moved to
+SYM_COLOR = ((SYMMETRIES @ FACE_NORMALS.T).transpose(0, 2, 1)[:, :, None] == FACE_NORMALS).all(axis=-1).argmax(axis=-1)
+
+
+def _faceletSymmetries():
+    """
+        New index of every facelet after every symmetry, shape (48, 54)
+    """
+    positions, normals = faceletGeometry(3)
+    return np.array([faceletIndex(3, positions @ mat.T, normals @ mat.T) for mat in SYMMETRIES.astype(np.int64)])
+
+
+SYM_FACELET = _faceletSymmetries()
+
+
+def _pieceSymmetries(slot_facelets, piece_colors):
+    """
+        (source slot, conjugated piece) tables of a kind of piece, shapes (48, slots) and (48, slots, pieces * n_ori)
+    """
+    n_slots, n_ori = slot_facelets.shape
+    syms = np.arange(N_SYMMETRIES)[:, None]
+
+    # (slot, sticker) of every facelet. The sticker k of slot i goes to the sticker moved[s, i, k] of slot dst[s, i]
+    slot_of, sticker_of = np.zeros(54, dtype=np.intp), np.zeros(54, dtype=np.intp)
+    slot_of[slot_facelets], sticker_of[slot_facelets] = np.arange(n_slots)[:, None], np.arange(n_ori)
+    dst = slot_of[SYM_FACELET[:, slot_facelets[:, 0]]]
+    moved = sticker_of[SYM_FACELET[:, slot_facelets]]
+
+    # Colors of the stickers of every (piece, orientation), recolored by every symmetry, then read in the order of
+    # the stickers of the destination slot: colors[s, i, j, o, k]
+    k = np.arange(n_ori)
+    colors = SYM_COLOR[:, piece_colors[:, (k[None, :] - k[:, None]) % n_ori]]
+    colors = np.take_along_axis(colors[:, None], np.argsort(moved, axis=-1)[:, :, None, None, :], axis=-1)
+
+    # (piece, orientation) of every sequence of colors, read as a number in base 6
+    weights = 6 ** k
+    pieces = np.zeros(6 ** n_ori, dtype=np.int8)
+    pieces[(piece_colors[:, (k[None, :] - k[:, None]) % n_ori] * weights).sum(axis=-1)] = \
+        np.arange(n_slots * n_ori).reshape(n_slots, n_ori)
+
+    src = np.empty((N_SYMMETRIES, n_slots), dtype=np.intp)
+    table = np.empty((N_SYMMETRIES, n_slots, n_slots * n_ori), dtype=np.int8)
+    src[syms, dst] = np.arange(n_slots)
+    table[syms, dst] = pieces[(colors * weights).sum(axis=-1)].reshape(N_SYMMETRIES, n_slots, -1)
+    return src, table
+
+
+CORNER_SYM_SRC, CORNER_SYM = _pieceSymmetries(CORNER_FACELETS, CORNER_COLORS)
+EDGE_SYM_SRC, EDGE_SYM = _pieceSymmetries(EDGE_FACELETS, EDGE_COLORS)
+CENTER_SYM_SRC, CENTER_SYM = _pieceSymmetries(CENTER_FACELETS[:, None], CENTER_COLORS[:, None])
+
+
+def _conjugate(perm, ori, n_ori, src, table, symmetries):
+    """
+        Permutation and orientation of a kind of piece after every symmetry, shape (len(symmetries), n, slots)
+    """
+    coded = (perm.astype(np.intp) * n_ori + ori)[:, src[symmetries]].transpose(1, 0, 2)
+    new = table[symmetries[:, None, None], np.arange(perm.shape[1]), coded]
+    return new // n_ori, new % n_ori
+
+
+def conjugateStates(cp, co, ep, eo, ct=None, symmetries=None):
+    """
+        CubeState arrays of a batch of states conjugated by symmetries, shapes (k, n, 8), (k, n, 12) and (k, n, 6)
+        for k symmetries
+
+        cp, co, ep, eo(numpy.ndarray) - Corner and edge permutations and orientations, shape (n, 8) and (n, 12)
+        ct(numpy.ndarray) - Centers, shape (n, 6). Solved by default
+        symmetries(list(int)) - Indexes in SYMMETRIES, all of them by default
+    """
+    cp, co, ep, eo = (np.asarray(a) for a in (cp, co, ep, eo))
+    ct = np.broadcast_to(np.arange(6), (cp.shape[0], 6)) if ct is None else np.asarray(ct)
+    symmetries = np.arange(N_SYMMETRIES) if symmetries is None else np.asarray(symmetries)
+
+    new_cp, new_co = _conjugate(cp, co, 3, CORNER_SYM_SRC, CORNER_SYM, symmetries)
+    new_ep, new_eo = _conjugate(ep, eo, 2, EDGE_SYM_SRC, EDGE_SYM, symmetries)
+    new_ct, _ = _conjugate(ct, np.zeros_like(ct), 1, CENTER_SYM_SRC, CENTER_SYM, symmetries)
+    return new_cp, new_co, new_ep, new_eo, new_ct
+
+
+def inverseStates(cp, co, ep, eo, ct=None):
+    """
+        CubeState arrays of the inverses of a batch of states, the states solved by the scrambles of the given ones
+    """
+    cp, co, ep, eo = (np.asarray(a) for a in (cp, co, ep, eo))
+    ct = np.broadcast_to(np.arange(6), (cp.shape[0], 6)) if ct is None else np.asarray(ct)
+
+    # Slot i holds piece cp[i] twisted by co[i], so in the inverse slot cp[i] holds piece i twisted by -co[i]
+    inv_cp, inv_ep, inv_ct = (np.argsort(perm, axis=-1) for perm in (cp, ep, ct))
+    return (inv_cp, -np.take_along_axis(co, inv_cp, axis=-1) % 3, inv_ep,
+            -np.take_along_axis(eo, inv_ep, axis=-1) % 2, inv_ct)
+
+
+def _argminRecords(records):
+    """
+        Index along the first axis of the smallest record of every column, comparing their bytes
+    """
+    data = np.ascontiguousarray(records).view(np.uint8).reshape(records.shape + (-1,))
+    keys = [np.ascontiguousarray(data[..., 0:8]).view('>u8')[..., 0],
+            np.ascontiguousarray(data[..., 8:16]).view('>u8')[..., 0],
+            np.ascontiguousarray(data[..., 16:20]).view('>u4')[..., 0]]
+
+    best = np.ones(records.shape, dtype=bool)
+    for key in keys:
+        smallest = np.where(best, key, np.iinfo(key.dtype).max).min(axis=0)
+        best &= key == smallest
+    return best.argmax(axis=0)
+
+
+def canonicalStates(cp, co, ep, eo, ct=None, inverse=False):
+    """
+        Canonical forms of a batch of states: the conjugate with the smallest record. Every state of a symmetry
+        class gets the same canonical form
+
+        Returns the CubeState arrays of the canonical forms and the symmetry giving each of them, shape (n,): the
+        conjugate of the state by s, or of its inverse by s - 48 when s >= 48. See fromCanonical
+
+        cp, co, ep, eo(numpy.ndarray) - Corner and edge permutations and orientations, shape (n, 8) and (n, 12)
+        ct(numpy.ndarray) - Centers, shape (n, 6). Solved by default
+        inverse(bool) - Also consider the conjugates of the inverse states, for classes up to 96 times larger
+    """
+    conjugates = conjugateStates(cp, co, ep, eo, ct)
+    if inverse:
+        conjugates = tuple(np.concatenate([a, b]) for a, b in zip(conjugates, conjugateStates(*inverseStates(
+            cp, co, ep, eo, ct))))
+
+    symmetry = _argminRecords(packStates(*conjugates))
+    columns = np.arange(symmetry.size)
+    return tuple(a[symmetry, columns] for a in conjugates) + (symmetry,)
+
+
+def canonicalRecords(records, inverse=False, chunk_size=100000):
+    """
+        Canonical forms of state records, for example a corpus to deduplicate with numpy.unique. Converted by chunks,
+        so a memory-mapped corpus is never loaded at once
+
+        records(numpy.ndarray) - Records of corpus.STATE_DTYPE
+        inverse(bool) - Also consider the conjugates of the inverse states
+        chunk_size(int) - Records converted at once
+    """
+    result = np.empty(len(records), dtype=records.dtype)
+    for start in range(0, len(records), chunk_size):
+        *canonical, _ = canonicalStates(*unpackRecords(records[start:start + chunk_size]), inverse=inverse)
+        result[start:start + chunk_size] = packStates(*canonical)
+    return result
+
+
+def canonicalState(state, inverse=False):
+    """
+        (canonical form, symmetry) of a single state, see canonicalStates
+
+        state(CubeState) - 3x3x3 state
+        inverse(bool) - Also consider the conjugates of the inverse state
+    """
+    *arrays, symmetry = canonicalStates(state.cp[None], state.co[None], state.ep[None], state.eo[None],
+                                        state.ct[None], inverse)
+    canonical = CubeState()
+    canonical.cp, canonical.co, canonical.ep, canonical.eo, canonical.ct = (a[0].astype(np.int8) for a in arrays)
+    return canonical.updateCounters(), int(symmetry[0])
+
+
+def canonicalHashes(cp, co, ep, eo, ct=None, inverse=False):
+    """
+        CubeState.hash of the canonical forms of a batch of states, the same for every state of a symmetry class
+    """
+    return stateHashes(*canonicalStates(cp, co, ep, eo, ct, inverse)[:5])
+
+
+def _moveSymmetries():
+    """
+        Index in ALL_MOVE_NAMES of every move conjugated by every symmetry, shape (48, len(ALL_MOVE_NAMES))
+    """
+    ori = np.zeros((len(ALL_MOVE_NAMES), 6), dtype=np.int8)
+    moves = packStates(CORNER_PERM, CORNER_ORI, EDGE_PERM, EDGE_ORI, CENTER_PERM).tobytes()
+    index = {moves[i * 20:(i + 1) * 20]: i for i in range(len(ALL_MOVE_NAMES))}
+
+    conjugates = packStates(*conjugateStates(CORNER_PERM, CORNER_ORI, EDGE_PERM, EDGE_ORI, CENTER_PERM))
+    return np.array([[index[record.tobytes()] for record in row] for row in conjugates])
+
+
+# SYM_MOVE[s, m] is the move m seen through the symmetry s. Ex: R becomes L' in the mirror of the x axis
+SYM_MOVE = _moveSymmetries()
+
+# Index of the inverse of every move of ALL_MOVE_NAMES
+INVERSE_MOVE = np.array([ALL_MOVE_NAMES.index(name[0] + {'': "'", '2': '2', "'": ''}[name[1:]])
+                         for name in ALL_MOVE_NAMES])
+
+
+def fromCanonical(moves, symmetry):
+    """
+        Moves solving a state given the moves solving its canonical form
+
+        moves(list(str)) - Names in ALL_MOVE_NAMES solving the canonical form
+        symmetry(int) - Symmetry given by canonicalState for the state
+    """
+    table = SYM_MOVE[SYM_INVERSE[symmetry % N_SYMMETRIES]]
+    result = [int(table[ALL_MOVE_NAMES.index(name)]) for name in moves]
+    if symmetry >= N_SYMMETRIES:
+        # The moves solving the inverse of a state bring the solved cube to the state, so their inverses in
+        # reverse order solve it
+        result = [int(INVERSE_MOVE[m]) for m in reversed(result)]
+    return [ALL_MOVE_NAMES[m] for m in result]
@@ -0,0 +1,372 @@
+"""
+    Coordinates, move tables and pruning tables used by the two-phase solver
+
+    Every table is generated once from the CubeState move tables, saved as a .npy file in TABLE_DIR and
+    memory-mapped on the next runs, so only the first start pays for building them. Pruning tables are
+    generated by a breadth-first search split over a process pool (see generate_tables.py) and stored with
+    4 bits per entry.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from itertools import combinations, permutations
+from math import factorial
+from multiprocessing import shared_memory
+
+import numpy as np
+from lib.CubeState import CORNER_PERM, CORNER_ORI, EDGE_PERM, EDGE_ORI, MOVE_NAMES, N_MOVES
+
+TABLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tables')
+
+# Tables are stored in a directory named after the move definitions, so any change to the cube geometry
+# (and therefore to Cubie.rotateQuarter) makes the solver rebuild them instead of using stale ones. Only the face
+# turns used by the solver are part of the fingerprint
+MOVES_FINGERPRINT = hashlib.sha1(b''.join(t[:N_MOVES].tobytes() for t in (CORNER_PERM, CORNER_ORI, EDGE_PERM, EDGE_ORI))).hexdigest()[:12]
+
+# Value of the pruning table entries that the search did not reach yet
+UNVISITED = 255
+
+# Moves that keep the phase 2 subgroup <U, D, R2, F2, L2, B2>
+PHASE2_MOVES = [MOVE_NAMES.index(name) for name in ('U', 'U2', "U'", 'D', 'D2', "D'", 'R2', 'F2', 'L2', 'B2')]
+
+N_TWIST = 3 ** 7
+N_FLIP = 2 ** 11
+N_SLICE = 495
+N_PERM8 = factorial(8)
+N_SLICE_PERM = factorial(4)
+
+# Edges of the middle (E) slice are FR, FL, BL and BR
+SLICE_EDGES = 8
+
+# Slot combinations of the slice edges, ordered so that the solved combination is 0
+SLICE_COMBOS = np.array(sorted(combinations(range(12), 4), key=lambda c: c != (8, 9, 10, 11)), dtype=np.int8)
+SLICE_RANK = np.zeros(1 << 12, dtype=np.int16)
+SLICE_RANK[(1 << SLICE_COMBOS.astype(np.int64)).sum(axis=1)] = np.arange(N_SLICE)
+
+PERM4 = np.array(list(permutations(range(4))), dtype=np.int8)
+
+
+def permRank(perm):
+    """
+        Lexicographic rank of permutations, computed along the last axis
+
+        perm(numpy.ndarray) - Permutations of range(n), shape (..., n)
+    """
+    n = perm.shape[-1]
+    # Lehmer code: number of smaller elements to the right of each position
+    smaller = (perm[..., None, :] < perm[..., :, None]) & np.triu(np.ones((n, n), dtype=bool), 1)
+    weights = np.array([factorial(n - 1 - i) for i in range(n)])
+    return (smaller.sum(axis=-1) * weights).sum(axis=-1)
+
+
+def getTwist(co):
+    """
+        Corner orientation coordinate, 0 <= twist < 3^7
+    """
+    return (np.asarray(co)[..., :7].astype(np.int64) * 3 ** np.arange(6, -1, -1)).sum(axis=-1)
+
+
+def getFlip(eo):
+    """
+        Edge orientation coordinate, 0 <= flip < 2^11
+    """
+    return (np.asarray(eo)[..., :11].astype(np.int64) * 2 ** np.arange(10, -1, -1)).sum(axis=-1)
+
+
+def getSlice(ep):
+    """
+        Position of the slice edges regardless of their order, 0 <= slice < 495
+    """
+    mask = ((np.asarray(ep) >= SLICE_EDGES).astype(np.int64) << np.arange(12)).sum(axis=-1)
+    return SLICE_RANK[mask]
+
+
+def getCornerPerm(cp):
+    """
+        Corner permutation coordinate, 0 <= cp < 8!
+    """
+    return permRank(np.asarray(cp))
+
+
+def getEdgePerm8(ep):
+    """
+        Permutation of the U and D edges inside the U and D layers (phase 2 only), 0 <= ep < 8!
+    """
+    return permRank(np.asarray(ep)[..., :8])
+
+
+def getSlicePerm(ep):
+    """
+        Permutation of the slice edges inside the slice (phase 2 only), 0 <= sp < 4!
+    """
+    return permRank(np.asarray(ep)[..., 8:] - SLICE_EDGES)
+
+
+def _twistStates():
+    digits = (np.arange(N_TWIST)[:, None] // 3 ** np.arange(6, -1, -1)) % 3
+    return np.hstack([digits, (-digits.sum(axis=1, keepdims=True)) % 3])
+
+
+def _flipStates():
+    digits = (np.arange(N_FLIP)[:, None] >> np.arange(10, -1, -1)) & 1
+    return np.hstack([digits, digits.sum(axis=1, keepdims=True) & 1])
+
+
+def _sliceStates():
+    ep = np.zeros((N_SLICE, 12), dtype=np.int8)
+    ep[np.arange(N_SLICE)[:, None], SLICE_COMBOS] = SLICE_EDGES
+    return ep
+
+
+def _perm8States():
+    return np.array(list(permutations(range(8))), dtype=np.int8)
+
+
+def _ud8States():
+    return np.hstack([_perm8States(), np.tile(np.arange(8, 12, dtype=np.int8), (N_PERM8, 1))])
+
+
+def _slicePermStates():
+    return np.hstack([np.tile(np.arange(8, dtype=np.int8), (N_SLICE_PERM, 1)), PERM4 + SLICE_EDGES])
+
+
+def _moveTable(states, apply, encode, moves, dtype):
+    table = np.empty((len(states), len(moves)), dtype=dtype)
+    for j, m in enumerate(moves):
+        table[:, j] = encode(apply(states, m))
+    return table
+
+
+def _applyOri(ori, perm, delta, n):
+    return (ori[:, perm] + delta) % n
+
+
+# Builders of the move tables. Rows are coordinates and columns are moves (all of MOVE_NAMES in phase 1 and
+# PHASE2_MOVES in phase 2)
+MOVE_TABLES = {
+    'twist_move': lambda: _moveTable(_twistStates(), lambda s, m: _applyOri(s, CORNER_PERM[m], CORNER_ORI[m], 3),
+                                     getTwist, range(N_MOVES), np.int16),
+    'flip_move': lambda: _moveTable(_flipStates(), lambda s, m: _applyOri(s, EDGE_PERM[m], EDGE_ORI[m], 2),
+                                    getFlip, range(N_MOVES), np.int16),
+    'slice_move': lambda: _moveTable(_sliceStates(), lambda s, m: s[:, EDGE_PERM[m]], getSlice,
+                                     range(N_MOVES), np.int16),
+    'cp_move': lambda: _moveTable(_perm8States(), lambda s, m: s[:, CORNER_PERM[m]], getCornerPerm,
+                                  PHASE2_MOVES, np.uint16),
+    'ud8_move': lambda: _moveTable(_ud8States(), lambda s, m: s[:, EDGE_PERM[m]], getEdgePerm8,
+                                   PHASE2_MOVES, np.uint16),
+    'slice_perm_move': lambda: _moveTable(_slicePermStates(), lambda s, m: s[:, EDGE_PERM[m]], getSlicePerm,
+                                          PHASE2_MOVES, np.uint16),
+    'cp18_move': lambda: _moveTable(_perm8States(), lambda s, m: s[:, CORNER_PERM[m]], getCornerPerm,
+                                    range(N_MOVES), np.uint16),
+}
+
+
+def packNibbles(table):
+    """
+        Pack a table of values smaller than 16 with two entries per byte. Entry i is stored in the byte i // 2,
+        in the low nibble when i is even and in the high nibble when i is odd
+    """
+    if len(table) % 2:
+        table = np.append(table, np.uint8(0))
+    return (table[0::2] & 15) | (table[1::2] << 4)
+
+
+def unpackNibbles(packed, size):
+    """
+        Inverse of packNibbles
+
+        packed(numpy.ndarray) - Packed table
+        size(int) - Number of entries of the table
+    """
+    return np.stack([packed & 15, packed >> 4], axis=1).ravel()[:size]
+
+
+# Shared state of the pruning table workers, set by _initWorker
+_worker = {}
+
+
+def _initWorker(shm_name, size, move_a, move_b):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker['shm'] = shm
+    _worker['table'] = np.ndarray(size, dtype=np.uint8, buffer=shm.buf)
+    _worker['move_a'] = loadTable(move_a)
+    _worker['move_b'] = loadTable(move_b)
+
+
+def _expandChunk(args):
+    """
+        Expand one BFS level inside the index range [lo, hi) of the shared table
+
+        Forward mode marks the unvisited neighbours of the entries at the current depth. Backward mode marks the
+        unvisited entries that have a neighbour at the current depth, which is cheaper for the last levels when
+        few entries are left. Both are valid because the move set is closed under inversion. Concurrent writers
+        only ever write depth + 1 over UNVISITED, so the races between workers are harmless.
+
+        Returns the number of entries examined
+    """
+    lo, hi, depth, backward = args
+    table, move_a, move_b = _worker['table'], _worker['move_a'], _worker['move_b']
+    n_b = len(move_b)
+
+    idx = lo + np.flatnonzero(table[lo:hi] == (UNVISITED if backward else depth))
+    a, b = idx // n_b, idx % n_b
+    found = np.zeros(len(idx), dtype=bool)
+
+    for j in range(move_a.shape[1]):
+        neighbours = move_a[a, j].astype(np.int64) * n_b + move_b[b, j]
+        if backward:
+            found |= table[neighbours] == depth
+        else:
+            neighbours = neighbours[table[neighbours] == UNVISITED]
+            table[neighbours] = depth + 1
+
+    if backward:
+        table[idx[found]] = depth + 1
+
+    return len(idx)
+
+
+def _checkpointPaths(name):
+    path = tablePath(name)
+    return path + '.partial.npy', path + '.partial.json'
+
+
+def generateTable(name, processes=1, progress=None):
+    """
+        Build a pruning table with a breadth-first search from the goal and save it packed with packNibbles
+
+        The search works on a shared memory array split in chunks between the worker processes. The array is
+        saved after every level, so an interrupted run resumes from the last completed level
+
+        name(str) - Key of PRUNING_TABLES
+        processes(int) - Number of worker processes, 1 runs the search in the current process
+        progress(callable) - Called after every level with a dict of statistics
+    """
+    move_names = PRUNING_TABLES[name]
+    move_a, move_b = [loadTable(n) for n in move_names]
+    size = len(move_a) * len(move_b)
+    partial_path, state_path = _checkpointPaths(name)
+
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    pool = None
+    try:
+        table = np.ndarray(size, dtype=np.uint8, buffer=shm.buf)
+
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                depth = json.load(f)['depth']
+            table[:] = np.load(partial_path, mmap_mode='r')
+        else:
+            depth = 0
+            table[:] = UNVISITED
+            table[0] = 0
+
+        if processes > 1:
+            pool = multiprocessing.Pool(processes, _initWorker, (shm.name, size) + move_names)
+        else:
+            _initWorker(shm.name, size, *move_names)
+
+        chunk = max(1 << 16, -(-size // (processes * 16)))
+        visited = int(np.count_nonzero(table != UNVISITED))
+        frontier = int(np.count_nonzero(table == depth))
+
+        while frontier:
+            start = time.perf_counter()
+            backward = size - visited < frontier
+            tasks = [(lo, min(lo + chunk, size), depth, backward) for lo in range(0, size, chunk)]
+            examined = sum(pool.imap_unordered(_expandChunk, tasks) if pool else map(_expandChunk, tasks))
+
+            depth += 1
+            frontier = int(np.count_nonzero(table == depth))
+            visited += frontier
+
+            _save(partial_path, table)
+            _saveJson(state_path, {'depth': depth, 'fingerprint': MOVES_FINGERPRINT})
+
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                progress({'name': name, 'depth': depth, 'new': frontier, 'visited': visited, 'size': size,
+                          'seconds': elapsed, 'rate': examined / max(elapsed, 1e-9)})
+
+        # The last level expanded was empty, so the largest distance is depth - 1
+        if depth - 1 > 15:
+            raise ValueError('Table %s has distances up to %d that do not fit in 4 bits' % (name, depth - 1))
+
+        _save(tablePath(name), packNibbles(table))
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+        # Arrays that point to a shared memory block must be released before closing it
+        worker_shm = _worker.pop('shm', None)
+        _worker.clear()
+        if worker_shm is not None:
+            worker_shm.close()
+        table = None
+        shm.close()
+        shm.unlink()
+
+    os.remove(partial_path)
+    os.remove(state_path)
+
+
+def pruningValue(table, index):
+    """
+        Distance stored at an index of a packed pruning table
+    """
+    return (table[index >> 1] >> ((index & 1) << 2)) & 15
+
+
+# Pruning tables and the move tables of their two coordinates. corner_prun (every corner state, 88 million
+# entries) is not used by the solver and is only built on request
+PRUNING_TABLES = {
+    'twist_slice_prun': ('twist_move', 'slice_move'),
+    'flip_slice_prun': ('flip_move', 'slice_move'),
+    'twist_flip_prun': ('twist_move', 'flip_move'),
+    'cp_slice_perm_prun': ('cp_move', 'slice_perm_move'),
+    'ud8_slice_perm_prun': ('ud8_move', 'slice_perm_move'),
+    'corner_prun': ('cp18_move', 'twist_move'),
+}
+SOLVER_TABLES = ['twist_slice_prun', 'flip_slice_prun', 'twist_flip_prun', 'cp_slice_perm_prun', 'ud8_slice_perm_prun']
+
+
+def tablePath(name, extension='.npy'):
+    """
+        File of a table (or of any data that depends on the move definitions) for the current move definitions
+    """
+    return os.path.join(TABLE_DIR, MOVES_FINGERPRINT, name + extension)
+
+
+def _save(path, table):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temporary file first so that an interrupted run never leaves a truncated table behind
+    np.save(path + '.tmp.npy', table)
+    os.replace(path + '.tmp.npy', path)
+
+
+def _saveJson(path, data):
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+
+def loadTable(name):
+    """
+        Load a table as a read-only memory map, building and saving it first if needed
+
+        Pruning tables are packed with packNibbles, read them with pruningValue
+
+        name(str) - Key of MOVE_TABLES or PRUNING_TABLES
+    """
+    path = tablePath(name)
+
+    if not os.path.exists(path):
+        if name in MOVE_TABLES:
+            _save(path, MOVE_TABLES[name]())
+        else:
+            generateTable(name)
+
+    return np.load(path, mmap_mode='r')
@@ -1,7 +1,10 @@
+import sys
 import glfw
 import numpy as np
 from OpenGL.GL import *
 from lib import globals
+from lib import lastlayer
+from lib import solver
 
 def applyShaders(vert_code, frag_code):
     """
@@ -20,11 +23,17 @@ def applyShaders(vert_code, frag_code):
     glCompileShader(vertex)
     glCompileShader(fragment)
 
+    for shader in (vertex, fragment):
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError('Shader compilation failed: %s' % glGetShaderInfoLog(shader))
+
     program = glCreateProgram()
     glAttachShader(program, vertex)
     glAttachShader(program, fragment)
 
     glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError('Shader link failed: %s' % glGetProgramInfoLog(program))
     glUseProgram(program)
 
     return program
@@ -39,33 +48,25 @@ def createWindow(vert_code, frag_code):
 
     glfw.init()
     glfw.window_hint(glfw.VISIBLE, glfw.FALSE);
+
+    # Instanced draw calls and vertex attribute divisors need OpenGL 3.3, macOS only gives it to a forward
+    # compatible core profile
+    glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+    glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+    glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+    if sys.platform == 'darwin':
+        glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, glfw.TRUE)
+
     window = glfw.create_window(700, 700, "Cubo", None, None)
+    if not window:
+        glfw.terminate()
+        raise RuntimeError('Could not create an OpenGL 3.3 core profile window')
     glfw.make_context_current(window)
 
     program = applyShaders(vert_code, frag_code)
 
     return window, program
 
-def sendVertices(program, vertices):
-    """
-        Send the vertices to the GPU
-
-        program(OpenGL.GL.shaders.ShaderProgram) - Shader program
-        vertices(numpy.ndarray) - Vertices to be sent to the GPU
-    """
-
-    buffer = glGenBuffers(1)
-    glBindBuffer(GL_ARRAY_BUFFER, buffer)
-    glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
-
-    loc = glGetAttribLocation(program, "position")
-    glEnableVertexAttribArray(loc)
-
-    stride = vertices.strides[0]
-    offset = ctypes.c_void_p(0)
-
-    glVertexAttribPointer(loc, 3, GL_FLOAT, False, stride, offset)
-
 def keyHandler(window, key, scancode, action, mods):
     """
         Handle the key events
@@ -118,44 +119,62 @@ def keyHandler(window, key, scancode, action, mods):
     if key == glfw.KEY_P:
         print(globals.cube.is_solved())
 
-    # Face Rotations
+    # Face Rotations, queued and animated by the main loop
     if globals.lock_rotation == True:
         return
+
+    # Layer turned by the face keys, counted from the face: 0 turns the face itself, 1 the layer behind it...
+    if glfw.KEY_0 <= key <= glfw.KEY_9 and action == glfw.PRESS:
+        globals.layer_depth = min(key - glfw.KEY_0, globals.cube.order - 1)
+
+    # Solve the cube once the queued turns are played, then queue the solution (3x3x3 only)
+    if key == glfw.KEY_K and action == glfw.PRESS and globals.cube.order == 3:
+        solution = solver.solve(globals.scheduler.finalState(), cache=globals.solution_cache)
+        globals.scheduler.pushMoves(solver.faceTurns(solution))
+
+    # Recognize the last layer case once the queued turns are played, then queue its algorithm (3x3x3 only)
+    if key == glfw.KEY_L and action == glfw.PRESS and globals.cube.order == 3:
+        case = lastlayer.recognize(globals.scheduler.finalState())
+        if case is None:
+            print('First two layers not solved')
+        else:
+            print(' '.join(part for part in (case['step'], case['name'], case['algorithm'].text) if part))
+            globals.scheduler.pushMoves(case['algorithm'].faceTurns())
     
     if key == glfw.KEY_Q and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (1, 0, 0), np.pi/2)
+        globals.scheduler.push((1, 0, 0), np.pi/2, globals.layer_depth)
     
     if key == glfw.KEY_A and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (1, 0, 0), -np.pi/2)
+        globals.scheduler.push((1, 0, 0), -np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_W and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (-1, 0, 0), np.pi/2)
+        globals.scheduler.push((-1, 0, 0), np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_S and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (-1, 0, 0), -np.pi/2)
+        globals.scheduler.push((-1, 0, 0), -np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_E and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 1, 0), np.pi/2)
+        globals.scheduler.push((0, 1, 0), np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_D and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 1, 0), -np.pi/2)
+        globals.scheduler.push((0, 1, 0), -np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_R and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, -1, 0), np.pi/2)
+        globals.scheduler.push((0, -1, 0), np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_F and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, -1, 0), -np.pi/2)
+        globals.scheduler.push((0, -1, 0), -np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_T and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 0, 1), np.pi/2)
+        globals.scheduler.push((0, 0, 1), np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_G and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 0, 1), -np.pi/2)
+        globals.scheduler.push((0, 0, 1), -np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_Y and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 0, -1), np.pi/2)
+        globals.scheduler.push((0, 0, -1), np.pi/2, globals.layer_depth)
 
     if key == glfw.KEY_H and action == glfw.PRESS:
-        globals.cube.drawSlowRotateFace(window, globals.program, (0, 0, -1), -np.pi/2)
+        globals.scheduler.push((0, 0, -1), -np.pi/2, globals.layer_depth)
 
     
\ No newline at end of file
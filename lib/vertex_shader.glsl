@@ -1,7 +1,49 @@
-attribute vec3 position;
+#version 330 core
 
-uniform mat4 mat_transformation;
+// Sticker corner in the (u, v) coordinates of the sticker, per vertex
+in vec2 quad;
+
+// Sticker geometry, color and cubie transformation and position, per instance
+in vec3 corner;
+in vec3 edge_u;
+in vec3 edge_v;
+in vec4 sticker_color;
+in mat4 mat_model;
+in vec4 cubie_pos;
+
+// Normal of the black caps closing the gaps of a layer turn, zero for the stickers
+in vec3 cap_normal;
+
+uniform mat4 mat_camera;
+
+// Layer turn being animated: the cubies whose position along turn_axis is turn_layer are rotated by turn_angle
+// around turn_axis (a unit vector along x, y or z)
+uniform vec3 turn_axis;
+uniform float turn_layer;
+uniform float turn_angle;
+
+out vec4 color;
 
 void main(){
-    gl_Position = mat_transformation * vec4(position,1.0);
+    // The caps are only drawn next to the turning layer, the others are moved out of the clip volume
+    if (dot(cap_normal, cap_normal) > 0.5) {
+        float gap = dot(cubie_pos.xyz + 0.5 * cap_normal, turn_axis) - turn_layer;
+        if (turn_angle == 0.0 || abs(dot(cap_normal, turn_axis)) < 0.5 || abs(gap) > 0.75) {
+            gl_Position = vec4(0.0, 0.0, 2.0, 1.0);
+            color = sticker_color;
+            return;
+        }
+    }
+
+    vec3 position = (mat_model * vec4(corner + quad.x * edge_u + quad.y * edge_v, 1.0)).xyz;
+
+    // Rodrigues' rotation formula, same direction as Cubie.rotateX/Y/Z
+    if (abs(dot(cubie_pos.xyz, turn_axis) - turn_layer) < 0.25) {
+        float c = cos(turn_angle);
+        float s = sin(turn_angle);
+        position = position * c + cross(turn_axis, position) * s + turn_axis * dot(turn_axis, position) * (1.0 - c);
+    }
+
+    gl_Position = mat_camera * vec4(position, 1.0);
+    color = sticker_color;
 }
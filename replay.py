@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+from lib import replay
+
+
+def _replay(args):
+    path, camera = args
+    try:
+        result = replay.replay(path, camera)
+    except (OSError, ValueError) as e:
+        return {'path': path, 'error': str(e), 'verified': False}
+
+    result.pop('state')
+    if result['camera'] is not None:
+        result['camera'] = result['camera'].tolist()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay session logs recorded with cube.py --record, headless and '
+                                                 'as fast as possible, and check their final states')
+    parser.add_argument('logs', nargs='+', help='session logs (.log or .log.gz)')
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--no-camera', action='store_true', help='skip the camera changes')
+    parser.add_argument('--json', action='store_true', help='print one JSON line per log')
+    args = parser.parse_args()
+
+    tasks = [(path, not args.no_camera) for path in args.logs]
+    if args.processes <= 1 or len(tasks) < 2:
+        results = map(_replay, tasks)
+    else:
+        pool = Pool(args.processes)
+        results = pool.imap(_replay, tasks)
+
+    failed = turns = 0
+    for result in results:
+        failed += result['verified'] is False
+        turns += result.get('turns', 0)
+
+        if args.json:
+            print(json.dumps(result))
+        elif 'error' in result:
+            print('%s: %s' % (result['path'], result['error']))
+        else:
+            status = {True: 'ok', False: 'MISMATCH', None: 'no end line'}[result['verified']]
+            print('%s: order %d, %d turns, %d camera changes, %.1fs, %s, hash %s, %s' % (
+                result['path'], result['order'], result['turns'], result['camera_changes'], result['seconds'],
+                'solved' if result['solved'] else 'not solved', result['hash'], status))
+
+    print('%d logs, %d turns, %d failed' % (len(tasks), turns, failed), file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
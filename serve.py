@@ -0,0 +1,41 @@
+import argparse
+import asyncio
+import os
+import sys
+
+from lib.CubeService import CubeService
+
+
+async def serve(args):
+    service = CubeService(args.processes, batch_window=args.batch_window / 1000, batch_size=args.batch_size)
+    await service.start(args.host, args.port, args.unix)
+    print('Serving on %s' % (args.unix or '%s:%d' % (args.host, args.port)), file=sys.stderr)
+
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+        print('Served %s' % service.stats(), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local 3x3x3 cube service: apply moves, check, solve and render '
+                                                 'states sent as JSON lines or binary frames, see lib/CubeService.py')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen to (no authentication, keep it local)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port')
+    parser.add_argument('--unix', metavar='PATH', help='listen to a Unix socket instead of TCP')
+    parser.add_argument('-j', '--processes', type=int, default=os.cpu_count(),
+                        help='worker processes of the solves and thumbnails')
+    parser.add_argument('--batch-window', type=float, default=2.0,
+                        help='milliseconds to gather concurrent requests before serving them together')
+    parser.add_argument('--batch-size', type=int, default=1024, help='requests served at most together')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
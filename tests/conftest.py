@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tests import lib.* the same way the scripts at the root of the repo do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
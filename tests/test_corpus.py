@@ -0,0 +1,83 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib import corpus, glstub, scramble
+from lib.CubeState import ALL_MOVE_NAMES, CubeState, faceAngle
+
+# The viewer modules import glfw and OpenGL, replaced by the recording stand-ins
+glstub.install()
+from lib.Cube import Cube
+
+
+def randomMoves(seed, length=30):
+    rng = random.Random(seed)
+    return [rng.choice(ALL_MOVE_NAMES) for _ in range(length)]
+
+
+def assertSameState(a, b):
+    for name in ('cp', 'co', 'ep', 'eo', 'ct'):
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+    assert a.hash == b.hash
+    assert a.solved_pieces == b.solved_pieces
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_pack_round_trip(seed):
+    state = CubeState().applyMoves(randomMoves(seed))
+    data = corpus.packState(state)
+    assert len(data) == corpus.STATE_SIZE == 20
+    assertSameState(corpus.unpackState(data), state)
+
+
+def test_pack_batch_round_trip():
+    cp, co, ep, eo = scramble.randomStates(1000, np.random.default_rng(0))
+    records = corpus.packStates(cp, co, ep, eo)
+    for a, b in zip((cp, co, ep, eo), corpus.unpackRecords(records)):
+        assert np.array_equal(a, b)
+
+
+@pytest.mark.parametrize('data', [b'\xff' * 20, bytes(20), b'\x00' * 19])
+def test_unpack_rejects_invalid_records(data):
+    with pytest.raises(ValueError):
+        corpus.unpackState(data)
+
+
+def test_serialize_deserialize():
+    cube = Cube(3)
+    for face, ang, depth in (faceAngle(name) for name in randomMoves(7)):
+        cube.commitTurn(face, ang, depth)
+
+    copy = Cube.deserialize(cube.serialize())
+    assert copy.serialize() == cube.serialize()
+    assertSameState(copy.state, cube.state)
+    for a, b in zip(cube.cubies, copy.cubies):
+        assert a.pos == b.pos
+        # A center cubie shows a single sticker, any rotation taking it to its slot is right
+        if len(a.faces) > 1:
+            assert a.orientation == b.orientation
+
+
+def test_corpus_file_round_trip(tmp_path):
+    cp, co, ep, eo = scramble.randomStates(500, np.random.default_rng(1))
+    records = corpus.packStates(cp, co, ep, eo)
+
+    path = str(tmp_path / 'saved.npy')
+    corpus.saveCorpus(path, records)
+    assert np.array_equal(corpus.loadCorpus(path), records)
+
+    path = str(tmp_path / 'created.npy')
+    created = corpus.createCorpus(path, len(records))
+    created[:] = records
+    created.flush()
+    loaded = corpus.loadCorpus(path)
+    assert isinstance(loaded, np.memmap)
+    assert corpus.unpackState(loaded[42]).hash == scramble.toState(cp[42], co[42], ep[42], eo[42]).hash
+
+
+def test_load_rejects_other_arrays(tmp_path):
+    path = str(tmp_path / 'other.npy')
+    np.save(path, np.zeros(10))
+    with pytest.raises(ValueError):
+        corpus.loadCorpus(path)
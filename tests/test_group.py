@@ -0,0 +1,41 @@
+import pytest
+
+from lib import group
+from lib.Algorithm import compileAlgorithm
+
+
+@pytest.mark.parametrize('text, expected', [('R', 4), ('R U', 105), ("R U R' U'", 6), ('R2 U2', 6), ('', 1)])
+def test_order(text, expected):
+    assert group.order(text) == expected
+    assert compileAlgorithm(' '.join([text] * expected)).is_identity()
+
+
+def test_order_of_other_cubes():
+    assert group.order('R', order=4) == 4
+    assert group.order('Rw U', order=4) > 1
+
+
+def test_inverse_commutator_conjugate():
+    assert compileAlgorithm("R U F'").text != group.inverse("R U F'").text
+    assert compileAlgorithm("R U F' " + group.inverse("R U F'").text).is_identity()
+    assert group.commutator('R', 'U').text == "R U R' U'"
+    assert group.conjugate('F', group.commutator('R', 'U')).text == "F R U R' U' F'"
+
+
+def test_cycles():
+    cycles = group.cycles("R U R' U'")
+    assert (('URF', 'DFR'), 1) in cycles['corners']
+    assert group.cycleStructure("R U R' U'") == 'corners 2+ 2+, edges 3'
+    assert group.cycleStructure('') == 'identity'
+
+
+def test_clear_cache_keeps_results():
+    before = group.cycles("R U2 D' B D'")
+    group.clearCache()
+    assert group.cycles("R U2 D' B D'") == before
+
+
+def test_bracket_notation():
+    assert compileAlgorithm('[R, U]').text == group.commutator('R', 'U').text
+    assert compileAlgorithm('[F: [R, U]]').text == "F R U R' U' F'"
+    assert compileAlgorithm("[R, U]2'").text == group.inverse(compileAlgorithm('[R, U] [R, U]')).text
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules of lib/ that draw in a window and import glfw and OpenGL on load, plus the stand-ins of the benchmarks.
+# Every other module is headless: it is checked without being listed anywhere
+WINDOW_MODULES = ('lib.CubeRenderer', 'lib.utils', 'lib.glstub')
+GL_MODULES = ('glfw', 'OpenGL')
+
+# Seconds allowed to import a headless module in a fresh interpreter, numpy already imported
+DEFAULT_BUDGET = 0.1
+BUDGETS = {
+    'lib.CubeState': 0.05,
+    'lib.corpus': 0.05,
+    'lib.solver': 0.15,
+    'lib.CubeService': 0.25,
+}
+
+_IMPORT_SCRIPT = """
+import sys, time
+import numpy
+start = time.perf_counter()
+import %s
+print(time.perf_counter() - start, any(name.split('.')[0] in %r for name in sys.modules))
+"""
+
+
+def headlessModules():
+    """
+        Names of the modules of lib/ that must import without a window. Ex: "lib.Cube"
+    """
+    names = sorted('lib.' + name[:-3] for name in os.listdir(os.path.join(ROOT, 'lib')) if name.endswith('.py'))
+    return [name for name in names if name not in WINDOW_MODULES]
+
+
+def measureImport(module, repeat=3):
+    """
+        Seconds taken to import a module in a fresh interpreter (best of repeat runs) and whether it loaded a window
+        module
+
+        module(str) - Module name. Ex: "lib.Cube"
+        repeat(int) - Number of interpreters started
+    """
+    best, gl = float('inf'), False
+    for _ in range(repeat):
+        process = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT % (module, GL_MODULES)], cwd=ROOT,
+                                 capture_output=True, text=True)
+        assert process.returncode == 0, process.stderr
+        out = process.stdout.split()
+        best = min(best, float(out[0]))
+        gl = gl or out[1] == 'True'
+    return best, gl
+
+
+def test_budgets_name_headless_modules():
+    assert set(BUDGETS) <= set(headlessModules())
+
+
+@pytest.mark.parametrize('module', headlessModules())
+def test_import(module):
+    seconds, gl = measureImport(module)
+    assert not gl, '%s loads glfw or OpenGL' % module
+    budget = BUDGETS.get(module, DEFAULT_BUDGET)
+    assert seconds <= budget, '%s takes %.0f ms to import, the budget is %.0f ms' % (module, seconds * 1000,
+                                                                                       budget * 1000)
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from lib import group, lastlayer
+from lib.Algorithm import compileAlgorithm
+from lib.CubeState import CubeState
+
+
+def caseState(text, pre=0, post=0):
+    """
+        State solved by a U turn, the algorithm and another U turn
+    """
+    algorithm = compileAlgorithm(' '.join(part for part in (lastlayer.AUF[pre], text, lastlayer.AUF[post]) if part))
+    return group.inverse(algorithm).apply(CubeState())
+
+
+def test_index_covers_every_last_layer():
+    index = lastlayer.getIndex()
+    # 3^3 * 2^3 orientations, the solved one left out, and 4! * 4! / 2 even permutations
+    assert len(index.oll) == 215
+    assert len(index.pll) == 288
+
+
+@pytest.mark.parametrize('case', sorted(lastlayer.PLL_ALGORITHMS))
+def test_recognize_pll(case):
+    rng = random.Random(case)
+    pre, post = rng.randrange(4), rng.randrange(4)
+    state = caseState(lastlayer.PLL_ALGORITHMS[case], pre, post)
+
+    result = lastlayer.recognize(state)
+    assert (result['step'], result['case'], result['name']) == ('PLL', case, '%s perm' % case)
+    assert result['algorithm'].apply(state).is_solved()
+
+
+@pytest.mark.parametrize('case', sorted(lastlayer.OLL_ALGORITHMS)[::7])
+def test_recognize_oll(case):
+    state = caseState(lastlayer.OLL_ALGORITHMS[case], 1)
+
+    result = lastlayer.recognize(state)
+    assert (result['step'], result['case']) == ('OLL', case)
+    result['algorithm'].apply(state)
+    assert not state.co.any() and not state.eo.any()
+    assert lastlayer.recognize(state)['step'] in ('PLL', 'AUF', 'solved')
+
+
+def test_recognize_auf_and_solved():
+    assert lastlayer.recognize(CubeState())['step'] == 'solved'
+
+    result = lastlayer.recognize(CubeState().applyMoves(['U2']))
+    assert (result['step'], result['case'], result['algorithm'].text) == ('AUF', None, 'U2')
+
+
+def test_recognize_needs_first_two_layers():
+    assert lastlayer.recognize(CubeState().applyMoves(['R'])) is None
+
+
+def test_verify_algorithm():
+    assert not lastlayer.verifyAlgorithm("R U R' U' R' F R2 U' R' U' R U R' F'", True).is_identity()
+    with pytest.raises(ValueError):
+        lastlayer.verifyAlgorithm("R U R'")
+    with pytest.raises(ValueError):
+        lastlayer.verifyAlgorithm("F R U R' U' F'", True)
+    with pytest.raises(ValueError):
+        lastlayer.verifyAlgorithm("U4")
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib import notation
+from lib.Algorithm import compileAlgorithm
+from lib.CubeState import ALL_MOVE_NAMES, CubeState
+from lib.FaceletState import FaceletState
+
+SEQUENCES = [
+    "R U R' U'",
+    "(R U R' U')3",
+    "(R U)3 (R' U')'",
+    # The commutator [R U, F D] written out
+    "(R U) (F D) (R U)' (F D)'",
+    "((R U2)2 F')2 D2'",
+    "M2 E S' R2 M' U",
+    "Rw U' r2 x y' z2 F",
+]
+
+
+def randomScramble(rng, length=30):
+    return CubeState().applyMoves([rng.choice(ALL_MOVE_NAMES) for _ in range(length)])
+
+
+def perMove(state, text, order=3):
+    for face, ang, depth in notation.faceTurns(notation.parse(text, order), order):
+        state.rotateFace(face, ang, depth)
+    return state
+
+
+def assertSameState(a, b):
+    for name in ('cp', 'co', 'ep', 'eo', 'ct'):
+        assert np.array_equal(getattr(a, name), getattr(b, name)), name
+    assert a.hash == b.hash
+    assert a.solved_pieces == b.solved_pieces
+
+
+@pytest.mark.parametrize('text', SEQUENCES)
+def test_compiled_algorithm_matches_per_move_application(text):
+    rng = random.Random(text)
+    for _ in range(5):
+        start = randomScramble(rng)
+        assertSameState(compileAlgorithm(text).apply(start.copy()), perMove(start.copy(), text))
+
+
+@pytest.mark.parametrize('order, text', [
+    (2, "(R U R' U')3 x y' z2"),
+    (4, "Rw U' 3r2 x y' z2 F"),
+    (5, "(2R 3U')2 (L D)' M"),
+])
+def test_compiled_algorithm_matches_per_move_on_any_order(order, text):
+    start = FaceletState(order)
+    start.facelets = np.random.default_rng(order).permutation(start.facelets)
+    compiled = compileAlgorithm(text, order).apply(start.copy())
+    assert np.array_equal(compiled.facelets, perMove(start.copy(), text, order).facelets)
+
+
+def test_inverse_and_repetition():
+    state = randomScramble(random.Random(1))
+    algorithm = compileAlgorithm("(R U R' U')")
+    assertSameState(compileAlgorithm("(R U R' U')'").apply(algorithm.apply(state.copy())), state)
+    assert compileAlgorithm("(R U R' U')6").is_identity()
+
+
+def test_round_trip_through_text():
+    for text in SEQUENCES:
+        algorithm = compileAlgorithm(text)
+        assert np.array_equal(compileAlgorithm(algorithm.text).facelet_perm, algorithm.facelet_perm)
+
+
+@pytest.mark.parametrize('text', ['R U X', '(R U', "R U)'", 'R3w$'])
+def test_invalid_sequences_raise(text):
+    with pytest.raises(ValueError):
+        notation.parse(text)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from lib import raster
+from lib.CubeState import CubeState
+from lib.FaceletState import FaceletState
+
+
+def colorsIn(image):
+    return {tuple(color) for color in image.reshape(-1, 3)}
+
+
+@pytest.mark.parametrize('order', [2, 3, 5])
+def test_solved_cube_shows_three_faces(order):
+    image = raster.render(FaceletState(order), size=96, background=(1, 2, 3))
+    stickers = colorsIn(image) - {(1, 2, 3), tuple(raster.BODY_COLOR)}
+    assert len(stickers) == 3
+    assert stickers <= {tuple(color) for color in raster.STICKER_COLORS}
+
+
+def test_every_facelet_has_a_cell():
+    for order in (2, 3, 6):
+        cells = raster.stickerCells(order)
+        assert sorted(cells.reshape(-1)) == list(range(6 * order * order))
+
+
+def test_render_many_matches_render():
+    states = [CubeState().applyMoves(moves) for moves in (['R'], ['U', 'F2'], ["L'", 'D', 'B'])]
+    images = raster.renderMany(states, size=32, processes=2)
+    for state, image in zip(states, images):
+        assert np.array_equal(image, raster.render(state, size=32))
@@ -0,0 +1,75 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from lib import glstub, replay
+from lib.SessionRecorder import SessionRecorder
+
+# The viewer modules import glfw and OpenGL, replaced by the recording stand-ins
+glstub.install()
+from lib.Cube import Cube
+
+
+def recordSession(path, order, seed=0):
+    """
+        Cube of a session of random turns and camera changes, recorded to path
+    """
+    rng = random.Random(seed)
+    cube = Cube(order)
+    ticks = itertools.count()
+    cube.record(SessionRecorder(path, cube, clock=lambda: next(ticks) * 0.25))
+
+    for _ in range(40):
+        face = [0, 0, 0]
+        face[rng.randrange(3)] = rng.choice((-1, 1))
+        cube.commitTurn(tuple(face), rng.choice((-1, 1, 2)) * np.pi / 2, rng.randrange(order))
+        if rng.random() < 0.3:
+            cube.camera.rotate(rng.randrange(3), rng.uniform(-0.5, 0.5))
+    cube.camera.scale(1.1)
+
+    cube.recorder.close(cube)
+    return cube
+
+
+@pytest.mark.parametrize('order', [2, 3, 4])
+@pytest.mark.parametrize('name', ['session.log', 'session.log.gz'])
+def test_replay_matches_the_recorded_cube(tmp_path, order, name):
+    path = str(tmp_path / name)
+    cube = recordSession(path, order, seed=order)
+
+    result = replay.replay(path)
+    assert result['verified'] is True
+    assert result['order'] == order
+    assert result['hash'] == '%016x' % cube.state.hash
+    assert result['turns'] == len(replay.turnTimes(path))
+    assert np.allclose(result['camera'], cube.camera.matrix())
+
+
+def test_replay_detects_a_wrong_end_state(tmp_path):
+    path = str(tmp_path / 'session.log')
+    recordSession(path, 3)
+
+    lines = open(path).read().splitlines()
+    time_ms, kind, state_hash, solved = lines[-1].split()
+    lines[-1] = ' '.join((time_ms, kind, '%016x' % (int(state_hash, 16) ^ 1), solved))
+    open(path, 'w').write('\n'.join(lines) + '\n')
+
+    assert replay.replay(path)['verified'] is False
+
+
+def test_replay_without_end_line(tmp_path):
+    path = str(tmp_path / 'session.log')
+    recordSession(path, 3)
+    lines = open(path).read().splitlines()
+    open(path, 'w').write('\n'.join(lines[:-1]) + '\n')
+
+    assert replay.replay(path)['verified'] is None
+
+
+def test_replay_rejects_other_files(tmp_path):
+    path = str(tmp_path / 'notes.txt')
+    open(path, 'w').write('R U R\' U\'\n')
+    with pytest.raises(ValueError):
+        replay.replay(path)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from lib import scramble, solver
+from lib.CubeState import CubeState
+
+
+def test_random_states_are_solvable():
+    cp, co, ep, eo = scramble.randomStates(200, np.random.default_rng(0))
+    for i in range(len(cp)):
+        solver.checkSolvable(scramble.toState(cp[i], co[i], ep[i], eo[i]))
+
+
+def test_facelet_string_round_trip():
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        state = scramble.randomState(rng)
+        parsed = scramble.parseFaceletString(scramble.faceletString(state))
+        assert parsed.hash == state.hash
+    assert scramble.faceletString(CubeState()) == ''.join(letter * 9 for letter in scramble.COLOR_FACES)
+
+
+def test_scramble_reaches_the_state():
+    state = scramble.randomState(np.random.default_rng(2))
+    moves = scramble.scramble(state, timeout=0.1)
+    assert CubeState().applyMoves(moves).hash == state.hash
@@ -0,0 +1,95 @@
+import asyncio
+import base64
+import json
+
+from lib import corpus
+from lib.CubeService import CubeService, SOLVED_RECORD
+from lib.CubeState import CubeState
+
+T_PERM = "R U R' U' R' F R2 U' R' U' R U R' F'"
+
+
+def record(moves):
+    return corpus.packState(CubeState().applyMoves(moves))
+
+
+def twisted():
+    state = CubeState()
+    state.co[0] = 1
+    return corpus.packState(state)
+
+
+def test_apply_batch_isolates_invalid_requests():
+    requests = [
+        {'state': record(['R']), 'moves': "R'"},
+        {'state': b'\xff' * 20, 'moves': 'R'},
+        {'state': SOLVED_RECORD, 'moves': 'R Q'},
+        {'state': b'\x00' * 3, 'moves': ''},
+        {'state': SOLVED_RECORD, 'moves': T_PERM},
+        {'state': twisted(), 'moves': 'U'},
+    ]
+    results = CubeService().applyBatch(requests)
+
+    assert results[0] == {'state': SOLVED_RECORD, 'hash': CubeState().hash, 'solved': True}
+    assert all(isinstance(result, ValueError) for result in results[1:4])
+
+    expected = CubeState().applyMoves(T_PERM.split())
+    assert results[4] == {'state': corpus.packState(expected), 'hash': expected.hash, 'solved': False}
+
+    # A twisted corner is a valid record, the moves apply even though no scramble reaches it
+    assert results[5]['state'] == corpus.packState(corpus.unpackState(twisted()).applyMoves(['U']))
+
+
+def test_solved_checks():
+    results = CubeService().applyBatch([{'state': SOLVED_RECORD}, {'state': record(['F'])}, {'state': b'\xff' * 20}],
+                                       apply=False)
+    assert results[0]['solved'] is True and results[0]['state'] == SOLVED_RECORD
+    assert results[1]['solved'] is False
+    assert isinstance(results[2], ValueError)
+
+
+async def _session(lines):
+    service = await CubeService(processes=1, batch_window=0.05).start(port=0)
+    port = service.server.sockets[0].getsockname()[1]
+    try:
+        # Two clients, so the bad requests of one share the batches of the other
+        clients = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+        for (_, writer), client_lines in zip(clients, lines):
+            writer.write(''.join(json.dumps(line) + '\n' for line in client_lines).encode())
+            await writer.drain()
+
+        responses = []
+        for (reader, writer), client_lines in zip(clients, lines):
+            responses.append([json.loads(await asyncio.wait_for(reader.readline(), 60)) for _ in client_lines])
+            writer.close()
+        return responses
+    finally:
+        await service.close()
+
+
+def test_service_answers_every_request_of_mixed_batches():
+    good = [
+        {'id': 1, 'op': 'apply', 'state': record(['R']).hex(), 'moves': "R'"},
+        {'id': 2, 'op': 'solved', 'state': SOLVED_RECORD.hex()},
+        {'id': 3, 'op': 'solve', 'state': record(['R', 'U', "F'"]).hex()},
+        {'id': 4, 'op': 'render', 'state': SOLVED_RECORD.hex(), 'size': 16},
+    ]
+    bad = [
+        {'id': 11, 'op': 'apply', 'state': ('ff' * 20), 'moves': 'R'},
+        {'id': 12, 'op': 'solved', 'state': ('ff' * 20)},
+        {'id': 13, 'op': 'solve', 'state': twisted().hex()},
+        {'id': 14, 'op': 'render', 'state': ('ff' * 20)},
+        {'id': 15, 'op': 'apply', 'moves': 7},
+        {'id': 16, 'op': 'fly'},
+    ]
+    good_responses, bad_responses = asyncio.run(_session([good, bad]))
+
+    assert [response['id'] for response in good_responses] == [1, 2, 3, 4]
+    assert good_responses[0]['solved'] is True
+    assert good_responses[1]['solved'] is True
+    solved = CubeState().applyMoves(['R', 'U', "F'"]).applyMoves(good_responses[2]['solution'].split())
+    assert solved.is_solved()
+    assert base64.b64decode(good_responses[3]['png']).startswith(b'\x89PNG')
+
+    assert [response['id'] for response in bad_responses] == [11, 12, 13, 14, 15, 16]
+    assert all('error' in response for response in bad_responses)
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from lib import solver
+from lib.CubeState import ALL_MOVE_NAMES, MOVE_NAMES, CubeState
+
+
+def randomState(rng, length=25):
+    state = CubeState()
+    state.applyMoves([rng.choice(MOVE_NAMES) for _ in range(length)])
+    return state
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_solve_random_states(seed):
+    state = randomState(random.Random(seed))
+    moves = solver.solve(state, timeout=0.1)
+    state.applyMoves(moves)
+    assert state.is_solved()
+
+
+def test_solve_solved_state():
+    assert solver.solve(CubeState()) == []
+
+
+def twistCorner(state):
+    state.co[0] = (state.co[0] + 1) % 3
+
+
+def flipEdge(state):
+    state.eo[0] ^= 1
+
+
+def swapCorners(state):
+    state.cp[[0, 1]] = state.cp[[1, 0]]
+
+
+def duplicateEdge(state):
+    state.ep[0] = state.ep[1]
+
+
+@pytest.mark.parametrize('breakState', [twistCorner, flipEdge, swapCorners, duplicateEdge])
+def test_solve_rejects_unsolvable_states(breakState):
+    state = randomState(random.Random(0))
+    breakState(state)
+    with pytest.raises(ValueError):
+        solver.solve(state)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_solve_states_with_slice_moves(seed):
+    rng = random.Random(seed)
+    state = CubeState()
+    state.applyMoves([rng.choice(ALL_MOVE_NAMES) for _ in range(25)])
+    moves = solver.solve(state, timeout=0.1)
+    state.applyMoves(moves)
+    assert state.is_solved()
+
+
+def test_solve_rejects_impossible_centers():
+    state = CubeState()
+    state.ct[[0, 1]] = state.ct[[1, 0]]
+    with pytest.raises(ValueError):
+        solver.solve(state)
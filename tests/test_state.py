@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from lib.CubeState import CubeState, MOVE_NAMES, faceAngle
+from lib.FaceletState import FaceletState
+
+
+def sameState(a, b):
+    return all(np.array_equal(getattr(a, name), getattr(b, name)) for name in ('cp', 'co', 'ep', 'eo', 'ct'))
+
+
+@pytest.mark.parametrize('name', MOVE_NAMES)
+def test_depth_2_turns_the_opposite_face(name):
+    face, ang, depth = faceAngle(name)
+    opposite = tuple(-x for x in face)
+    assert sameState(CubeState().applyMoves([name]), CubeState().rotateFace(opposite, ang, 2))
+
+
+@pytest.mark.parametrize('order', [2, 4, 5])
+def test_last_layer_turns_the_opposite_face(order):
+    turned = FaceletState(order).rotateFace((1, 0, 0), np.pi / 2, order - 1)
+    opposite = FaceletState(order).rotateFace((-1, 0, 0), np.pi / 2, 0)
+    assert np.array_equal(turned.facelets, opposite.facelets)
+
+
+def test_missing_layer_raises():
+    with pytest.raises(ValueError):
+        CubeState().rotateFace((1, 0, 0), np.pi / 2, 3)
+    with pytest.raises(ValueError):
+        FaceletState(4).rotateFace((1, 0, 0), np.pi / 2, 4)
@@ -0,0 +1,95 @@
+import random
+
+import numpy as np
+import pytest
+
+from lib import corpus, scramble, solver, symmetry
+from lib.CubeState import ALL_MOVE_NAMES, MOVE_NAMES, CubeState
+from lib.SolutionCache import SolutionCache
+
+
+def randomState(seed, length=25):
+    rng = random.Random(seed)
+    return CubeState().applyMoves([rng.choice(MOVE_NAMES) for _ in range(length)])
+
+
+def arrays(state):
+    return state.cp[None], state.co[None], state.ep[None], state.eo[None], state.ct[None]
+
+
+def toState(cp, co, ep, eo, ct):
+    state = CubeState()
+    state.cp, state.co, state.ep, state.eo, state.ct = (np.asarray(a).astype(np.int8) for a in (cp, co, ep, eo, ct))
+    return state.updateCounters()
+
+
+def test_move_symmetries_are_moves():
+    assert symmetry.SYM_MOVE.shape == (symmetry.N_SYMMETRIES, len(ALL_MOVE_NAMES))
+    assert (np.sort(symmetry.SYM_MOVE, axis=1) == np.arange(len(ALL_MOVE_NAMES))).all()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_canonical_form_of_conjugates(seed):
+    state = randomState(seed)
+    canonical, _ = symmetry.canonicalState(state)
+
+    conjugates = symmetry.conjugateStates(*arrays(state))
+    for s in range(symmetry.N_SYMMETRIES):
+        conjugate = toState(*(a[s, 0] for a in conjugates))
+        assert symmetry.canonicalState(conjugate)[0].hash == canonical.hash
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_canonical_form_of_inverse(seed):
+    state = randomState(seed)
+    inverse = toState(*(a[0] for a in symmetry.inverseStates(*arrays(state))))
+
+    assert symmetry.canonicalState(inverse, inverse=True)[0].hash == \
+        symmetry.canonicalState(state, inverse=True)[0].hash
+
+
+@pytest.mark.parametrize('inverse', [False, True])
+def test_from_canonical_solves_state(inverse):
+    for seed in range(3):
+        state = randomState(seed)
+        canonical, sym = symmetry.canonicalState(state, inverse=inverse)
+        moves = symmetry.fromCanonical(solver.solve(canonical, timeout=0.1), sym)
+        assert state.copy().applyMoves(moves).is_solved()
+
+
+def test_canonical_records_match_states():
+    records = corpus.packStates(*scramble.randomStates(50, np.random.default_rng(0)))
+    canonical = symmetry.canonicalRecords(records, inverse=True, chunk_size=16)
+
+    for record, expected in zip(records, canonical):
+        state, _ = symmetry.canonicalState(corpus.unpackState(record), inverse=True)
+        assert corpus.packState(state) == expected.tobytes()
+
+
+def test_cache_shared_by_symmetric_states():
+    cache = SolutionCache()
+    state = randomState(0)
+    mirror = toState(*(a[symmetry.N_SYMMETRIES - 1, 0] for a in symmetry.conjugateStates(*arrays(state))))
+
+    for cube in (state, mirror):
+        assert cube.copy().applyMoves(solver.solve(cube, timeout=0.1, cache=cache)).is_solved()
+    assert len(cache) == 1
+    assert cache.hits == 1
+
+
+def test_cache_entry_checked_against_max_length():
+    cache = SolutionCache()
+    state = CubeState().applyMoves(['R', 'U', 'F'])
+    canonical, _ = symmetry.canonicalState(state, inverse=True)
+
+    # A valid but long entry is solved again for a stricter call, and replaced by the shorter solution
+    long_solution = solver.solve(canonical) + ['U', "U'"] * 5
+    cache.put(canonical.hash, long_solution)
+    moves = solver.solve(state, max_length=len(long_solution) - 1, cache=cache)
+    assert state.copy().applyMoves(moves).is_solved()
+    assert len(cache.get(canonical.hash)) < len(long_solution)
+
+    # A looser call returns the entry as it is
+    cache.put(canonical.hash, long_solution)
+    assert len(solver.solve(state, max_length=len(long_solution), cache=cache)) == len(long_solution)
+    assert cache.get(canonical.hash) == long_solution